@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+USAGE:
+      yb.py <utility> [options]
+
+PURPOSE:
+      Run a YbEasyCli utility, like: yb.py get_table_names --schema_in dev
+
+OPTIONS:
+      The options of the utility, see: yb.py <utility> --help
+
+Output:
+      The output of the utility.
+"""
+import os
+import sys
+
+# the yb_*.py files which are modules, not utilities
+modules = ('yb_common', 'yb_ddl_object', 'yb_pgwire', 'yb_sp_report_util', 'yb_sysprocs_template')
+
+def utility_names(util_dir_path):
+    return sorted([file_name[:-3] for file_name in os.listdir(util_dir_path)
+        if file_name.startswith('yb_') and file_name.endswith('.py') and file_name[:-3] not in modules])
+
+def main():
+    util_dir_path = os.path.dirname(os.path.realpath(sys.argv[0]))
+
+    if len(sys.argv) < 2 or sys.argv[1] in ('--help', '--usage', '-u'):
+        sys.stdout.write('%s\nutilities:\n  %s\n' % (
+            __doc__.strip('\n'), '\n  '.join(utility_names(util_dir_path))))
+        exit(0 if len(sys.argv) >= 2 else 1)
+
+    util_name = sys.argv[1]
+    if util_name.endswith('.py'):
+        util_name = util_name[:-3]
+    if not util_name.startswith('yb_'):
+        util_name = 'yb_%s' % util_name
+
+    if util_name not in utility_names(util_dir_path):
+        sys.stderr.write('yb.py: unknown utility: %s, for the list of utilities, execute: yb.py --help\n'
+            % sys.argv[1])
+        exit(1)
+
+    # the utility is run as if it was run from the command line, yb_common
+    #   names the utility from sys.argv[0] when it is imported
+    import runpy
+    sys.argv = [os.path.join(util_dir_path, '%s.py' % util_name)] + sys.argv[2:]
+    runpy.run_path(sys.argv[0], run_name='__main__')
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,6 @@ Output:
       Various column statistics for desired table/s column/s.
 """
 import sys
-from tabulate import tabulate
 
 from yb_common import Common, StoredProc, Util
 
@@ -69,6 +68,7 @@ def main():
 
     if acs.cmd_results.stdout != '':
         if acs.args_handler.args.output_format == 1:
+            from tabulate import tabulate
             rows = []
             headers = True
             for line in acs.cmd_results.stdout.split('\n'):
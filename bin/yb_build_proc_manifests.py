@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+USAGE:
+      yb_build_proc_manifests.py [options]
+
+PURPOSE:
+      Build the parsed stored procedure manifests of the sql/*.sql files.
+
+OPTIONS:
+      See the command line help message for all options.
+      (yb_build_proc_manifests.py --help)
+
+Output:
+      A line for each stored procedure manifest built.
+"""
+import os
+import re
+from glob import glob
+
+from yb_common import Common, StoredProc, Text, Util
+
+class build_proc_manifests(Util):
+    """Build the parsed stored procedure manifests of the sql/*.sql files.
+
+    Utilities that run a stored procedure as an anonymous block load the
+    parsed procedure from its manifest, building the manifests ahead of time,
+    like after an install, saves parsing each procedure file on its first run.
+    """
+    config = {
+        'description': 'Build the parsed stored procedure manifests of the sql/*.sql files.'
+        , 'optional_args_single': []
+        , 'usage_example': {
+            'cmd_line_args': '--rebuild'
+            , 'file_args': [] } }
+    proc_dirs = ['.', 'sysviews_yb4', 'sysviews_yb5']
+
+    def additional_args(self):
+        args_grp = self.args_handler.args_parser.add_argument_group('optional arguments')
+        args_grp.add_argument("--procs", nargs="+", metavar="PROC"
+            , help="stored procedures to build the manifest of, like 'sysviews_yb5/table_info_p',"
+                " defaults to all stored procedures")
+        args_grp.add_argument("--rebuild", action="store_true"
+            , help="rebuild the manifests even if the stored procedure files have not changed")
+
+    def additional_args_process(self):
+        self.args_handler.args.skip_db_conn = True
+
+    @staticmethod
+    def get_proc_names(proc_dirs):
+        """Get the names of the stored procedures in the sql/ directories.
+
+        :param proc_dirs: the directories under sql/, '.' is sql/ itself
+        """
+        sql_dir = os.path.normpath(Common.util_dir_path + '/../sql')
+        proc_names = []
+        for proc_dir in proc_dirs:
+            for filepath in sorted(glob(os.path.join(sql_dir, proc_dir, '*.sql'))):
+                proc_name = os.path.splitext(os.path.basename(filepath))[0]
+                if proc_dir != '.':
+                    proc_name = '%s/%s' % (proc_dir, proc_name)
+                # only the files of a single stored procedure are parsed
+                if '$proc$' in Common.read_file(filepath):
+                    proc_names.append(proc_name)
+        return proc_names
+
+    @staticmethod
+    def has_return(proc_name):
+        """A stored procedure is run as an anonymous block by replacing its
+        RETURN statement, a procedure without one, like a procedure that RETURNS
+        VOID, can't be parsed and has no manifest.
+        """
+        proc_sql = Common.read_file(StoredProc.proc_file(proc_name))
+        return re.search(r'\$proc\$.*\bRETURN\b.*\$proc\$', proc_sql, re.IGNORECASE | re.DOTALL) is not None
+
+    def execute(self):
+        proc_names = (self.args_handler.args.procs
+            if self.args_handler.args.procs else self.get_proc_names(self.proc_dirs))
+
+        self.failed_ct = 0
+        self.skipped_ct = 0
+        for proc_name in proc_names:
+            if not StoredProc.proc_file_exists(proc_name):
+                Common.error("Stored proc '%s' file not found." % proc_name)
+            if not self.has_return(proc_name):
+                Common.error("Stored proc '%s' has no RETURN statement, it can't be run as an"
+                    " anonymous block." % proc_name, exit_code=None, color='yellow')
+                self.skipped_ct += 1
+                print('%s: %s' % (Text.color('Skipped', fg='yellow'), proc_name))
+                continue
+            if self.args_handler.args.rebuild:
+                manifest_file = StoredProc.manifest_file(proc_name)
+                if os.path.exists(manifest_file):
+                    os.remove(manifest_file)
+            try:
+                StoredProc(proc_name)
+                print('%s: %s' % (Text.color('Built', fg='green'), proc_name))
+            except SystemExit:
+                # the parse error is printed by Common.error
+                self.failed_ct += 1
+                print('%s: %s' % (Text.color('Failed', fg='red'), proc_name))
+
+        print('%s: %d, %s: %d, %s: %d, %s: %s' % (
+            Text.color('Manifests', style='bold'), len(proc_names) - self.failed_ct - self.skipped_ct
+            , Text.color('Skipped', style='bold'), self.skipped_ct
+            , Text.color('Failed', style='bold'), self.failed_ct
+            , Text.color('Directory', style='bold'), Common.cache_dir('proc_manifests')))
+
+def main():
+    bpm = build_proc_manifests()
+    bpm.execute()
+    exit(1 if bpm.failed_ct else 0)
+
+
+if __name__ == "__main__":
+    main()
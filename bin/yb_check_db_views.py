@@ -15,7 +15,7 @@ Output:
 """
 import sys
 
-from yb_common import ArgsHandler, Common, StoredProc, Util
+from yb_common import Common, StoredProc, Util
 from yb_ddl_object import ddl_object
 
 class check_db_views(Util):
@@ -38,11 +38,18 @@ class check_db_views(Util):
         db_ct = 0
         broken_view_ct = 0
         sys.stdout.write('-- Running broken view check.\n')
-        for db in dbs:
-            db_ct += 1
-            cmd_results = StoredProc('yb_check_db_views_p', self.db_conn).call_proc_as_anonymous_block(
+
+        # the databases are checked concurrently, up to --max_concurrency at a time
+        sp = StoredProc('yb_check_db_views_p', self.db_conn)
+        db_cmd_results = self.db_conn.gather_queries([
+            sp.anonymous_block_sql(
                 args = {'a_filter':self.db_filter_sql()}
                 , pre_sql = ('\\c %s\n' % db))
+            for db in dbs])
+
+        for db, cmd_results in zip(dbs, db_cmd_results):
+            db_ct += 1
+            cmd_results = sp.process_anonymous_block_result(cmd_results)
 
             broken_views = []
             if cmd_results.exit_code == 0:
@@ -93,33 +100,11 @@ class check_db_views(Util):
         self.db_conn.database = orig_database        
 
     def get_ddl_view(self, view_path):
-        args_handler = ArgsHandler(check_db_views.config)
-        args_handler.args = lambda:None
-        args_handler.args.template = '{ddl}'
-        args_handler.args.exec_output = False
-        args_handler.args.or_replace = True
-        args_handler.args.with_db = True
-        args_handler.args.with_schema = False
-        args_handler.args.schema_name = None
-        args_handler.args.db_name = None
-        args_handler.args.schema_in_list = [[view_path[1].strip('" ')]]
-        args_handler.args.schema_like_pattern = None
-        args_handler.args.schema_not_in_list = []
-        args_handler.args.schema_not_like_pattern = None
-        args_handler.args.owner_in_list = []
-        args_handler.args.owner_like_pattern = None
-        args_handler.args.owner_not_in_list = []
-        args_handler.args.owner_not_like_pattern = None
-        args_handler.args.view_in_list = [[view_path[2].strip('" ')]]
-        args_handler.args.view_like_pattern = None
-        args_handler.args.view_not_in_list = []
-        args_handler.args.view_not_like_pattern = None
-
-        util_name='ddl_view'
-        ddlo = ddl_object(util_name=util_name, init_default=False, db_conn=self.db_conn, args_handler=args_handler)
-        ddlo.init(object_type=util_name[4:], db_conn=self.db_conn, args_handler=args_handler)
-
-        return(ddlo.execute())
+        return ddl_object.run(
+            ['--output_template', '{ddl}', '--or_replace', '--with_db'
+                , '--schema_in', view_path[1].strip('" ')
+                , '--view_in', view_path[2].strip('" ')]
+            , self.db_conn, object_type='view').stdout
 
 def main():
     cdbv = check_db_views()
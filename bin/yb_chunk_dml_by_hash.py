@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+"""
+USAGE:
+      yb_chunk_dml_by_hash.py [options]
+
+PURPOSE:
+      Create/execute DML chunked by a hash of columns.
+
+OPTIONS:
+      See the command line help message for all options.
+      (yb_chunk_dml_by_hash.py --help)
+
+Output:
+      Chunked DML statements.
+"""
+import sys
+from datetime import datetime
+
+from yb_common import ArgIntRange, Common, Util, UtilChunkDML
+
+class chunk_dml_by_hash(UtilChunkDML):
+    """Issue the ybsql commands used to create/execute DML chunked by a hash of
+    columns, for tables without an integer or date column to chunk on, like a
+    table with a composite or VARCHAR key.
+
+    Each row is put in one of --hash_buckets buckets by the hash of its column
+    values, the rows of each bucket are counted with a single scan of the
+    table, then consecutive buckets are combined into chunks of about
+    --chunk_rows rows.  The chunks cover every bucket, so the rows added after
+    the count are also in a chunk.  The chunks are run with execute_chunks, so
+    --parallel_sessions, --chunk_retries and --chunk_plan work as they do for
+    the other yb_chunk_dml_by_* utilities.
+
+    The hash bucket predicate can't use the zone maps of the table, so each
+    chunk DML scans the whole table, the cost of a run grows with the number
+    of chunks.
+    """
+    config = {
+        'description': 'Chunk DML by a hash of columns or of the distribution key.'
+            '\n'
+            '\nnote:'
+            '\n  the columns default to the distribution key of the table, a chunk then holds'
+            '\n  whole distribution key values spread over all the workers, so a chunk DML that'
+            '\n  joins or groups on the distribution key doesn\'t redistribute rows between workers.'
+            '\n  the hash bucket predicate of a chunk can\'t use zone maps, so each chunk DML is a'
+            '\n  full scan of the table, use large --chunk_rows to run few chunks, prefer the other'
+            '\n  yb_chunk_dml_by_* utilities when the table has an integer or date column to chunk on.'
+        , 'optional_args_single': []
+        , 'default_args': {'pre_sql': '', 'post_sql': ''}
+        , 'usage_example': {
+            'cmd_line_args': '@$HOME/conn.args @$HOME/yb_chunk_dml_by_hash.args --print_chunk_dml'
+            , 'file_args': [ Util.conn_args_file
+                , {'$HOME/yb_chunk_dml_by_hash.args': """--table dze_db1.dev.sales
+--dml \"\"\"INSERT INTO sales_chunk_ordered
+SELECT *
+FROM dze_db1.dev.sales
+WHERE <chunk_where_clause>\"\"\"
+--columns store_id sale_id
+--chunk_rows 100000000"""} ] } }
+
+    def chunks_run_in_own_sessions(self):
+        # the chunks are always run by execute_chunks
+        return True
+
+    def bucket_sql(self, columns):
+        """The SQL of the hash bucket of a row, a number from 0 to --hash_buckets - 1."""
+        return 'MOD(MOD({row_hash}, {buckets}) + {buckets}, {buckets})'.format(
+            row_hash=Common.row_hash_sql(columns), buckets=self.args_handler.args.hash_buckets)
+
+    def distribution_key(self):
+        """Get the distribution key of the table with yb_get_table_distribution_key.
+
+        :return: a list of the distribution key column
+        """
+        from yb_get_table_distribution_key import get_table_distribution_key
+        (database, schema, table) = [
+            (None if name is None else name[1:-1] if name.startswith('"') else name)
+            for name in Common.split_db_object_name(self.args_handler.args.table)]
+
+        gtdk = get_table_distribution_key(init_default=False)
+        gtdk.init_in_process(['--table', table]
+            + (['--schema', schema] if schema else [])
+            + (['--database', database] if database else []), self.db_conn)
+        gtdk.execute()
+        gtdk.cmd_results.on_error_exit()
+
+        distribution_key = gtdk.cmd_results.stdout.strip()
+        if distribution_key in ('', 'RANDOM', 'REPLICATED'):
+            Common.error("the table '%s' has no distribution key%s, use --columns to set the columns to hash" % (
+                self.args_handler.args.table
+                , (', it is distributed %s' % distribution_key) if distribution_key else ''))
+        return [distribution_key]
+
+    def build_hash_plan(self, columns, plan_args):
+        """Build the chunk plan of the table from the row counts of its hash buckets.
+
+        :return: the plan dictionary, or None if the count failed, its result
+            is then set to self.cmd_results
+        """
+        args = self.args_handler.args
+        verbose = args.verbose_chunk_off
+        if verbose:
+            sys.stdout.write('--%s: Starting Hash Chunking, first calculating bucket counts, Columns: %s\n' % (
+                datetime.now(), plan_args['a_hash_columns']))
+
+        # the table state is read first, so a change during the count causes a rebuild
+        table_state = self.table_state(args.table)
+        cmd_result = self.db_conn.ybsql_query("""
+SELECT bucket, COUNT(*)
+FROM (
+    SELECT {bucket_sql} AS bucket
+    FROM {table}
+    WHERE {table_where_clause}
+) AS b
+GROUP BY 1""".format(
+            bucket_sql=self.bucket_sql(columns), table=args.table, table_where_clause=args.table_where_clause))
+        if cmd_result.exit_code:
+            self.cmd_results = cmd_result
+            return None
+        bucket_rows = {}
+        for line in cmd_result.stdout.strip().split('\n'):
+            if '|' in line:
+                (bucket, rows) = line.split('|')
+                bucket_rows[int(bucket)] = int(rows)
+
+        chunks = []
+        first_bucket = 0
+        rows = 0
+        for bucket in range(args.hash_buckets):
+            rows += bucket_rows.get(bucket, 0)
+            if rows >= args.chunk_rows or bucket == args.hash_buckets - 1:
+                chunk = len(chunks) + 1
+                chunks.append({'chunk': chunk, 'rows': rows
+                    , 'first_val': str(first_bucket), 'last_val': str(bucket)
+                    , 'where': '/* chunk_clause(chunk: %d, size: %d) >>>*/ %s BETWEEN %d AND %d /*<<< chunk_clause */' % (
+                        chunk, rows, self.bucket_sql(columns), first_bucket, bucket)})
+                first_bucket = bucket + 1
+                rows = 0
+
+        total_rows = sum(bucket_rows.values())
+        if verbose:
+            sys.stdout.write('--%s: Build Chunk DMLs, Rows: %d, Buckets: %d, Chunks: %d\n' % (
+                datetime.now(), total_rows, args.hash_buckets, len(chunks)))
+
+        return {
+            'proc': self.util_name
+            , 'args': plan_args
+            , 'table_state': table_state
+            , 'built': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'totals': {'Total Rows': total_rows, 'IS NULL Rows': 0}
+            , 'chunks': chunks }
+
+    def execute(self):
+        args = self.args_handler.args
+        columns = args.columns or self.distribution_key()
+        plan_args = {
+            'a_table'                : args.table
+            , 'a_hash_columns'       : ', '.join([Common.quote_object_paths(column) for column in columns])
+            , 'a_hash_buckets'       : args.hash_buckets
+            , 'a_table_where_clause' : args.table_where_clause
+            , 'a_min_chunk_size'     : args.chunk_rows}
+
+        if args.pre_sql:
+            cmd_result = self.db_conn.ybsql_query(args.pre_sql)
+            if cmd_result.exit_code:
+                self.cmd_results = cmd_result
+                return
+
+        plan = (self.read_chunk_plan(args.chunk_plan, self.util_name, plan_args, args.verbose_chunk_off)
+            if args.chunk_plan else None)
+        if not plan:
+            plan = self.build_hash_plan(columns, plan_args)
+            if not plan:
+                return
+            if args.chunk_plan:
+                self.write_chunk_plan(args.chunk_plan, plan)
+                if args.verbose_chunk_off:
+                    sys.stdout.write('--%s: Saved chunk plan: %s, Chunks: %d\n' % (
+                        datetime.now(), args.chunk_plan, len(plan['chunks'])))
+
+        for chunk in plan['chunks']:
+            chunk['dml'] = self.chunk_dml(args.dml, chunk)
+        if args.execute_chunk_dml:
+            self.cmd_results = self.execute_chunks(plan['chunks'], plan['totals'], False)
+        else:
+            self.print_chunks(plan['chunks'], args.verbose_chunk_off)
+
+    def additional_args(self):
+        args_chunk_r_grp = self.args_handler.args_parser.add_argument_group(
+            'required chunking arguments')
+        args_chunk_r_grp.add_argument(
+            "--table", required=True
+            , help="table name, the name may be qualified if needed")
+        args_chunk_r_grp.add_argument(
+            "--dml", required=True
+            , help="DML to perform  in chunks, the DML"
+                " must contain the string '<chunk_where_clause>' to properly facilitate the"
+                " dynamic chunking filter")
+        args_chunk_r_grp.add_argument(
+            "--chunk_rows", dest="chunk_rows", required=True
+            , type=ArgIntRange(1,9223372036854775807)
+            , help="the minimum rows that each chunk should contain, each chunk DML is a full"
+                " scan of the table, so set it large, like a tenth of the table rows or more, to"
+                " run few chunks")
+
+        args_chunk_o_grp = self.args_handler.args_parser.add_argument_group(
+            'optional chunking arguments')
+        args_chunk_o_grp.add_argument("--columns", nargs="+", metavar="COLUMN"
+            , help="the columns which are hashed to create chunks on the DML, the columns may be"
+                " of any data type, defaults to the distribution key of the table")
+        args_chunk_o_grp.add_argument("--hash_buckets", metavar="BUCKETS"
+            , type=ArgIntRange(1,65536), default=1024
+            , help="the rows are counted in BUCKETS hash buckets which are combined into chunks"
+                ", more buckets make the chunk sizes closer to --chunk_rows, defaults to 1024")
+        args_chunk_o_grp.add_argument("--table_where_clause", default="TRUE"
+            , help="filter the records to chunk, if this filter is applied it should also be"
+                " part of dml provided")
+        args_chunk_o_grp.add_argument("--verbose_chunk_off", action="store_false"
+            , help="don't print additional chunking details, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--print_chunk_dml", action="store_true"
+            , help="print the chunked DML, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--execute_chunk_dml", action="store_true"
+            , help="execute the chunked DML, defaults to FALSE")
+        args_chunk_o_grp.add_argument("--pre_sql", default=''
+            , help="SQL to run before the chunking DML, only runs if execute_chunk_dml is set")
+        args_chunk_o_grp.add_argument("--post_sql", default=''
+            , help="SQL to run after the chunking DML, only runs if execute_chunk_dml is set")
+        self.add_parallel_args(args_chunk_o_grp)
+
+    def additional_args_process(self):
+        if '<chunk_where_clause>' not in self.args_handler.args.dml:
+            self.args_handler.args_parser.error("DML must contain the string '<chunk_where_clause>'")
+
+        if not self.args_handler.args.execute_chunk_dml:
+            self.args_handler.args.pre_sql = ''
+            self.args_handler.args.post_sql = ''
+
+        self.check_pre_sql()
+
+def main():
+    cdml = chunk_dml_by_hash()
+
+    sys.stdout.write('-- Running DML chunking.\n')
+    cdml.execute()
+    cdml.cmd_results.write(tail='-- Completed DML chunking.\n')
+
+    exit(cdml.cmd_results.exit_code)
+
+
+if __name__ == "__main__":
+    main()
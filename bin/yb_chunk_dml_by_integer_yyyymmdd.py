@@ -16,9 +16,9 @@ Output:
 """
 import sys
 
-from yb_common import ArgIntRange, StoredProc, Util
+from yb_common import ArgIntRange, Util, UtilChunkDML
 
-class chunk_dml_by_integer_yyyymmdd(Util):
+class chunk_dml_by_integer_yyyymmdd(UtilChunkDML):
     """Issue the ybsql command used to create/execute DML chunked by an yyyymmdd integer column
     """
     config = {
@@ -38,8 +38,8 @@ ORDER BY sale_date_int\"\"\"
 --chunk_rows 100000000"""} ] } }
 
     def execute(self):
-        self.cmd_results = StoredProc('yb_chunk_dml_by_integer_yyyymmdd_p', self.db_conn).call_proc_as_anonymous_block(
-            args = {
+        self.call_chunk_proc('yb_chunk_dml_by_integer_yyyymmdd_p'
+            , {
                 'a_table'               : self.args_handler.args.table
                 , 'a_yyyymmdd_column'   : self.args_handler.args.column
                 , 'a_dml'               : self.args_handler.args.dml
@@ -47,9 +47,7 @@ ORDER BY sale_date_int\"\"\"
                 , 'a_verbose'           : ('TRUE' if self.args_handler.args.verbose_chunk_off else 'FALSE')
                 , 'a_add_null_chunk'    : ('TRUE' if self.args_handler.args.null_chunk_off else 'FALSE')
                 , 'a_print_chunk_dml'   : ('TRUE' if self.args_handler.args.print_chunk_dml else 'FALSE')
-                , 'a_execute_chunk_dml' : ('TRUE' if self.args_handler.args.execute_chunk_dml else 'FALSE')}
-            , pre_sql = self.args_handler.args.pre_sql
-            , post_sql = self.args_handler.args.post_sql)
+                , 'a_execute_chunk_dml' : ('TRUE' if self.args_handler.args.execute_chunk_dml else 'FALSE')})
 
     def additional_args(self):
         args_chunk_r_grp = self.args_handler.args_parser.add_argument_group(
@@ -85,6 +83,7 @@ ORDER BY sale_date_int\"\"\"
             , help="SQL to run before the chunking DML, only runs if execute_chunk_dml is set")
         args_chunk_o_grp.add_argument("--post_sql", default=''
             , help="SQL to run after the chunking DML, only runs if execute_chunk_dml is set")
+        self.add_parallel_args(args_chunk_o_grp)
 
     def additional_args_process(self):
         if '<chunk_where_clause>' not in self.args_handler.args.dml:
@@ -94,6 +93,8 @@ ORDER BY sale_date_int\"\"\"
             self.args_handler.args.pre_sql = ''
             self.args_handler.args.post_sql = ''
 
+        self.check_pre_sql()
+
 
 def main():
     cdml = chunk_dml_by_integer_yyyymmdd()
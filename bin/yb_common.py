@@ -3,33 +3,35 @@
 and command execution that are common to all utilities in this package.
 """
 
+# the modules only needed by some of the utilities, like tabulate for a formatted
+#   report or pprint for verbose output, are imported where they are used, see
+#   test/bench_startup.py
 import argparse
-import base64
+import atexit
 import copy
-import csv
-import getpass
-import gzip
+import gc
+import itertools
 import os
-import platform
-import pprint
 import re
-import random
 import signal
 import shlex
 import subprocess
 import sys
-import tempfile
+import threading
 import time
-import traceback
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from glob import glob
-from tabulate import tabulate
+from string import Formatter
 try:
-    from distutils.spawn import find_executable
+    import queue                  # for python3
 except ImportError:
-    # Fallback for Python 3.12 and later where distutils is removed
-    # Use shutil.which as a replacement
+    import Queue as queue         # for python2
+try:
+    # shutil.which is preferred, importing distutils pulls in setuptools
     from shutil import which as find_executable
+except ImportError:
+    # Fallback for python2
+    from distutils.spawn import find_executable
 
 def signal_handler(signal, frame):
     """
@@ -46,12 +48,13 @@ class Common:
 
     version = '20240822'
     verbose = 0
+    max_concurrency = 4
 
     util_dir_path = os.path.dirname(os.path.realpath(sys.argv[0]))
     util_file_name = os.path.basename(os.path.realpath(sys.argv[0]))
     util_name = util_file_name.split('.')[0]
     start_ts = datetime.now()
-    is_windows = platform.system() == 'Windows'
+    is_windows = os.name == 'nt'
     is_cygwin = sys.platform == 'cygwin'
 
     if not is_windows:
@@ -61,6 +64,7 @@ class Common:
     @staticmethod
     def error(msg, exit_code=1, color='red'):
         if Common.verbose >= 3:
+            import traceback
             traceback.print_stack()
         sys.stderr.write("%s: %s\n" % (
             Text.color(Common.util_file_name, style='bold')
@@ -88,9 +92,42 @@ class Common:
         """Get the current time (for time stamping)"""
         return str(datetime.now())
 
+    @staticmethod
+    def cache_dir(sub_dir=None):
+        """Get the directory of the YbEasyCli on-disk caches, set with the
+        YBEASYCLI_CACHE_DIR env variable, defaults to ~/.ybeasycli_cache
+
+        :param sub_dir: the directory of a single cache within the cache directory
+        """
+        cache_dir = os.environ.get('YBEASYCLI_CACHE_DIR')
+        if not cache_dir:
+            if Common.is_windows:
+                cache_dir = os.path.expandvars(r'%APPDATA%\yellowbrick\ybeasycli_cache')
+            else:
+                cache_dir = '%s/.ybeasycli_cache' % os.path.expanduser('~')
+        return os.path.join(cache_dir, sub_dir) if sub_dir else cache_dir
+
+    run_id_env = 'YBEASYCLI_RUN_ID'
+    run_id = None
+
+    @staticmethod
+    def get_run_id():
+        """Get the id of the utility run, it is part of the ybd_query_tags of each
+        query and of each trace event, see yb_profile_run.  It is set with the
+        YBEASYCLI_RUN_ID env variable, defaults to the run start time and pid,
+        utilities run as sub-processes share the run id of the calling utility.
+        """
+        if not Common.run_id:
+            # the run id is a part of the ':' separated query tags
+            Common.run_id = (re.sub(r'[^A-Za-z0-9_.-]', '_', os.environ.get(Common.run_id_env, ''))[:64]
+                or '%s_%d' % (Common.start_ts.strftime('%Y%m%d_%H%M%S'), os.getpid()))
+            os.environ[Common.run_id_env] = Common.run_id
+        return Common.run_id
+
     @staticmethod
     def get_uid():
         """Simple UID made of timestamp and a random 5 digit number, not meant to be bullet proof"""
+        import random
         return '%s_%05d' % (datetime.now().strftime('%Y%m%d_%H%M%S'), random.randint(0, 99999))
 
     @staticmethod
@@ -100,6 +137,7 @@ class Common:
         For example take an 'ls' of 1000 files and make the list small via gzip and get rid of
             special chars, newlines, ... with base64.
         """
+        import base64, gzip
         cmdline_args_gz = gzip.compress(bytes(string, 'UTF-8'))
         return base64.b64encode(cmdline_args_gz).decode()
 
@@ -108,6 +146,7 @@ class Common:
         """
         Unpackage a string transmitted as a base64/gzipped.
         """
+        import base64, gzip
         gz = base64.b64decode(gzip_b64_str)
         return gzip.decompress(gz).decode()
 
@@ -166,6 +205,13 @@ class Common:
         else:
             return Common.quote_object_paths(object_paths, quote_all=True)
 
+    @staticmethod
+    def row_hash_sql(columns):
+        """The SQL of the hash of the column values of a row, NULLs hash differently
+        than the empty string."""
+        return 'HASH(%s)' % ' || CHR(31) || '.join([
+            'NVL(%s::VARCHAR, CHR(30))' % Common.quote_object_paths(column) for column in columns])
+
     @staticmethod
     def split(str, delim=','):
         """Split strings with embeded delimiters.
@@ -235,9 +281,174 @@ class Common:
             path = subprocess.check_output(["cygpath", "-w", path], universal_newlines=True).strip()
         return path
 
-class Cmd:
+    @staticmethod
+    def run_threaded(func, items, threads, is_stopped=None):
+        """Run func on each item on up to threads threads, and yield the results
+        as they complete.  The items are taken in order as a thread is free, so
+        items may be a generator that builds each item when it is taken.  Plain
+        threads are used as python2 has no concurrent.futures.
+
+        :param is_stopped: a function, when it returns True no more items are
+            taken, the items already running are finished
+        :return: a generator of the func results in the order they complete, an
+            exception of func is raised after the running items are finished
+        """
+        done = queue.Queue()
+
+        def run(item):
+            try:
+                done.put((func(item), None))
+            except Exception as error:
+                done.put((None, error))
+
+        items = iter(items)
+        running = 0
+        errors = []
+        while True:
+            while not errors and running < threads and not (is_stopped and is_stopped()):
+                item = next(items, None)
+                if item is None:
+                    break
+                thread = threading.Thread(target=run, args=(item,))
+                thread.daemon = True
+                thread.start()
+                running += 1
+            if not running:
+                break
+            (result, error) = done.get()
+            running -= 1
+            if error:
+                errors.append(error)
+            elif not errors:
+                yield result
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def map_threaded(func, items, threads):
+        """Run func on each item on up to threads threads, see run_threaded.
+
+        :return: the list of the func results in the order of items
+        """
+        items = list(items)
+        results = [None] * len(items)
+
+        def run(i):
+            results[i] = func(items[i])
+
+        for _ in Common.run_threaded(run, range(len(items)), threads):
+            pass
+        return results
+
+class Trace(object):
+    """Write a timing event of each Cmd and DBConnect.ybsql_query to a trace
+    file, set with --trace_file or the YBEASYCLI_TRACE_FILE env variable.
+
+    A trace file ending in .json is written in the Chrome trace event format,
+    it opens in chrome://tracing or https://ui.perfetto.dev, any other trace
+    file is written as JSON lines, an event per line.  The events are appended,
+    utilities run as sub-processes inherit the env variable and trace to the
+    same file, so the trace of a scheduled job can be collected across runs.
+    """
+    file_env = 'YBEASYCLI_TRACE_FILE'
+    file_path = os.environ.get(file_env) or None
+    lock = threading.Lock()
+
+    @staticmethod
+    def set_file(file_path):
+        Trace.file_path = file_path
+        os.environ[Trace.file_env] = file_path
+
+    @staticmethod
+    def event(name, category, start, end, **args):
+        """Write an event to the trace file, if there is a trace file.
+
+        :param name: the event name, like 'ybsql_query'
+        :param category: the event category, like 'cmd' or 'query'
+        :param start: the event start, seconds since the epoch, like time.time()
+        :param end: the event end, seconds since the epoch
+        :param args: the event details, like the exit_code, None values are dropped
+        """
+        if not Trace.file_path:
+            return
+        import json
+
+        args = dict([(k, v) for (k, v) in args.items() if v is not None])
+        pid = os.getpid()
+        tid = threading.current_thread().ident
+        is_chrome = Trace.file_path.endswith('.json')
+        if is_chrome:
+            args['util'] = Common.util_name
+            args['run_id'] = Common.get_run_id()
+            event = {
+                'name': name, 'cat': category, 'ph': 'X'
+                , 'ts': int(start * 1000000), 'dur': int((end - start) * 1000000)
+                , 'pid': pid, 'tid': tid, 'args': args}
+            # the closing ] of the event array is optional in the Chrome format,
+            #   so events are appended to the file like JSON lines
+            line = '%s,\n' % json.dumps(event)
+        else:
+            event = {
+                'event': name, 'category': category, 'util': Common.util_name
+                , 'run_id': Common.get_run_id(), 'pid': pid, 'tid': tid
+                , 'start': round(start, 6), 'end': round(end, 6)
+                , 'duration_ms': round((end - start) * 1000, 3)}
+            event.update(args)
+            line = '%s\n' % json.dumps(event)
+
+        with Trace.lock:
+            try:
+                fd = os.open(Trace.file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    if is_chrome and os.fstat(fd).st_size == 0:
+                        line = '[\n%s' % line
+                    os.write(fd, line.encode('utf-8'))
+                finally:
+                    os.close(fd)
+            except (IOError, OSError) as e:
+                # tracing is not allowed to fail the utility
+                if Common.verbose >= 2:
+                    print('%s: %s' % (Text.color('--Trace file write failed', style='bold'), e))
+
+class CmdResult(object):
+    """The results of an executed command; stdout, stderr and exit_code.
+    Cmd and the DBConnect ybsql session both return this contract.
+    """
+    def __init__(self, stdout='', stderr='', exit_code=0):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+
+    def write(self, head='', tail='', quote=False):
+        sys.stdout.write(head)
+        if self.stdout != '':
+            sys.stdout.write(
+                Common.quote_object_paths(self.stdout)
+                if quote
+                else self.stdout)
+        if self.stderr != '':
+            Common.error(self.stderr, exit_code=None)
+        sys.stdout.write(tail)
+
+    def on_error_exit(self, write=True, head='', tail=''):
+        if self.stderr != '' or self.exit_code != 0:
+            if write:
+                self.write(head,tail)
+            exit(self.exit_code)
+
+class Cmd(CmdResult):
     cmd_ct = 0
-    def __init__(self, cmd_str, escape_dollar=True, stack_level=2, wait=True, stdin=None):
+
+    @staticmethod
+    def next_cmd_id():
+        """Number a cmd, the number is taken under the ybsql call lock, so the
+        queries run concurrently by gather_queries get unique Cmd Ids."""
+        with DBConnect.ybsql_call_lock:
+            Cmd.cmd_ct += 1
+            return Cmd.cmd_ct
+
+    def __init__(self, cmd_str, escape_dollar=True, stack_level=2, wait=True, stdin=None
+        , env=None, timeout=None, trace=True):
         """Spawn a new process to execute the given command.
 
         Example: cmd = Cmd('env | grep -i path')
@@ -247,14 +458,18 @@ class Cmd:
         :param stack_level: number, used in verbose mode to print where in the python
                             code this Cmd was called
         :param wait: boolean, wait on the cmd results
+        :param env: dictionary, the environment of the process, defaults to os.environ
+        :param timeout: number, seconds to wait on the cmd before it is killed
+        :param trace: boolean, write a cmd event to the trace file, a cmd run by
+                      DBConnect.ybsql_query is traced by its ybsql_query event
         """
-        Cmd.cmd_ct += 1
-        self.cmd_id = Cmd.cmd_ct
+        self.cmd_id = Cmd.next_cmd_id()
 
         if Common.is_windows:
             cmd_str = self.windows_pre_cmd(cmd_str)
 
         if Common.verbose >= 2:
+            import traceback
             trace_line = traceback.extract_stack(None, stack_level)[0]
             print(
                 '%s: %s, %s: %s, %s: %s\n%s\n%s'
@@ -276,28 +491,47 @@ class Cmd:
 
         self.cmd_dtr = cmd_str
         self.start_time = datetime.now()
+        self.start_ts = time.time()
+        self.stdin_bytes = 0
+        self.is_traced = trace
+        # functions called with the cmd once it completes, see lines()
+        self.on_complete = []
+
+        # a cmd with a timeout runs in its own process group, so the shell and
+        #   everything it started can be killed together
+        popen_kwargs = {}
+        self.own_process_group = (timeout is not None and not(Common.is_windows))
+        if self.own_process_group:
+            popen_kwargs['preexec_fn'] = os.setsid
 
         self.p = subprocess.Popen(
             cmd_str
             , stdin=subprocess.PIPE
             , stdout=subprocess.PIPE
             , stderr=subprocess.PIPE
-            , shell=not(Common.is_windows))
+            , shell=not(Common.is_windows)
+            , env=env
+            , **popen_kwargs)
+        # the time to fork the shell/process, see Trace
+        self.spawn_ms = (time.time() - self.start_ts) * 1000
 
         # TODO the handling of streamed input/output needs alot of work
         # check to see if data is being piped in to the cmd
         if isinstance(stdin, bool) and stdin and (not sys.stdin.isatty()):
-            self.p.stdin.write(sys.stdin.read().encode('utf-8'))
+            stdin_data = sys.stdin.read().encode('utf-8')
+            self.stdin_bytes = len(stdin_data)
+            self.p.stdin.write(stdin_data)
         elif isinstance(stdin, str) and stdin:
             self.p.communicate()[0]
 
         if wait:
-            self.wait()
+            self.wait(timeout)
 
         if Common.is_windows:
             cmd_str = self.windows_post_cmd()
 
     def windows_pre_cmd(self, cmd_str):
+        import tempfile
         self.prefix = ".YbEasyCli_Cmd_"
         fd, self.tmp_ps1_file = tempfile.mkstemp(prefix=self.prefix, suffix=".ps1")
         os.close(fd)
@@ -327,15 +561,40 @@ class Cmd:
             except:
                 None
 
-    def wait(self):
+    def wait(self, timeout=None):
+        """Wait on the cmd to complete and collect its results.
+
+        :param timeout: number, seconds to wait before the cmd is killed, a killed
+                        cmd has an exit_code of 124 and the timeout error in stderr
+        """
         #(stdout, stderr) = map(bytes.decode, p.communicate())
         #TODO change the decode to reflect coding used in the DB connection
-        (stdout, stderr) = self.p.communicate()
-        self.exit_code = self.p.returncode
+        # the cmd is killed from a timer thread, python2 has no communicate timeout
+        timer_kills = []
+        timer = None
+        if timeout is not None:
+            def timer_kill():
+                timer_kills.append(True)
+                self.kill()
+            timer = threading.Timer(timeout, timer_kill)
+            timer.daemon = True
+            timer.start()
+        try:
+            (stdout, stderr) = self.p.communicate()
+        finally:
+            if timer:
+                timer.cancel()
+        self.timed_out = timed_out = bool(timer_kills)
+        self.exit_code = 124 if timed_out else self.p.returncode
         self.stdout = stdout.decode("utf-8", errors='ignore')
         self.stderr = stderr.decode("utf-8", errors='ignore')
+        if timed_out:
+            self.stderr += 'ERROR:  command timed out after %s seconds\n' % timeout
 
         end_time = datetime.now()
+        self.stdout_bytes = len(stdout)
+        self.stderr_bytes = len(stderr)
+        self.trace(timed_out=(timed_out or None))
 
         if Common.verbose >= 2:
             print(
@@ -352,22 +611,474 @@ class Cmd:
                     , Text.color('--Stderr--', style='bold')
                     , Text.color(self.stderr.rstrip(), fg='red')))
 
-    def write(self, head='', tail='', quote=False):
-        sys.stdout.write(head)
-        if self.stdout != '':
-            sys.stdout.write(
-                Common.quote_object_paths(self.stdout)
-                if quote
-                else self.stdout)
-        if self.stderr != '':
-            Common.error(self.stderr, exit_code=None)
-        sys.stdout.write(tail)
+    def lines(self):
+        """Yield the decoded stdout lines of a cmd run with wait=False as they are
+        produced, so the full stdout is never held in memory.
 
-    def on_error_exit(self, write=True, head='', tail=''):
-        if self.stderr != '' or self.exit_code != 0:
-            if write:
-                self.write(head,tail)
-            exit(self.exit_code)
+        Once the last line is read the cmd has completed, stdout is left empty and
+        stderr and exit_code are set like wait() sets them.
+        """
+        stderr_chunks = []
+        def read_stderr():
+            stderr_chunks.append(self.p.stderr.read())
+        stderr_reader = threading.Thread(target=read_stderr)
+        stderr_reader.daemon = True
+        stderr_reader.start()
+
+        try:
+            self.p.stdin.close()
+        except (IOError, OSError):
+            None
+
+        self.stdout_bytes = 0
+        for line in iter(self.p.stdout.readline, b''):
+            self.stdout_bytes += len(line)
+            yield line.decode("utf-8", errors='ignore')
+
+        self.p.stdout.close()
+        stderr_reader.join()
+        self.exit_code = self.p.wait()
+        self.stdout = ''
+        self.stderr_bytes = sum([len(chunk) for chunk in stderr_chunks])
+        self.stderr = b''.join(stderr_chunks).decode("utf-8", errors='ignore')
+        self.trace(stream=True)
+
+        if Common.verbose >= 2:
+            print(
+                '%s: %s\n%s: %s\n%s\n%s'
+                % (
+                    Text.color('--Cmd Id(%d) Execution duration ' % self.cmd_id, style='bold')
+                    , Text.color(datetime.now() - self.start_time, fg='cyan')
+                    , Text.color('--Exit code', style='bold')
+                    , Text.color(
+                        str(self.exit_code)
+                        , fg=('red' if self.exit_code else 'cyan'))
+                    , Text.color('--Stderr--', style='bold')
+                    , Text.color(self.stderr.rstrip(), fg='red')))
+
+        for on_complete in self.on_complete:
+            on_complete(self)
+
+    def trace(self, **args):
+        """Write the trace event of the completed cmd, see Trace."""
+        end_ts = time.time()
+        self.duration_ms = (end_ts - self.start_ts) * 1000
+        if not self.is_traced:
+            return
+        Trace.event('cmd', 'cmd', self.start_ts, end_ts
+            , cmd_id=self.cmd_id, cmd=self.cmd_dtr[:200], exit_code=self.exit_code
+            , spawn_ms=round(self.spawn_ms, 3)
+            , stdin_bytes=self.stdin_bytes, stdout_bytes=self.stdout_bytes
+            , stderr_bytes=self.stderr_bytes, **args)
+
+    def kill(self):
+        try:
+            if self.own_process_group:
+                os.killpg(self.p.pid, signal.SIGKILL)
+            else:
+                self.p.kill()
+        except OSError:
+            None # the cmd already ended
+
+class YbsqlSession(object):
+    """A single long running ybsql process that executes many SQL statements.
+
+    Every statement is written to the stdin of the ybsql process followed by
+    sentinel markers, a '\\echo' marker for stdout and a 'RAISE INFO' marker
+    for stderr, the stdout/stderr of the statement is everything read up
+    to the markers.  This saves the shell/ybsql process start and the DB
+    login on every query.
+
+    The session runs with ON_ERROR_STOP, so a failed statement ends the ybsql
+    process just like a single ybsql call, the exit code is returned and the
+    next statement starts a new ybsql process.
+    """
+    session_ct = 0
+
+    def __init__(self, ybsql_args, env, conn_key):
+        """
+        :param ybsql_args: list of ybsql executable and arguments to run
+        :param env: environment for the ybsql process, like YBHOST and YBPASSWORD
+        :param conn_key: identifies the connection settings of the session
+        """
+        YbsqlSession.session_ct += 1
+        self.ybsql_args = ybsql_args
+        self.env = env
+        self.conn_key = conn_key
+        self.statement_ct = 0
+        self.uid = '%s_%d' % (Common.get_uid(), YbsqlSession.session_ct)
+        # the time from the ybsql process start to the end of the first session
+        #   reset, the login time of the session, see Trace
+        self.start_ts = time.time()
+        self.connect_ms = None
+
+        self.p = subprocess.Popen(
+            self.ybsql_args
+            , stdin=subprocess.PIPE
+            , stdout=subprocess.PIPE
+            , stderr=subprocess.PIPE
+            , env=self.env)
+
+        self.stdout_queue = queue.Queue()
+        self.stderr_queue = queue.Queue()
+        for (stream, q) in ((self.p.stdout, self.stdout_queue), (self.p.stderr, self.stderr_queue)):
+            reader = threading.Thread(target=YbsqlSession.read_stream, args=(stream, q))
+            reader.daemon = True
+            reader.start()
+
+        atexit.register(self.close)
+
+    def __deepcopy__(self, memo):
+        # a ybsql process can't be copied, the copy of a DBConnect opens its own session
+        return None
+
+    @staticmethod
+    def read_stream(stream, q):
+        for line in iter(stream.readline, b''):
+            q.put(line.decode('utf-8', errors='ignore'))
+        q.put(None)
+
+    @staticmethod
+    def read_until_marker(q, marker):
+        """Read lines from the queue up to the marker line.
+
+        :return: a tuple of the lines read and True if the marker was found,
+            False if the ybsql process ended before the marker
+        """
+        lines = []
+        while True:
+            line = q.get()
+            if line is None:
+                return (''.join(lines), False)
+            elif line.rstrip('\r\n').endswith(marker):
+                return (''.join(lines), True)
+            lines.append(line)
+
+    @staticmethod
+    def heredoc_sql(sql_statement):
+        """Apply the same processing to the SQL that Cmd and the shell heredoc apply
+        to a single ybsql call, so both execution paths run identical SQL.
+        """
+        if Common.is_windows:
+            # the powershell here-string used by ybsql_query is a literal
+            return sql_statement
+        sql_statement = sql_statement.replace('$', r'\$')
+        return re.sub(r'\\([\\$`\n])'
+            , lambda match: '' if match.group(1) == '\n' else match.group(1)
+            , sql_statement)
+
+    def is_alive(self):
+        return self.p.poll() is None
+
+    def sentinel_sql(self, marker):
+        return ("DO $YbEasyCli$ BEGIN RAISE INFO '%s'; END $YbEasyCli$;\n\\echo %s\n"
+            % (marker, marker))
+
+    def execute(self, sql_statement):
+        """Run the SQL statement/s in the ybsql session.
+
+        Before the statement the session is returned to the state of a new
+        ybsql session, so the output formatting, session settings and
+        transaction state of the prior statement do not carry over.
+        Temporary tables do carry over for the life of the session.
+
+        :param sql_statement: SQL statement/s to run
+        :return: a CmdResult with the stdout, stderr and exit_code of the statement/s
+        """
+        self.statement_ct += 1
+        reset_marker = 'YbEasyCli_reset_%s_%d' % (self.uid, self.statement_ct)
+        marker = 'YbEasyCli_done_%s_%d' % (self.uid, self.statement_ct)
+
+        reset_sql = ("\\o\n"
+            "\\set VERBOSITY default\n"
+            "\\pset format unaligned\n"
+            "\\pset tuples_only on\n"
+            "\\pset footer on\n"
+            "\\pset null ''\n"
+            "\\pset fieldsep '|'\n"
+            "\\pset recordsep '\\n'\n"
+            "ROLLBACK;\n"
+            "RESET SESSION AUTHORIZATION;\n"
+            "RESET ALL;\n")
+
+        script = '%s%s%s\n%s' % (
+            reset_sql
+            , self.sentinel_sql(reset_marker)
+            , YbsqlSession.heredoc_sql(sql_statement)
+            , self.sentinel_sql(marker))
+
+        try:
+            self.p.stdin.write(script.encode('utf-8'))
+            self.p.stdin.flush()
+        except (IOError, OSError):
+            None # the ybsql process ended, the results are collected below
+
+        # discard the output of the session reset
+        (stdout, found) = YbsqlSession.read_until_marker(self.stdout_queue, reset_marker)
+        (stderr, found) = YbsqlSession.read_until_marker(self.stderr_queue, reset_marker)
+        if self.statement_ct == 1:
+            self.connect_ms = (time.time() - self.start_ts) * 1000
+
+        if found:
+            (stdout, stdout_found) = YbsqlSession.read_until_marker(self.stdout_queue, marker)
+            (stderr, stderr_found) = YbsqlSession.read_until_marker(self.stderr_queue, marker)
+            found = stdout_found and stderr_found
+
+        if found:
+            exit_code = 0
+        else:
+            exit_code = self.p.wait()
+
+        return CmdResult(stdout, stderr, exit_code)
+
+    def close(self):
+        if self.is_alive():
+            try:
+                self.p.stdin.write(b'\\q\n')
+                self.p.stdin.close()
+            except (IOError, OSError):
+                None
+            self.p.wait()
+
+class QueryBackend(object):
+    """The base class of the DBConnect query backends, a backend runs the
+    SQL statements and ybsql meta-commands of DBConnect.ybsql_query and
+    returns a CmdResult with the stdout, stderr and exit code that a ybsql
+    call would return.
+
+    The backends are:
+        ybsql  : YbsqlProcessBackend, a new ybsql process per query
+        session: YbsqlSessionBackend, a single persistent ybsql process
+        wire   : PGWireBackend, the database wire protocol run from python
+    """
+    name = None
+    # True if the backend can kill a query that runs longer than its timeout
+    supports_timeout = False
+    # True if the backend can stream the query stdout, see Cmd.lines
+    supports_stream = False
+
+    def __init__(self, db_conn):
+        self.db_conn = db_conn
+        # the login time of the last query if it logged in, see Trace
+        self.connect_ms = None
+
+    def __deepcopy__(self, memo):
+        # open processes and sockets can't be copied, a copied DBConnect gets a new backend
+        return self.__class__(memo.get(id(self.db_conn), self.db_conn))
+
+    def supports(self, sql_statement, options, stdin):
+        """Return False when the query must be run by a YbsqlProcessBackend instead."""
+        return stdin is None and options == DBConnect.ybsql_default_options
+
+    def query(self, sql_statement, options, stdin, strip_warnings, timeout=None, stream=False):
+        """Run the query.
+
+        :return: a CmdResult, or None if the query must be run by a
+            YbsqlProcessBackend instead
+        """
+        raise NotImplementedError
+
+    def close(self):
+        None
+
+    def verbose_query(self, desc, uid, sql_statement, run):
+        """Run the query with the same verbose output Cmd produces."""
+        cmd_id = Cmd.next_cmd_id()
+        if Common.verbose >= 2:
+            print('%s\n%s' % (
+                Text.color('--Cmd Id(%d) Executing in %s(%s)--'
+                    % (cmd_id, desc, uid), style='bold')
+                , sql_statement))
+        elif Common.verbose >= 1:
+            print('%s: %s'
+                % (Text.color('Executing in %s' % desc, style='bold'), sql_statement))
+
+        start_time = datetime.now()
+        cmd = run(sql_statement)
+        cmd.cmd_id = cmd_id
+
+        if Common.verbose >= 2:
+            print(
+                '%s: %s\n%s: %s\n%s\n%s%s\n%s'
+                % (
+                    Text.color('--Cmd Id(%d) Execution duration ' % cmd_id, style='bold')
+                    , Text.color(datetime.now() - start_time, fg='cyan')
+                    , Text.color('--Exit code', style='bold')
+                    , Text.color(
+                        str(cmd.exit_code)
+                        , fg=('red' if cmd.exit_code else 'cyan'))
+                    , Text.color('--Stdout--', style='bold')
+                    , cmd.stdout.rstrip()
+                    , Text.color('--Stderr--', style='bold')
+                    , Text.color(cmd.stderr.rstrip(), fg='red')))
+
+        return cmd
+
+class YbsqlProcessBackend(QueryBackend):
+    """Run each query with a new ybsql process from a shell heredoc."""
+    name = 'ybsql'
+    supports_timeout = True
+    supports_stream = True
+
+    def supports(self, sql_statement, options, stdin):
+        return True
+
+    def query(self, sql_statement, options, stdin, strip_warnings, timeout=None, stream=False):
+        # default timeout is 75 seconds changing it to self.connect_timeout
+        #   'host=<host>' string is required first to set command line connect_timeout
+        #   see https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-CONNSTRING
+        ybsql_cmd = "ybsql %s '%s'" % (options, self.db_conn.ybsql_conn_str())
+
+        if Common.is_windows:
+            ybsql_cmd = """$sql = @'
+%s
+'@; echo $sql | {ybsql_cmd}""".format(ybsql_cmd=ybsql_cmd)
+        else:
+            ybsql_cmd = """{ybsql_cmd} <<eof
+%s
+eof""".format(ybsql_cmd=ybsql_cmd)
+
+        ybsql_cmd = ybsql_cmd % sql_statement
+
+        # the query is traced by its ybsql_query event, see DBConnect.trace_query
+        return self.db_conn.ybtool_cmd(ybsql_cmd, stack_level=5, stdin=stdin
+            , strip_warnings=strip_warnings, timeout=timeout, stream=stream, trace=False)
+
+class YbsqlSessionBackend(QueryBackend):
+    """Run the queries in a single persistent ybsql process, see YbsqlSession."""
+    name = 'session'
+
+    def __init__(self, db_conn):
+        super(YbsqlSessionBackend, self).__init__(db_conn)
+        self.session = None
+        self.stdbuf = (None if Common.is_windows else find_executable('stdbuf'))
+
+    def supports(self, sql_statement, options, stdin):
+        return (self.stdbuf is not None
+            and super(YbsqlSessionBackend, self).supports(sql_statement, options, stdin))
+
+    def query(self, sql_statement, options, stdin, strip_warnings, timeout=None, stream=False):
+        """The session is started on first use and restarted when the connection
+        settings change or the prior statement ended the ybsql process.
+        """
+        conn_key = self.db_conn.conn_key()
+        if self.session and (self.session.conn_key != conn_key or not self.session.is_alive()):
+            self.close()
+
+        self.connect_ms = None
+        if not self.session:
+            # ybsql fully buffers stdout written to a pipe, stdbuf line buffers it
+            #   so each sentinel marker is readable as soon as it is echoed, see supports()
+            ybsql_args = ([self.stdbuf, '-oL', 'ybsql']
+                + shlex.split(DBConnect.ybsql_default_options)
+                + [self.db_conn.ybsql_conn_str()])
+            self.session = YbsqlSession(ybsql_args, self.db_conn.get_os_env(), conn_key)
+
+        cmd = self.verbose_query('ybsql session', self.session.uid, sql_statement, self.session.execute)
+        if self.session and self.session.statement_ct == 1:
+            self.connect_ms = self.session.connect_ms
+
+        # a \connect in the statement changes the session connection, restart
+        #   the session on the next statement to return to the DBConnect settings
+        if re.search(r'^\s*\\c(onnect)?\b', sql_statement, re.MULTILINE):
+            self.close()
+
+        DBConnect.strip_stderr_warnings(cmd, strip_warnings)
+
+        return cmd
+
+    def close(self):
+        if self.session:
+            self.session.close()
+            self.session = None
+
+class PGWireResult(CmdResult):
+    """The CmdResult of a PGWireBackend query, it adds the result sets of the
+    query with the column names and typed rows.
+    """
+    def __init__(self, stdout, stderr, exit_code, result_sets):
+        super(PGWireResult, self).__init__(stdout, stderr, exit_code)
+        self.result_sets = result_sets
+
+    @property
+    def columns(self):
+        """The column names of the last result set that returned rows."""
+        result_sets = [rs for rs in self.result_sets if rs.columns is not None]
+        return result_sets[-1].columns if result_sets else []
+
+    @property
+    def rows(self):
+        """The typed rows of the last result set that returned rows."""
+        result_sets = [rs for rs in self.result_sets if rs.columns is not None]
+        return result_sets[-1].typed_rows() if result_sets else []
+
+class PGWireBackend(QueryBackend):
+    """Run the queries over the database wire protocol from python with a single
+    database connection, see yb_pgwire.  A query with a ybsql meta-command
+    that yb_pgwire does not run, like \\copy, is run by a YbsqlProcessBackend.
+    """
+    name = 'wire'
+
+    def __init__(self, db_conn):
+        super(PGWireBackend, self).__init__(db_conn)
+        self.script = None
+        self.conn_key = None
+        self.uid = None
+
+    def supports(self, sql_statement, options, stdin):
+        import yb_pgwire
+        if not super(PGWireBackend, self).supports(sql_statement, options, stdin):
+            return False
+        try:
+            yb_pgwire.YbsqlScript.check_supported(sql_statement)
+        except yb_pgwire.UnsupportedMetaCommand:
+            return False
+        return True
+
+    def connect(self, database=None):
+        import yb_pgwire
+        env = self.db_conn.env
+        start_ts = time.time()
+        conn = yb_pgwire.PGWireConnection(
+            host=env['host'], port=env['port'], user=env['dbuser']
+            , database=(database or env['conn_db'] or env['dbuser'])
+            , password=env['pwd'], connect_timeout=self.db_conn.connect_timeout)
+        self.connect_ms = (self.connect_ms or 0) + (time.time() - start_ts) * 1000
+        return conn
+
+    def query(self, sql_statement, options, stdin, strip_warnings, timeout=None, stream=False):
+        import yb_pgwire
+        self.connect_ms = None
+        conn_key = self.db_conn.conn_key()
+        if self.script and self.conn_key != conn_key:
+            self.close()
+        if not self.script:
+            self.script = yb_pgwire.YbsqlScript(self.connect)
+            self.conn_key = conn_key
+            self.uid = Common.get_uid()
+
+        def run(sql_statement):
+            return PGWireResult(*self.script.run(YbsqlSession.heredoc_sql(sql_statement)))
+
+        cmd = self.verbose_query('wire protocol connection', self.uid, sql_statement, run)
+
+        DBConnect.strip_stderr_warnings(cmd, strip_warnings)
+
+        return cmd
+
+    def cursor(self, sql_statement, fetch_rows):
+        """Yield the typed rows of the query from a server-side cursor."""
+        if not self.script:
+            self.query('SELECT 1', DBConnect.ybsql_default_options, None, [])
+        if not self.script.conn:
+            self.script.reconnect(None)
+        for row in self.script.conn.cursor(sql_statement, fetch_rows):
+            yield row
+
+    def close(self):
+        if self.script:
+            self.script.close()
+            self.script = None
 
 class ArgsHandler:
     """This class contains functions used for argument parsing
@@ -398,7 +1109,12 @@ class ArgsHandler:
         self.args_process_init()
 
         self.args_add_optional()
-        self.args_add_connection_group()
+        conn_grp = self.args_add_connection_group()
+        if self.config['catalog_snapshot_filter_args']:
+            conn_grp.add_argument(
+                "--catalog_snapshot", metavar="SNAPSHOT_FILE"
+                , help="answer from a local catalog snapshot file built by yb_snapshot_catalog"
+                    " instead of connecting to the database")
 
         if self.config['additional_args']:
             self.config['additional_args']()
@@ -480,6 +1196,27 @@ class ArgsHandler:
                 , action="store_true"
                 , help= "prompt for password instead of using the "
                     "YBPASSWORD env variable")
+            conn_grp.add_argument(
+                "--ybsql_session", action="store_true"
+                , help="run all the queries of the utility in a single persistent"
+                    " ybsql session instead of a new ybsql process per query")
+            conn_grp.add_argument(
+                "--query_backend", choices=sorted(DBConnect.query_backends.keys())
+                , help="run queries with; ybsql, a new ybsql process per query"
+                    ", session, a single persistent ybsql session, same as --ybsql_session"
+                    ", wire, the database wire protocol from python without ybsql"
+                    ", defaults to ybsql")
+            conn_grp.add_argument(
+                "--verify_cache_ttl", type=ArgIntRange(0, 86400)
+                , help="seconds a verified connection is cached for, later utilities run"
+                    " within the TTL skip the connection verify query"
+                    ", overrides YBEASYCLI_VERIFY_CACHE_TTL env variable, defaults to 0, no caching")
+            conn_grp.add_argument(
+                "--query_cache_ttl", type=ArgIntRange(0, 86400)
+                , help="seconds the results of repeated catalog queries are cached for"
+                    ", like the list of databases, later queries and utilities run within the"
+                    " TTL reuse the result, overrides YBEASYCLI_QUERY_CACHE_TTL env variable"
+                    ", defaults to 0, no caching")
             conn_grp.add_argument(
                 "--skip_db_conn", action="store_true", help=argparse.SUPPRESS)
             conn_grp.add_argument(
@@ -511,6 +1248,22 @@ class ArgsHandler:
                 , action="store_true"
                 , help= "prompt for password instead of using the "
                     "YBPASSWORD env variable")
+            conn_grp.add_argument(
+                "--%s_ybsql_session" % type, action="store_true"
+                , help="run all the %s queries of the utility in a single persistent"
+                    " ybsql session instead of a new ybsql process per query" % type_desc)
+            conn_grp.add_argument(
+                "--%s_query_backend" % type, choices=sorted(DBConnect.query_backends.keys())
+                , help="run the %s queries with; ybsql, session or wire"
+                    ", see --query_backend" % type_desc)
+            conn_grp.add_argument(
+                "--%s_verify_cache_ttl" % type, type=ArgIntRange(0, 86400)
+                , help="seconds a verified %s connection is cached for"
+                    ", see --verify_cache_ttl" % type_desc)
+            conn_grp.add_argument(
+                "--%s_query_cache_ttl" % type, type=ArgIntRange(0, 86400)
+                , help="seconds the results of repeated %s catalog queries are cached for"
+                    ", see --query_cache_ttl" % type_desc)
             conn_grp.add_argument(
                 "--%s_skip_db_conn" % type, action="store_true", help=argparse.SUPPRESS)
             conn_grp.add_argument(
@@ -532,6 +1285,15 @@ class ArgsHandler:
             , help="display verbose execution{1 - info, 2 - debug, 3 - extended}")
         self.args_parser.add_argument(
             "--nocolor", action="store_true", help="turn off colored text output")
+        self.args_parser.add_argument(
+            "--max_concurrency", type=ArgIntRange(1, 64), default=Common.max_concurrency
+            , help="the maximum number of queries the utility runs at the same time"
+                ", defaults to %d" % Common.max_concurrency)
+        self.args_parser.add_argument(
+            "--trace_file", default=Trace.file_path
+            , help="append a timing event of each command and query to this file, a .json file"
+                " is written in the Chrome trace format, any other file as JSON lines"
+                ", defaults to the %s env variable" % Trace.file_env)
         self.args_parser.add_argument(
             "--version", "-v", action="version", version=Common.version
             , help="display the program version and exit")
@@ -622,6 +1384,7 @@ class ArgsHandler:
         return(text)
 
     def process_report_args(self):
+        import pprint
         if self.config['report_columns'] != 'get_post_db_conn':
             if (self.args.report_include_columns and self.args.report_exclude_columns):
                 self.args_parser.error('only --report_include_columns or --report_exclude_columns may be defined but not both')
@@ -669,12 +1432,14 @@ class ArgsHandler:
                     found_column = True
             self.args.report_order_by = order_by_clause
 
-    def args_process(self):
+    def args_process(self, args=None):
         """Process arguments.
 
         Convert argument strings to objects and assign to the class.
+
+        :param args: the list of args to process, defaults to the command line args
         """
-        self.args = self.args_parser.parse_args()
+        self.args = self.args_parser.parse_args(args)
 
         if self.has_report_args:
             self.process_report_args()
@@ -685,6 +1450,9 @@ class ArgsHandler:
                 Text.nocolor = True
 
             Common.verbose = self.args.verbose
+            Common.max_concurrency = self.args.max_concurrency
+            if self.args.trace_file:
+                Trace.set_file(self.args.trace_file)
 
         return self.args
 
@@ -706,6 +1474,7 @@ class ArgsHandler:
         args_handler.args = args_handler.args_process()
 
         if args_handler.args.W:
+            import getpass
             args_handler.args.pwd = getpass.getpass("Enter db user password: ")
         else:
             args_handler.args.pwd = None
@@ -855,6 +1624,22 @@ class DBFilterArgs:
             , nargs="+", action='append', metavar="PATTERN",
             help="%s/s NOT like the pattern/s" % otype)
 
+    def optional_args_multi_to_args(self, otypes=None):
+        """Convert the optional multi object filters that are set back to
+        command line args, to pass the filters on to a utility run in process.
+
+        :param otypes: the object types of the filters, defaults to all the
+            optional multi object types
+        :return: the list of args
+        """
+        args = []
+        for otype in (otypes or self.optional_args_multi):
+            for (arg, dest) in (('in', 'in_list'), ('NOTin', 'not_in_list')
+                , ('like', 'like_pattern'), ('NOTlike', 'not_like_pattern')):
+                for values in (getattr(self.args_handler.args, '%s_%s' % (otype, dest), None) or []):
+                    args.extend(['--%s_%s' % (otype, arg)] + values)
+        return args
+
     def has_optional_args_single_set(self, otype):
         """Has an optional filter been set for the requested object type.
 
@@ -1096,68 +1881,478 @@ class Text:
 
         return txt if Text.nocolor else colored_text
 
-class DBConnect:
-    conn_args = {
-        'dbuser':'YBUSER'
-        , 'host':'YBHOST'
-        , 'port':'YBPORT'
-        , 'conn_db':'YBDATABASE'}
-    env_to_set = conn_args.copy()
-    env_to_set['pwd'] = 'YBPASSWORD'
+class VerifyCache(object):
+    """An on-disk cache of the DBConnect.verify results.
 
-    # TODO, revisit when YB 4.X is depricated these warnings seem to only be for YB<=4.X
-    ybtool_stderr_strip_warnings = []
+    Utilities run one after another, or as sub-processes of another utility, all
+    verify the same connection.  With a TTL set a verified connection is stored
+    keyed by host, port, user, database and current schema, a later DBConnect
+    within the TTL skips the verify query.  An entry is only used with the
+    password it was verified with and is removed when a query of the connection
+    fails to log in.
 
-    def __init__(self, args_handler=None, env=None, conn_type=''
-        , connect_timeout=10, on_fail_exit=True):
-        """Creates a validated database connection object.
-        The connection settings can be received as a set of input arguments or
-        as environment strings but not both.
+    The cache file is private to the user like the ~/.ybpass file, it holds a
+    salted hash of the password, not the password.
+    """
+    ttl_env = 'YBEASYCLI_VERIFY_CACHE_TTL'
+    file_env = 'YBEASYCLI_VERIFY_CACHE'
+    auth_failure_regex = re.compile(
+        r'password authentication failed|no password supplied|FATAL:|could not connect to server')
 
-        :param args: db setting arguments received from the command line
-        :param env: db setting received as environment strings
-        :param conn_type: used to name the connection in the case you require
-        more than 1 db connection, like; source and destination
-        :param connect_timeout: database timeout in seconds when trying to
-        connect, defaults to 10 seconds
-        :param on_fail_exit: on a failed db connection exit with an error
-        , default to True
+    def __init__(self, db_conn, ttl):
         """
-        self.database = None
-        self.schema = None
-        self.connect_timeout = connect_timeout
-        self.on_fail_exit = on_fail_exit
-        self.connected = False
-        self.env_pre = self.get_env()
+        :param db_conn: the DBConnect to cache the verify results of
+        :param ttl: seconds a verify result is valid for
+        """
+        self.db_conn = db_conn
+        self.ttl = ttl
+        self.key = '|'.join([str(db_conn.env[k]) for k in ('host', 'port', 'dbuser', 'conn_db')]
+            + [str(db_conn.current_schema)])
 
-        arg_conn_prefix = ('' if (conn_type=='') else ('%s_' % conn_type))
-        pwd_required = False
-        self.env = {'pwd':None}
-        self.env_set_by = {}
-        self.env_args = {}
-        self.on_manager_node = (find_executable('ybcli') is not None)
-        self.set_user_su = False
+    @staticmethod
+    def file_path():
+        file_path = os.environ.get(VerifyCache.file_env)
+        if not file_path:
+            if Common.is_windows:
+                file_path = os.path.expandvars(r'%APPDATA%\yellowbrick\ybeasycli_verify_cache.json')
+            else:
+                file_path = '%s/.ybeasycli_verify_cache' % os.path.expanduser('~')
+        return file_path
 
-        if args_handler:
-            for conn_arg in self.conn_args.keys():
-                conn_arg_qualified = '%s%s' % (arg_conn_prefix, conn_arg)
-                #if not hasattr(args, conn_arg_qualified):
-                #    sys.stderr.write('Missing Connection Argument: %s\n'
-                #        % Text.color(conn_arg_qualified, fg='red'))
-                #    exit(2)
-                self.env_args[conn_arg] = getattr(args_handler.args, conn_arg_qualified)
-                self.env[conn_arg] = self.env_args[conn_arg] or self.env_pre[conn_arg]
-                if self.env_args[conn_arg]:
-                    self.env_set_by[conn_arg] = 'a'
-                elif self.env_pre[conn_arg]:
-                    self.env_set_by[conn_arg] = 'e'
-                else:
+    @staticmethod
+    def read():
+        import json
+        file_path = VerifyCache.file_path()
+        try:
+            # like the ~/.ybpass file, a file with group or world access is ignored
+            if not Common.is_windows and oct(os.stat(file_path).st_mode)[-2:] != '00':
+                return None
+            with open(file_path) as f:
+                cache = json.load(f)
+            if not isinstance(cache.get('entries'), dict):
+                return None
+            return cache
+        except (IOError, OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def write(cache):
+        import json, tempfile
+        file_path = VerifyCache.file_path()
+        try:
+            file_dir = os.path.dirname(file_path) or '.'
+            if not os.path.isdir(file_dir):
+                os.makedirs(file_dir)
+            # mkstemp creates the file with 0600 permissions, the rename replaces
+            #   the cache in one step for utilities running at the same time
+            (fd, tmp_file_path) = tempfile.mkstemp(prefix='.ybeasycli_verify_cache.', dir=file_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cache, f)
+            if Common.is_windows and os.path.exists(file_path):
+                os.remove(file_path)
+            os.rename(tmp_file_path, file_path)
+        except (IOError, OSError) as error:
+            if Common.verbose >= 2:
+                print('%s: %s' % (Text.color('--Verify cache not written', style='bold'), error))
+
+    def pwd_hash(self, salt):
+        import hashlib
+        return hashlib.sha256(
+            ('%s|%s|%s' % (salt, self.key, self.db_conn.env['pwd'])).encode('utf-8')).hexdigest()
+
+    def get(self):
+        """Get the cached verify results.
+
+        :return: a tuple of the database, schema and ybdb dict or None
+        """
+        cache = VerifyCache.read()
+        if not cache:
+            return None
+        entry = cache['entries'].get(self.key)
+        if (not entry
+            or time.time() - entry.get('verified_at', 0) > self.ttl
+            or entry.get('pwd_hash') != self.pwd_hash(cache.get('salt'))):
+            return None
+
+        if Common.verbose >= 2:
+            print('%s: %s' % (Text.color('--Verified from cache', style='bold')
+                , Text.color(VerifyCache.file_path(), fg='cyan')))
+        return (entry['database'], entry['schema'], entry['ybdb'])
+
+    def put(self, database, schema, ybdb):
+        import random
+        cache = VerifyCache.read() or {'salt': '%032x' % random.getrandbits(128), 'entries': {}}
+        now = time.time()
+        # drop the expired entries, a TTL is short so an hour covers any TTL in use
+        for key in list(cache['entries'].keys()):
+            if now - cache['entries'][key].get('verified_at', 0) > max(self.ttl, 3600):
+                del cache['entries'][key]
+        cache['entries'][self.key] = {
+            'verified_at': now
+            , 'pwd_hash': self.pwd_hash(cache['salt'])
+            , 'database': database
+            , 'schema': schema
+            , 'ybdb': ybdb }
+        VerifyCache.write(cache)
+
+    def invalidate(self):
+        cache = VerifyCache.read()
+        if cache and self.key in cache['entries']:
+            del cache['entries'][self.key]
+            VerifyCache.write(cache)
+
+class QueryCache(object):
+    """A TTL cache of the results of repeated catalog and sys view queries.
+
+    A query is only cached when the call site opts in with
+    DBConnect.ybsql_query(..., cache=True) and a TTL is set with
+    --query_cache_ttl or the YBEASYCLI_QUERY_CACHE_TTL env variable.  The
+    results are keyed by the normalized SQL, the ybsql options, the connection
+    host, port, user and database and the current schema, only results without
+    an error are cached.
+
+    The results are kept in a size bounded LRU in memory, and on disk in the
+    query_results directory of Common.cache_dir, so utilities run seconds apart
+    or as sub-processes of another utility reuse them.  The cache files are
+    private to the user.
+    """
+    ttl_env = 'YBEASYCLI_QUERY_CACHE_TTL'
+    max_memory_entries = 256
+    max_memory_bytes = 16 * 1024 * 1024
+    max_disk_entries = 1000
+    # the disk entries older than this are removed, whatever the TTL of the call site
+    max_disk_age = 86400
+
+    entries = None
+    entries_bytes = 0
+    counts = {'memory_hit': 0, 'disk_hit': 0, 'miss': 0}
+    lock = threading.Lock()
+
+    @staticmethod
+    def key(db_conn, sql_statement, options):
+        import hashlib
+        return hashlib.sha256('|'.join([str(value) for value in (
+            db_conn.env['host'], db_conn.env['port'], db_conn.env['dbuser'], db_conn.env['conn_db']
+            , db_conn.database, db_conn.current_schema, options
+            , re.sub(r'\s+', ' ', sql_statement).strip())]).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def dir_path():
+        return Common.cache_dir('query_results')
+
+    @staticmethod
+    def get(key, ttl):
+        """Get the cached result of a query.
+
+        :param key: the key of the query, see key()
+        :param ttl: seconds the result of the query is valid for
+        :return: a CmdResult, with the cached attribute set to 'memory' or
+            'disk', or None
+        """
+        with QueryCache.lock:
+            if QueryCache.entries is None:
+                from collections import OrderedDict
+                QueryCache.entries = OrderedDict()
+                if Common.verbose >= 1:
+                    atexit.register(QueryCache.write_counts)
+
+            entry = QueryCache.entries.get(key)
+            cached = 'memory'
+            if entry is None:
+                entry = QueryCache.read(key)
+                cached = 'disk'
+            if entry is None or time.time() - entry['at'] > ttl:
+                QueryCache.counts['miss'] += 1
+                return None
+
+            QueryCache.counts['%s_hit' % cached] += 1
+            QueryCache.put_memory(key, entry)
+
+        if Common.verbose >= 2:
+            print('%s: %s' % (Text.color('--Query cache hit', style='bold')
+                , Text.color('%s, %s' % (cached, key[:12]), fg='cyan')))
+        cmd = CmdResult(entry['stdout'], entry['stderr'], entry['exit_code'])
+        cmd.cached = cached
+        return cmd
+
+    @staticmethod
+    def put(key, cmd):
+        """Cache the result of a query, unless it has an error."""
+        if cmd.exit_code != 0 or cmd.stderr != '':
+            return
+        entry = {'at': time.time(), 'stdout': cmd.stdout, 'stderr': cmd.stderr, 'exit_code': cmd.exit_code}
+        with QueryCache.lock:
+            if QueryCache.entries is None:
+                return
+            QueryCache.put_memory(key, entry)
+        QueryCache.write(key, entry)
+
+    @staticmethod
+    def put_memory(key, entry):
+        """Add the entry as the most recently used, the least recently used
+        entries are evicted to stay within the size bounds."""
+        if key in QueryCache.entries:
+            QueryCache.entries_bytes -= len(QueryCache.entries.pop(key)['stdout'])
+        QueryCache.entries[key] = entry
+        QueryCache.entries_bytes += len(entry['stdout'])
+        while (len(QueryCache.entries) > QueryCache.max_memory_entries
+            or (QueryCache.entries_bytes > QueryCache.max_memory_bytes and len(QueryCache.entries) > 1)):
+            QueryCache.entries_bytes -= len(QueryCache.entries.popitem(last=False)[1]['stdout'])
+
+    @staticmethod
+    def read(key):
+        import json
+        try:
+            with open(os.path.join(QueryCache.dir_path(), '%s.json' % key)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def write(key, entry):
+        import json, tempfile
+        dir_path = QueryCache.dir_path()
+        try:
+            if not os.path.isdir(dir_path):
+                os.makedirs(dir_path, 0o700)
+            # mkstemp creates the file with 0600 permissions, the rename replaces
+            #   the entry in one step for utilities running at the same time
+            (fd, tmp_file_path) = tempfile.mkstemp(prefix='.%s.' % key[:12], dir=dir_path)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            file_path = os.path.join(dir_path, '%s.json' % key)
+            if Common.is_windows and os.path.exists(file_path):
+                os.remove(file_path)
+            os.rename(tmp_file_path, file_path)
+            QueryCache.prune(dir_path)
+        except (IOError, OSError) as error:
+            if Common.verbose >= 2:
+                print('%s: %s' % (Text.color('--Query cache not written', style='bold'), error))
+
+    @staticmethod
+    def prune(dir_path):
+        """Remove the old disk entries, and the least recently written entries
+        when there are more than max_disk_entries."""
+        file_paths = glob(os.path.join(dir_path, '*.json'))
+        now = time.time()
+        mtimes = []
+        for file_path in file_paths:
+            try:
+                mtime = os.stat(file_path).st_mtime
+                if now - mtime > QueryCache.max_disk_age:
+                    os.remove(file_path)
+                else:
+                    mtimes.append((mtime, file_path))
+            except OSError:
+                None # removed by a utility running at the same time
+        for (mtime, file_path) in sorted(mtimes)[:max(0, len(mtimes) - QueryCache.max_disk_entries)]:
+            try:
+                os.remove(file_path)
+            except OSError:
+                None
+
+    @staticmethod
+    def write_counts():
+        print('%s: %s, %s: %d, %s: %d, %s: %d' % (
+            Text.color('--Query cache', style='bold'), QueryCache.dir_path()
+            , Text.color('Memory hits', style='bold'), QueryCache.counts['memory_hit']
+            , Text.color('Disk hits', style='bold'), QueryCache.counts['disk_hit']
+            , Text.color('Misses', style='bold'), QueryCache.counts['miss']))
+
+class CatalogSnapshot(object):
+    """A local SQLite copy of the user table, view and column catalog of a set
+    of databases, built and refreshed by yb_snapshot_catalog.
+
+    The name utilities run with --catalog_snapshot query the snapshot file
+    instead of the database, the db filter args are applied to the snapshot
+    tables like they are applied to the sys.* tables:
+        catalog_database: a row per database with the catalog fingerprint an
+                          incremental refresh compares to the database
+        catalog_object  : a row per table and view
+        catalog_column  : a row per table and view column
+    """
+    version = 1
+    ddl = """
+CREATE TABLE IF NOT EXISTS catalog_info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS catalog_database (
+    name TEXT PRIMARY KEY, fingerprint TEXT, object_ct INTEGER, column_ct INTEGER, snapshot_at TEXT);
+CREATE TABLE IF NOT EXISTS catalog_object (
+    database TEXT, schema TEXT, name TEXT, type TEXT, owner TEXT, distribution TEXT);
+CREATE TABLE IF NOT EXISTS catalog_column (
+    database TEXT, schema TEXT, object TEXT, object_type TEXT, owner TEXT
+    , name TEXT, ordinal INTEGER, data_type TEXT);
+CREATE INDEX IF NOT EXISTS catalog_object_ix ON catalog_object (database, schema, name);
+CREATE INDEX IF NOT EXISTS catalog_column_ix ON catalog_column (database, schema, object, name);
+CREATE INDEX IF NOT EXISTS catalog_column_name_ix ON catalog_column (name);"""
+    object_fields = ('database', 'schema', 'name', 'type', 'owner', 'distribution')
+    column_fields = ('database', 'schema', 'object', 'object_type', 'owner', 'name', 'ordinal', 'data_type')
+
+    def __init__(self, file_path, create=False):
+        """
+        :param file_path: the snapshot file
+        :param create: create the snapshot file if it does not exist
+        """
+        import sqlite3
+        if not create and not os.path.isfile(file_path):
+            Common.error("catalog snapshot '%s' not found, build it with yb_snapshot_catalog" % file_path)
+        self.file_path = file_path
+        try:
+            self.conn = sqlite3.connect(file_path)
+            # like the database LIKE, the snapshot LIKE is case sensitive
+            self.conn.execute('PRAGMA case_sensitive_like = ON')
+            if create:
+                self.conn.executescript(CatalogSnapshot.ddl)
+            self.info = dict(self.conn.execute('SELECT key, value FROM catalog_info').fetchall())
+        except sqlite3.Error as error:
+            Common.error("catalog snapshot '%s' could not be read: %s" % (file_path, error))
+
+        if self.info.get('version', str(CatalogSnapshot.version)) != str(CatalogSnapshot.version):
+            Common.error("catalog snapshot '%s' is from another version of YbEasyCli"
+                ", rebuild it with yb_snapshot_catalog --rebuild" % file_path)
+
+    @property
+    def ybdb(self):
+        """The DBConnect.ybdb of the connection the snapshot was taken with."""
+        import json
+        return json.loads(self.info.get('ybdb', '{}'))
+
+    def set_info(self, **info):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO catalog_info (key, value) VALUES (?, ?)'
+                , list(info.items()) + [('version', str(CatalogSnapshot.version))])
+        self.info.update(info)
+
+    def fingerprints(self):
+        """:return: a dictionary of the catalog fingerprint of each database in the snapshot"""
+        return dict(self.conn.execute('SELECT name, fingerprint FROM catalog_database').fetchall())
+
+    def put_database(self, database, fingerprint, objects, columns):
+        """Replace the catalog of a database in a single transaction.
+
+        :param objects: list of object rows, tuples of the object_fields values
+        :param columns: list of column rows, tuples of the column_fields values
+        """
+        with self.conn:
+            self.delete_database(database, commit=False)
+            self.conn.executemany('INSERT INTO catalog_object VALUES (%s)'
+                % ', '.join(['?'] * len(CatalogSnapshot.object_fields)), objects)
+            self.conn.executemany('INSERT INTO catalog_column VALUES (%s)'
+                % ', '.join(['?'] * len(CatalogSnapshot.column_fields)), columns)
+            self.conn.execute('INSERT INTO catalog_database VALUES (?, ?, ?, ?, ?)'
+                , (database, fingerprint, len(objects), len(columns), str(datetime.now())))
+
+    def delete_database(self, database, commit=True):
+        for table in ('catalog_object', 'catalog_column'):
+            self.conn.execute('DELETE FROM %s WHERE database = ?' % table, (database,))
+        self.conn.execute('DELETE FROM catalog_database WHERE name = ?', (database,))
+        if commit:
+            self.conn.commit()
+
+    def filter_sql(self, filter_clause):
+        """Convert a DBFilterArgs SQL filter clause to run on the snapshot, the
+        CURRENT_SCHEMA is the current schema of the snapshot connection.
+        """
+        return re.sub(r'\bCURRENT_SCHEMA\b', "'%s'" % self.info.get('schema', 'public'), filter_clause)
+
+    def rows(self, sql_query, fields):
+        """Run a snapshot query.
+
+        :return: a generator of row dictionaries like Util.template_rows
+        """
+        import sqlite3
+        try:
+            cursor = self.conn.execute(sql_query)
+        except sqlite3.Error as error:
+            Common.error("catalog snapshot '%s' query failed: %s" % (self.file_path, error))
+        ordinal = 0
+        for values in cursor:
+            ordinal += 1
+            row = dict(zip(fields, [('<NULL>' if value is None else str(value)) for value in values]))
+            row['ordinal'] = ordinal
+            yield row
+
+class DBConnect:
+    conn_args = {
+        'dbuser':'YBUSER'
+        , 'host':'YBHOST'
+        , 'port':'YBPORT'
+        , 'conn_db':'YBDATABASE'}
+    env_to_set = conn_args.copy()
+    env_to_set['pwd'] = 'YBPASSWORD'
+
+    # TODO, revisit when YB 4.X is depricated these warnings seem to only be for YB<=4.X
+    ybtool_stderr_strip_warnings = []
+
+    ybsql_default_options = '-A -q -t -v ON_ERROR_STOP=1 -X'
+
+    query_backends = {
+        YbsqlProcessBackend.name: YbsqlProcessBackend
+        , YbsqlSessionBackend.name: YbsqlSessionBackend
+        , PGWireBackend.name: PGWireBackend}
+
+    def __init__(self, args_handler=None, env=None, conn_type=''
+        , connect_timeout=10, on_fail_exit=True, use_session=False, query_backend=None):
+        """Creates a validated database connection object.
+        The connection settings can be received as a set of input arguments or
+        as environment strings but not both.
+
+        :param args: db setting arguments received from the command line
+        :param env: db setting received as environment strings
+        :param conn_type: used to name the connection in the case you require
+        more than 1 db connection, like; source and destination
+        :param connect_timeout: database timeout in seconds when trying to
+        connect, defaults to 10 seconds
+        :param on_fail_exit: on a failed db connection exit with an error
+        , default to True
+        :param use_session: run queries in a single persistent ybsql session,
+        see YbsqlSession, defaults to False
+        :param query_backend: the QueryBackend used to run queries; ybsql, session
+        or wire, defaults to ybsql or session if use_session is set
+        """
+        self.database = None
+        self.schema = None
+        self.connect_timeout = connect_timeout
+        self.on_fail_exit = on_fail_exit
+        self.connected = False
+        self.env_pre = self.get_env()
+
+        arg_conn_prefix = ('' if (conn_type=='') else ('%s_' % conn_type))
+        pwd_required = False
+        self.env = {'pwd':None}
+        self.env_set_by = {}
+        self.env_args = {}
+        self.on_manager_node = (find_executable('ybcli') is not None)
+        self.set_user_su = False
+        self.use_session = use_session
+        verify_cache_ttl = None
+        query_cache_ttl = None
+
+        if args_handler:
+            for conn_arg in self.conn_args.keys():
+                conn_arg_qualified = '%s%s' % (arg_conn_prefix, conn_arg)
+                #if not hasattr(args, conn_arg_qualified):
+                #    sys.stderr.write('Missing Connection Argument: %s\n'
+                #        % Text.color(conn_arg_qualified, fg='red'))
+                #    exit(2)
+                self.env_args[conn_arg] = getattr(args_handler.args, conn_arg_qualified)
+                self.env[conn_arg] = self.env_args[conn_arg] or self.env_pre[conn_arg]
+                if self.env_args[conn_arg]:
+                    self.env_set_by[conn_arg] = 'a'
+                elif self.env_pre[conn_arg]:
+                    self.env_set_by[conn_arg] = 'e'
+                else:
                     self.env_set_by[conn_arg] = 'd'
             pwd_required = getattr(args_handler.args, '%sW' % arg_conn_prefix)
             self.current_schema = getattr(
                 args_handler.args, '%scurrent_schema' % arg_conn_prefix)
             self.set_user_su = getattr(
                 args_handler.args, '%sset_user_su' % arg_conn_prefix)
+            self.use_session = (use_session
+                or getattr(args_handler.args, '%sybsql_session' % arg_conn_prefix, False))
+            query_backend = (query_backend
+                or getattr(args_handler.args, '%squery_backend' % arg_conn_prefix, None))
+            verify_cache_ttl = getattr(args_handler.args, '%sverify_cache_ttl' % arg_conn_prefix, None)
+            query_cache_ttl = getattr(args_handler.args, '%squery_cache_ttl' % arg_conn_prefix, None)
         elif env:
             self.current_schema = None
             for env_var in env.keys():
@@ -1189,6 +2384,7 @@ class DBConnect:
                     prompt = ("Enter the password for cluster %s, user %s: "
                         % (Text.color(self.env['host'], fg='cyan')
                             , Text.color(user, fg='cyan')))
+                    import getpass
                     self.env['pwd'] = getpass.getpass(prompt)
                 else:
                     self.env['pwd'] = self.env_pre['pwd'] if self.env_pre['pwd'] else ybpass_pwd
@@ -1196,6 +2392,29 @@ class DBConnect:
             else:
                 self.env['pwd'] = '-*-force bad password-*-'
 
+        if not query_backend:
+            query_backend = ('session' if self.use_session else 'ybsql')
+        self.backend = self.query_backends[query_backend](self)
+        # the backend and its connection are used by a single thread, the threads
+        #   running concurrent queries each get a backend of their own
+        self.backend_thread_id = threading.current_thread().ident
+        self.thread_backends = {}
+
+        if verify_cache_ttl is None:
+            try:
+                verify_cache_ttl = int(os.environ.get(VerifyCache.ttl_env, 0))
+            except ValueError:
+                verify_cache_ttl = 0
+        self.verify_cache = (VerifyCache(self, verify_cache_ttl) if verify_cache_ttl > 0 else None)
+        self.verified_by_cache = False
+
+        if query_cache_ttl is None:
+            try:
+                query_cache_ttl = int(os.environ.get(QueryCache.ttl_env, 0))
+            except ValueError:
+                query_cache_ttl = 0
+        self.query_cache_ttl = query_cache_ttl
+
         self.verify()
 
         if self.ybdb['version_major'] <= 4:
@@ -1279,6 +2498,45 @@ class DBConnect:
             , 'pwd':pwd}
 
     def verify(self):
+        cached = (self.verify_cache.get() if self.verify_cache else None)
+        if cached:
+            (self.database, self.schema, self.ybdb) = cached
+            self.ybdb['at'] = '%f' % time.time()
+            self.connected = True
+            self.verified_by_cache = True
+        else:
+            self.verify_query()
+            if not self.connected:
+                return
+
+        if Common.verbose >= 1:
+            print(
+                '%s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s'
+                % (
+                    Text.color('Connecting to Host', style='bold')
+                    , Text.color(self.env['host'], fg='cyan')
+                    , Text.color('Port', style='bold')
+                    , Text.color(self.env['port'], fg='cyan')
+                    , Text.color('DB User', style='bold')
+                    , Text.color(self.env['dbuser'], fg='cyan')
+                    , Text.color('Super User', style='bold')
+                    , Text.color(self.ybdb['is_super_user'], fg='cyan')
+                    , Text.color('Database', style='bold')
+                    , Text.color(self.database, fg='cyan')
+                    , Text.color('Current Schema', style='bold')
+                    , Text.color(self.schema, fg='cyan')
+                    , Text.color('DB Encoding', style='bold')
+                    , Text.color(self.ybdb['database_encoding'], fg='cyan')
+                    , Text.color('YBDB', style='bold')
+                    , Text.color(self.ybdb['version'], fg='cyan')))
+
+        # This is a backdoor to make a regular user follow the SU code path and
+        # should be used carefully
+        if self.set_user_su:
+            self.ybdb['is_super_user'] = True
+
+    def verify_query(self):
+        """Run the verify query, it logs in and gets the database info."""
         cmd_results = self.ybsql_query(
             """SELECT
     CURRENT_DATABASE()        AS db
@@ -1309,6 +2567,8 @@ WHERE rolname = CURRENT_USER""")
                     % self.current_schema)
             self.connected = True
         else:
+            if self.verify_cache:
+                self.verify_cache.invalidate()
             if self.on_fail_exit:
                 Common.error(cmd_results.stderr.replace('util', 'ybsql')
                         , cmd_results.exit_code)
@@ -1335,41 +2595,21 @@ WHERE rolname = CURRENT_USER""")
             , 'host': self.env['host']
             , 'database_encoding': db_info[2] }
 
-        if Common.verbose >= 1:
-            print(
-                '%s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s, %s: %s'
-                % (
-                    Text.color('Connecting to Host', style='bold')
-                    , Text.color(self.env['host'], fg='cyan')
-                    , Text.color('Port', style='bold')
-                    , Text.color(self.env['port'], fg='cyan')
-                    , Text.color('DB User', style='bold')
-                    , Text.color(self.env['dbuser'], fg='cyan')
-                    , Text.color('Super User', style='bold')
-                    , Text.color(self.ybdb['is_super_user'], fg='cyan')
-                    , Text.color('Database', style='bold')
-                    , Text.color(self.database, fg='cyan')
-                    , Text.color('Current Schema', style='bold')
-                    , Text.color(self.schema, fg='cyan')
-                    , Text.color('DB Encoding', style='bold')
-                    , Text.color(self.ybdb['database_encoding'], fg='cyan')
-                    , Text.color('YBDB', style='bold')
-                    , Text.color(self.ybdb['version'], fg='cyan')))
-
-        # This is a backdoor to make a regular user follow the SU code path and
-        # should be used carefully
-        if self.set_user_su:
-            self.ybdb['is_super_user'] = True
+        if self.verify_cache:
+            self.verify_cache.put(self.database, self.schema, self.ybdb)
 
     def exit_if_not_su(self):
         if not self.ybdb['is_super_user']:
             Common.error('this utility must be run by a database super user...')
 
     ybsql_call_count = 0
+    ybsql_call_lock = threading.Lock()
 
     def ybsql_query(self, sql_statement
-        , options = '-A -q -t -v ON_ERROR_STOP=1 -X', stdin = None, strip_warnings=[], use_sql_file=False):
-        """Run and evaluate a query using ybsql.
+        , options = ybsql_default_options, stdin = None, strip_warnings=[], use_sql_file=False
+        , timeout=None, stream=False, cache=False):
+        """Run and evaluate a query using ybsql, or the query backend of the
+        connection, see QueryBackend.
 
         :param sql_statement: The SQL command string
         :options: ybsql command options
@@ -1381,15 +2621,32 @@ WHERE rolname = CURRENT_USER""")
                     ON_ERROR_STOP: processing is stopped immediately,
                         with an exit code of 3
                 -X: do not read startup file (~/.ybsqlrc)
+        :param timeout: seconds to wait on the query before it is killed, the query
+            is then run with a ybsql process, see Cmd.wait
+        :param stream: don't wait on the query, the stdout lines are read with
+            Cmd.lines() as they are produced, the query is then run with a ybsql process
+        :param cache: the result of the query may be cached for --query_cache_ttl
+            seconds, for repeated catalog queries whose result rarely changes, see QueryCache
         :return: The result produced by running the given command
         """
-        self.ybsql_call_count += 1
+        cache_key = None
+        if cache and self.query_cache_ttl > 0 and not stream and stdin is None:
+            cache_key = QueryCache.key(self, sql_statement, options)
+            cmd = QueryCache.get(cache_key, self.query_cache_ttl)
+            if cmd:
+                return cmd
+
+        # the call number is taken under a lock, so concurrent queries get unique tags
+        with DBConnect.ybsql_call_lock:
+            self.ybsql_call_count += 1
+            ybsql_call = self.ybsql_call_count
         strip_warnings.extend(self.ybtool_stderr_strip_warnings)
 
         # If the sql_statement requested to run is to large to be part of the command line
         #   then it needs to be run from a file
         use_sql_file = (use_sql_file or (len(sql_statement) > 64000))
         if use_sql_file:
+            import tempfile
             tmp_sql_fd, tmp_sql_path = tempfile.mkstemp(prefix=('YbEasyCli_%s_' % Common.util_name), suffix='.sql')
             with os.fdopen(tmp_sql_fd, 'w') as tmp:
                 tmp.write(sql_statement)
@@ -1398,39 +2655,235 @@ WHERE rolname = CURRENT_USER""")
                 ybsql_tmp_sql_path = '%s%s' % (os.popen('cygpath -w /').read().strip(), tmp_sql_path)
             sql_statement = "\\i %s" % ybsql_tmp_sql_path.replace('\\', '/')
 
-        sql_statement = ("SET ybd_query_tags TO 'YbEasyCli:%s:ybsql(%d)';\n%s"
-            % (Common.util_name, self.ybsql_call_count, sql_statement))
+        start_ts = time.time()
+        query_tag = 'YbEasyCli:%s:%s:ybsql(%d)' % (
+            Common.util_name, Common.get_run_id(), ybsql_call)
+        sql_statement = ("SET ybd_query_tags TO '%s';\n%s"
+            % (query_tag, sql_statement))
         if self.current_schema:
             sql_statement = "SET SCHEMA '%s';\n%s" % (
                 self.current_schema, sql_statement)
 
-        # default timeout is 75 seconds changing it to self.connect_timeout
-        #   'host=<host>' string is required first to set command line connect_timeout
-        #   see https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-CONNSTRING
-        ybsql_cmd = "ybsql %s '%sconnect_timeout=%d'" % (
-            options
-            , ('' if self.on_manager_node else ('host=%s ' % self.env['host']))
-            , self.connect_timeout)
-
-        if Common.is_windows:
-            ybsql_cmd = """$sql = @'
-%s
-'@; echo $sql | {ybsql_cmd}""".format(ybsql_cmd=ybsql_cmd)
-        else:
-            ybsql_cmd = """{ybsql_cmd} <<eof
-%s
-eof""".format(ybsql_cmd=ybsql_cmd)
+        backend = self.get_backend()
+        if ((timeout is not None and not backend.supports_timeout)
+            or (stream and not backend.supports_stream)
+            or not backend.supports(sql_statement, options, stdin)):
+            backend = YbsqlProcessBackend(self)
+        cmd = backend.query(sql_statement, options, stdin, strip_warnings, timeout, stream)
+        if cmd is None:
+            backend = YbsqlProcessBackend(self)
+            cmd = backend.query(
+                sql_statement, options, stdin, strip_warnings, timeout, stream)
+
+        if Trace.file_path:
+            trace = lambda cmd: self.trace_query(cmd, backend, query_tag, start_ts, sql_statement)
+            if stream:
+                cmd.on_complete.append(trace)
+            else:
+                trace(cmd)
 
-        ybsql_cmd = ybsql_cmd % sql_statement
+        if use_sql_file:
+            if stream:
+                cmd.on_complete.append(lambda cmd: os.unlink(tmp_sql_path))
+            else:
+                os.unlink(tmp_sql_path)
 
-        cmd = self.ybtool_cmd(ybsql_cmd, stack_level=4, stdin=stdin, strip_warnings=strip_warnings)
+        if self.verified_by_cache:
+            if stream:
+                cmd.on_complete.append(self.verify_cache_check)
+            else:
+                self.verify_cache_check(cmd)
 
-        if use_sql_file:
-            os.unlink(tmp_sql_path)
+        if cache_key:
+            QueryCache.put(cache_key, cmd)
 
         return cmd
 
-    def ybtool_cmd(self, cmd, stack_level=3, stdin=None, strip_warnings=[]):
+    def trace_query(self, cmd, backend, query_tag, start_ts, sql_statement):
+        """Write the trace event of a completed query, see Trace.
+
+        A query run by the ybsql backend logs in with a new ybsql process, the
+        process isn't traced with a cmd event of its own, which would count the
+        query time twice, its cmd_id, spawn time and timeout are in this event.
+        A query run by the session or wire backend only logs in when the
+        connection is opened, connect_ms is the login time of the query that
+        opened the connection.
+        """
+        login = (backend.name == YbsqlProcessBackend.name or backend.connect_ms is not None)
+        Trace.event('ybsql_query', 'query', start_ts, time.time()
+            , query_tag=query_tag, backend=backend.name, cmd_id=getattr(cmd, 'cmd_id', None)
+            , host=self.env['host'], database=self.env['conn_db']
+            , login=login
+            , connect_ms=(round(backend.connect_ms, 3) if backend.connect_ms is not None else None)
+            , spawn_ms=(round(cmd.spawn_ms, 3) if hasattr(cmd, 'spawn_ms') else None)
+            , sql_bytes=len(sql_statement.encode('utf-8'))
+            , stdout_bytes=getattr(cmd, 'stdout_bytes', len(cmd.stdout.encode('utf-8')))
+            , stderr_bytes=getattr(cmd, 'stderr_bytes', len(cmd.stderr.encode('utf-8')))
+            , exit_code=cmd.exit_code
+            , timed_out=(getattr(cmd, 'timed_out', False) or None))
+
+    def verify_cache_check(self, cmd):
+        """The first query of a connection verified from the cache confirms the
+        login, if it fails to log in the cache entry is removed."""
+        if not self.verified_by_cache:
+            return
+        if cmd.exit_code and VerifyCache.auth_failure_regex.search(cmd.stderr):
+            self.verify_cache.invalidate()
+        self.verified_by_cache = False
+
+    def get_backend(self):
+        """Get the query backend of the calling thread."""
+        thread_id = threading.current_thread().ident
+        if thread_id == self.backend_thread_id:
+            return self.backend
+        if thread_id not in self.thread_backends:
+            self.thread_backends[thread_id] = self.backend.__class__(self)
+        return self.thread_backends[thread_id]
+
+    executor = None
+
+    @staticmethod
+    def query_executor():
+        """The thread pool, shared by all connections, that runs the concurrent queries."""
+        if not DBConnect.executor:
+            from concurrent.futures import ThreadPoolExecutor
+            DBConnect.executor = ThreadPoolExecutor(max_workers=Common.max_concurrency)
+        return DBConnect.executor
+
+    def ybsql_query_async(self, sql_statement, timeout=None, semaphore=None, **kwargs):
+        """Run a query in the background, it must be called from a running asyncio
+        event loop, so it requires python3, like:
+
+            cmd_results = await db_conn.ybsql_query_async(sql_statement)
+
+        No more than --max_concurrency queries run at the same time.
+
+        :param sql_statement: The SQL command string
+        :param timeout: seconds to wait on the query before it is killed
+        :param semaphore: a threading.Semaphore that further limits the concurrency
+        :param kwargs: other ybsql_query arguments
+        :return: an asyncio future of the CmdResult of the query
+        """
+        import asyncio
+
+        def query():
+            if semaphore:
+                with semaphore:
+                    return self.ybsql_query(sql_statement, timeout=timeout, **kwargs)
+            return self.ybsql_query(sql_statement, timeout=timeout, **kwargs)
+
+        return asyncio.get_event_loop().run_in_executor(self.query_executor(), query)
+
+    def gather_queries(self, sql_statements, concurrency=None, timeout=None, **kwargs):
+        """Run independent queries at the same time and wait on them all.
+
+        :param sql_statements: list of SQL command strings
+        :param concurrency: the number of queries to run at the same time, capped
+            by --max_concurrency, defaults to --max_concurrency
+        :param timeout: seconds to wait on each query before it is killed
+        :param kwargs: other ybsql_query arguments
+        :return: list of the CmdResult of each query in the order of sql_statements
+        """
+        concurrency = min(concurrency or Common.max_concurrency, Common.max_concurrency)
+        try:
+            import asyncio
+        except ImportError:
+            # Fallback for python2, the queries are run by threads
+            return self.gather_queries_threaded(sql_statements, concurrency, timeout, **kwargs)
+        semaphore = threading.Semaphore(concurrency)
+
+        loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            futures = [self.ybsql_query_async(sql_statement, timeout, semaphore, **kwargs)
+                for sql_statement in sql_statements]
+            return loop.run_until_complete(asyncio.gather(*futures))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def gather_queries_threaded(self, sql_statements, concurrency, timeout=None, **kwargs):
+        """Run independent queries on concurrency threads, see gather_queries."""
+        work = queue.Queue()
+        for item in enumerate(sql_statements):
+            work.put(item)
+        results = [None] * len(sql_statements)
+        errors = []
+
+        def run_queries():
+            while True:
+                try:
+                    (i, sql_statement) = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[i] = self.ybsql_query(sql_statement, timeout=timeout, **kwargs)
+                except Exception as error:
+                    errors.append(error)
+
+        threads = [threading.Thread(target=run_queries) for i in range(min(concurrency, len(sql_statements)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def ybsql_conn_str(self):
+        return '%sconnect_timeout=%d' % (
+            ('' if self.on_manager_node else ('host=%s ' % self.env['host']))
+            , self.connect_timeout)
+
+    def get_os_env(self):
+        """Get a copy of the OS environment with the connection settings applied."""
+        os_env = os.environ.copy()
+        for key, value in self.env.items():
+            env_name = DBConnect.env_to_set[key]
+            if value:
+                os_env[env_name] = value
+            elif env_name in os_env:
+                del os_env[env_name]
+        # utilities run as sub-processes share the verify cache
+        if self.verify_cache:
+            os_env[VerifyCache.ttl_env] = str(self.verify_cache.ttl)
+        if self.query_cache_ttl > 0:
+            os_env[QueryCache.ttl_env] = str(self.query_cache_ttl)
+        return os_env
+
+    def conn_key(self):
+        """Identifies the connection settings, a backend reconnects when they change."""
+        return (self.env['host'], self.env['port'], self.env['dbuser']
+            , self.env['conn_db'], self.env['pwd'])
+
+    def query_rows(self, sql_statement, fetch_rows=10000):
+        """Run a query and yield its rows.
+
+        The wire backend yields typed rows fetched from a server-side cursor in
+        batches of fetch_rows, the ybsql backends yield lists of strings.
+        """
+        if isinstance(self.backend, PGWireBackend):
+            for row in self.backend.cursor(sql_statement, fetch_rows):
+                yield row
+        else:
+            cmd_results = self.ybsql_query(sql_statement)
+            cmd_results.on_error_exit()
+            for line in cmd_results.stdout.splitlines():
+                yield line.split('|')
+
+    def close(self):
+        self.backend.close()
+        for backend in self.thread_backends.values():
+            backend.close()
+        self.thread_backends = {}
+
+    @staticmethod
+    def strip_stderr_warnings(cmd, strip_warnings):
+        for warning in strip_warnings:
+            cmd.stderr = re.sub(warning, '', cmd.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+
+    def ybtool_cmd(self, cmd, stack_level=3, stdin=None, strip_warnings=[], timeout=None, stream=False
+        , trace=True):
         # if the first argument in the cmd is a python YbEasyCli tool then prepend the
         #    python executable path(sys.executable) to the cmd. Required for Windows support.
         if re.search(r"^(.*?\.py)", cmd):
@@ -1438,19 +2891,35 @@ eof""".format(ybsql_cmd=ybsql_cmd)
             if Common.is_windows:
                 cmd = '&%s' % cmd
 
-        self.set_env(self.env)
-        cmd = Cmd(cmd, stack_level=stack_level, stdin=stdin)
-        self.set_env(self.env_pre)
+        # the connection settings are passed in the cmd environment instead of
+        #   os.environ, so cmds of different threads/connections don't collide
+        cmd = Cmd(cmd, stack_level=stack_level, stdin=stdin, env=self.get_os_env(), timeout=timeout
+            , wait=not(stream), trace=trace)
 
-        for warning in strip_warnings:
-            cmd.stderr = re.sub(warning, '', cmd.stderr, 0, re.MULTILINE | re.DOTALL).lstrip()
+        if stream:
+            cmd.on_complete.append(lambda cmd: DBConnect.strip_stderr_warnings(cmd, strip_warnings))
+        else:
+            DBConnect.strip_stderr_warnings(cmd, strip_warnings)
 
         return cmd
 
 class StoredProc:
+    # the parsed proc attributes stored in a proc manifest
+    manifest_attrs = ('proc_name', 'proc_args', 'proc_is_setof', 'proc_return_type'
+        , 'proc_return_table_type', 'proc_before_return_parts', 'proc_setof_return'
+        , 'proc_return', 'proc_after_return', 'args', 'setof_table', 'sha256')
+    # change when the parsing of the proc files changes, older manifests are rebuilt
+    manifest_version = 1
+    # stands in for the table name, that changes every run, in a parsed proc
+    table_name_marker = '\x00'
+    # the schema the procs are deployed to, see yb_deploy_procs.py
+    proc_schema_env = 'YBEASYCLI_PROC_SCHEMA'
+    # the deployed procs found, or not, in each database this run
+    deployed_procs = {}
+
     def __init__(self, proc_name, db_conn=None):
         self.db_conn = db_conn
-        self.proc_parse_file(proc_name)
+        self.proc_load(proc_name)
 
     @staticmethod
     def proc_file(proc_name):
@@ -1460,9 +2929,85 @@ class StoredProc:
     def proc_file_exists(proc_name):
         return os.access(StoredProc.proc_file(proc_name), os.R_OK)
 
-    def proc_parse_file(self, proc_name):
+    @staticmethod
+    def manifest_file(proc_name):
+        return os.path.join(Common.cache_dir('proc_manifests')
+            , '%s.json' % proc_name.replace('/', '__'))
+
+    def proc_load(self, proc_name):
+        """Load the parsed proc from its manifest, the proc file is only parsed,
+        and the manifest rebuilt, when the proc file changed.
+
+        A manifest matches the proc file on its modified time and size, if those
+        changed but the file content hash matches the manifest is kept.
+        """
+        import hashlib, json
         self.filepath = StoredProc.proc_file(proc_name)
+        manifest_file = StoredProc.manifest_file(proc_name)
+
+        try:
+            file_stat = os.stat(self.filepath)
+        except OSError:
+            file_stat = None
+
+        manifest = None
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            if manifest.get('version') != StoredProc.manifest_version:
+                manifest = None
+        except (IOError, OSError, ValueError):
+            pass
+
+        if (manifest and file_stat
+            and manifest['mtime'] == file_stat.st_mtime and manifest['size'] == file_stat.st_size):
+            self.proc_sql = None
+            self.proc_load_manifest(manifest)
+            return
+
         self.proc_sql = Common.read_file(self.filepath)
+        self.sha256 = hashlib.sha256(self.proc_sql.encode('utf-8')).hexdigest()
+        if manifest and manifest['sha256'] == self.sha256:
+            self.proc_load_manifest(manifest)
+        else:
+            self.proc_parse_file(proc_name)
+            manifest = dict([(attr, getattr(self, attr, None)) for attr in StoredProc.manifest_attrs])
+            manifest['version'] = StoredProc.manifest_version
+            self.proc_init_setof()
+
+        if file_stat:
+            manifest['mtime'] = file_stat.st_mtime
+            manifest['size'] = file_stat.st_size
+            StoredProc.write_manifest(manifest_file, manifest)
+
+    def proc_load_manifest(self, manifest):
+        for attr in StoredProc.manifest_attrs:
+            setattr(self, attr, manifest[attr])
+        self.proc_init_setof()
+
+    @staticmethod
+    def write_manifest(manifest_file, manifest):
+        import json, tempfile
+        try:
+            manifest_dir = os.path.dirname(manifest_file)
+            if not os.path.isdir(manifest_dir):
+                os.makedirs(manifest_dir)
+            # written to a tmp file and renamed, so a utility running at the same
+            #   time never reads a partial manifest
+            (fd, tmp_file) = tempfile.mkstemp(prefix='.manifest.', dir=manifest_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            if Common.is_windows and os.path.exists(manifest_file):
+                os.remove(manifest_file)
+            os.rename(tmp_file, manifest_file)
+        except (IOError, OSError) as error:
+            if Common.verbose >= 2:
+                print('%s: %s' % (Text.color('--Proc manifest not written', style='bold'), error))
+
+    def proc_parse_file(self, proc_name):
+        self.filepath = StoredProc.proc_file(proc_name)
+        if self.proc_sql is None:
+            self.proc_sql = Common.read_file(self.filepath)
 
         regex = r"CREATE\s*(OR\s*REPLACE)?\s*PROCEDURE\s*([a-z0-9_.]+)\s*\((.*?)\)\s*(RETURNS(\s*SETOF)?\s*([a-zA-Z_.]*).*?)\s+.+?(DECLARE\s*(.+))RETURN\s*(NEXT|QUERY\s*EXECUTE)?\s*([^;]*);(.*)\$proc\$"
         matches = re.search(regex, self.proc_sql, re.IGNORECASE | re.DOTALL)
@@ -1474,28 +3019,42 @@ class StoredProc:
         self.proc_args          = matches.group(3)
         #TODO currently return_type only handles 1 word like; BOOLEAN
         self.proc_is_setof      = (matches.group(5) is not None)
+        self.proc_return_type = None
+        self.proc_return_table_type = None
         if not self.proc_is_setof:
             self.proc_return_type = matches.group(6).upper()
         else:
             self.proc_return_table_type = matches.group(6)
-        self.proc_before_return = matches.group(8)
+        proc_before_return      = matches.group(8)
         self.proc_setof_return  = (re.sub(r"\s+", " ", matches.group(9)) if matches.group(9) else matches.group(9))
         self.proc_return        = matches.group(10)
         self.proc_after_return  = matches.group(11)
 
         #strip sql_inject check from anonymous block as it serves no purpose in an
         #  anonymous block and it won't be properly found as it only exists in the sysviews db
-        self.proc_before_return = re.sub(r'.*PERFORM\s*sql_inject_check_p.*\n'
-            , '', self.proc_before_return, 0, re.IGNORECASE)
+        proc_before_return = re.sub(r'.*PERFORM\s*sql_inject_check_p.*\n'
+            , '', proc_before_return, 0, re.IGNORECASE)
 
         self.proc_args_parse()
 
+        self.setof_table = None
+        if self.proc_is_setof:
+            self.setof_table = self.parse_setof_table()
+            # the %ROWTYPE of the returned rows is set to the table the rows are
+            #   returned in, see proc_init_setof
+            proc_before_return = re.sub(
+                r"([a-z0-9_.]+\.)?([a-z0-9_]+)%ROWTYPE", ('%s%%ROWTYPE' % StoredProc.table_name_marker)
+                , proc_before_return, re.IGNORECASE)
+        self.proc_before_return_parts = proc_before_return.split(StoredProc.table_name_marker)
+
+    def proc_init_setof(self):
+        """Set up the parsed proc for this run, the rows of a setof proc are
+        returned in a temp table with a new name each run."""
         if self.proc_is_setof:
             self.parse_setof_create_table(as_temp_table=True, drop_if_exists=True)
-            self.proc_before_return = re.sub(
-                r"([a-z0-9_.]+\.)?([a-z0-9_]+)%ROWTYPE", ('%s%%ROWTYPE' % self.new_table_name)
-                , self.proc_before_return, re.IGNORECASE)
+            self.proc_before_return = self.new_table_name.join(self.proc_before_return_parts)
         else:
+            self.proc_before_return = ''.join(self.proc_before_return_parts)
             if self.proc_return_type not in ('BOOLEAN', 'BIGINT', 'INT', 'INTEGER', 'SMALLINT'):
                 Common.error('Unhandled proc return_type: %s' % self.proc_return_type)
 
@@ -1520,7 +3079,13 @@ class StoredProc:
 
             self.args.append(arg)
 
-    def parse_setof_create_table(self, new_table_name=None, as_temp_table=False, drop_if_exists=False):
+    def parse_setof_table(self):
+        """Parse the CREATE TABLE of a setof proc, the table the proc returns its
+        rows in.
+
+        :return: a dictionary of the table name, the column definitions SQL, the
+            row columns and the definition of each column
+        """
         # get the CREATE TABLE
         regex = r"((CREATE\s*(OR\s*REPLACE)?\s*TABLE\s*)([a-z0-9_.]+\.)?([a-z0-9_]+)[^;]*;)"
         matches = re.search(regex, self.proc_sql, re.IGNORECASE | re.DOTALL)
@@ -1535,17 +3100,12 @@ class StoredProc:
 
         if not matches:
             Common.error("Stored proc '%s' regex parse table failed." % self.proc_name)
-        self.new_table_name = new_table_name if new_table_name else ('%s_%s' % (matches.group(4), Common.get_uid()))
-        temp_clause = ' TEMP' if as_temp_table else ''
-
-        self.create_new_table_sql = ('%sCREATE%s TABLE %s (%s)'
-            % ( ( ('DROP TABLE IF EXISTS %s;\n' % self.new_table_name) if drop_if_exists else '' )
-               , temp_clause
-               , self.new_table_name
-               , matches.group(5)) )
 
-        self.row_cols = []
-        self.row_cols_def = {}
+        setof_table = {
+            'name': matches.group(4)
+            , 'columns_sql': matches.group(5)
+            , 'row_cols': []
+            , 'row_cols_def': {} }
         col_defs = re.sub(r"^\s*--.*$", '', matches.group(5), 0, re.MULTILINE) # strip commented columns
 
         for col_def_str in Common.split(col_defs):
@@ -1556,8 +3116,23 @@ class StoredProc:
             col_def['type'] = matches.group(2).strip()
             col_def['def'] = col_def_str
 
-            self.row_cols.append(col_name)
-            self.row_cols_def[col_name] = col_def
+            setof_table['row_cols'].append(col_name)
+            setof_table['row_cols_def'][col_name] = col_def
+
+        return setof_table
+
+    def parse_setof_create_table(self, new_table_name=None, as_temp_table=False, drop_if_exists=False):
+        self.new_table_name = new_table_name if new_table_name else ('%s_%s' % (self.setof_table['name'], Common.get_uid()))
+        temp_clause = ' TEMP' if as_temp_table else ''
+
+        self.create_new_table_sql = ('%sCREATE%s TABLE %s (%s)'
+            % ( ( ('DROP TABLE IF EXISTS %s;\n' % self.new_table_name) if drop_if_exists else '' )
+               , temp_clause
+               , self.new_table_name
+               , self.setof_table['columns_sql']) )
+
+        self.row_cols = list(self.setof_table['row_cols'])
+        self.row_cols_def = self.setof_table['row_cols_def']
 
     def get_proc_declaration(self):
         types = []
@@ -1566,6 +3141,156 @@ class StoredProc:
 
         return '%s(%s)' % (self.proc_name, ', '.join(types))
 
+    def deployed_names(self, proc_schema):
+        """Get the names a proc, and its setof table, are deployed with.  The
+        names end with the hash of the proc file, so a changed proc file is
+        deployed as a new proc and a run never calls an out of date proc.
+
+        :param proc_schema: the schema the proc is deployed to
+        :return: a tuple of the proc name and the setof table name or None
+        """
+        proc_hash = self.sha256[:12]
+        proc_name = '%s.%s_%s' % (proc_schema, self.proc_name.split('.')[-1], proc_hash)
+        table_name = (('%s.%s_%s' % (proc_schema, self.setof_table['name'], proc_hash))
+            if self.proc_is_setof else None)
+        return (proc_name, table_name)
+
+    def deploy_sql(self, proc_schema, grant_to=None):
+        """Get the SQL that deploys the proc, as it is run as an anonymous
+        block, to proc_schema.
+
+        :param proc_schema: the schema to deploy the proc to
+        :param grant_to: a user or role granted EXECUTE on the deployed proc
+        """
+        (proc_name, table_name) = self.deployed_names(proc_schema)
+        types = ', '.join([arg['type'] for arg in self.args])
+
+        if self.proc_is_setof:
+            drop_sql = 'DROP TABLE IF EXISTS %s CASCADE;\nCREATE TABLE %s (%s);' % (
+                table_name, table_name, self.setof_table['columns_sql'])
+            returns = 'SETOF %s' % table_name
+            proc_return = 'RETURN %s %s;' % (self.proc_setof_return, self.proc_return)
+        else:
+            drop_sql = 'DROP PROCEDURE IF EXISTS %s(%s);' % (proc_name, types)
+            returns = self.proc_return_type
+            proc_return = 'RETURN %s;' % self.proc_return
+
+        grant_sql = ''
+        if grant_to:
+            grant_sql = ('GRANT USAGE ON SCHEMA %s TO %s;\nGRANT EXECUTE ON PROCEDURE %s(%s) TO %s;\n'
+                % (proc_schema, grant_to, proc_name, types, grant_to))
+
+        return """BEGIN;
+{drop_sql}
+--deployed proc: {proc_name}
+--derived from: {filepath}
+CREATE PROCEDURE {proc_name}({proc_args})
+    RETURNS {returns}
+    LANGUAGE 'plpgsql'
+    VOLATILE
+    CALLED ON NULL INPUT
+    SECURITY INVOKER
+AS $proc$
+DECLARE
+    {proc_before_return}
+    {proc_return}
+    {proc_after_return}
+$proc$;
+{grant_sql}COMMIT;""".format(
+            drop_sql=drop_sql
+            , proc_name=proc_name
+            , filepath=self.filepath
+            , proc_args=self.proc_args
+            , returns=returns
+            , proc_before_return=(table_name or '').join(self.proc_before_return_parts)
+            , proc_return=proc_return
+            , proc_after_return=self.proc_after_return
+            , grant_sql=grant_sql)
+
+    @staticmethod
+    def deployed_proc_schema_is_valid(proc_schema):
+        # the schema is used unquoted and looked up in the catalog as is
+        return re.match(r'[a-z_][a-z0-9_]*\Z', proc_schema) is not None
+
+    def deployed_old_versions(self, proc_schema):
+        """Get the other versions of the deployed proc, the versions deployed
+        from older proc files.
+
+        :param proc_schema: the schema the proc is deployed to
+        :return: a list of (object type, object name) tuples, the procs, named
+            with their arg types, followed by the setof tables
+        """
+        (proc_name, table_name) = self.deployed_names(proc_schema)
+        # a version is named with its proc name and the first 12 hex digits of its hash
+        name_regex = '^%s_[0-9a-f]{12}$'
+        cmd_result = self.db_conn.ybsql_query("""SELECT object_type, object_name
+FROM (
+    SELECT 1 AS ord, 'PROCEDURE' AS object_type, n.nspname || '.' || p.proname
+        || '(' || pg_catalog.pg_get_function_identity_arguments(p.oid) || ')' AS object_name
+    FROM pg_catalog.pg_proc AS p
+        JOIN pg_catalog.pg_namespace AS n ON n.oid = p.pronamespace
+    WHERE n.nspname = '{schema}' AND p.proname ~ '{proc_regex}' AND p.proname <> '{proc}'
+    UNION ALL
+    SELECT 2 AS ord, 'TABLE' AS object_type, n.nspname || '.' || c.relname AS object_name
+    FROM pg_catalog.pg_class AS c
+        JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+    WHERE {is_setof} AND n.nspname = '{schema}' AND c.relkind = 'r'
+        AND c.relname ~ '{table_regex}' AND c.relname <> '{table}'
+) AS v
+ORDER BY ord, object_name""".format(
+            schema=proc_schema
+            , proc=proc_name.split('.')[-1]
+            , proc_regex=(name_regex % self.proc_name.split('.')[-1])
+            , is_setof=('TRUE' if self.proc_is_setof else 'FALSE')
+            , table=(table_name or '').split('.')[-1]
+            , table_regex=(name_regex % (self.setof_table['name'] if self.proc_is_setof else ''))))
+        cmd_result.on_error_exit()
+
+        return [tuple(line.split('|', 1)) for line in cmd_result.stdout.strip().split('\n') if line]
+
+    def deployed_proc(self, proc_schema=None):
+        """Get the name of the deployed proc, if the proc file, as it is now,
+        is deployed to the YBEASYCLI_PROC_SCHEMA schema of the connected database
+        and the db user may run it.
+
+        :param proc_schema: the schema the proc is deployed to, defaults to the
+            YBEASYCLI_PROC_SCHEMA env variable, if neither is set the deployed
+            proc isn't looked for
+        :return: the deployed proc name or None, the proc is then run as an
+            anonymous block
+        """
+        proc_schema = proc_schema or os.environ.get(StoredProc.proc_schema_env)
+        if not (proc_schema and self.db_conn):
+            return None
+        if not StoredProc.deployed_proc_schema_is_valid(proc_schema):
+            Common.error('invalid %s schema name: %s' % (StoredProc.proc_schema_env, proc_schema))
+
+        (proc_name, table_name) = self.deployed_names(proc_schema)
+        key = (self.db_conn.env['host'], self.db_conn.env['port']
+            , self.db_conn.database, self.db_conn.ybdb['user'], proc_name)
+        if key not in StoredProc.deployed_procs:
+            cmd_result = self.db_conn.ybsql_query("""SELECT COUNT(*)
+FROM pg_catalog.pg_proc AS p
+    JOIN pg_catalog.pg_namespace AS n ON n.oid = p.pronamespace
+WHERE n.nspname = '{schema}' AND p.proname = '{proc}'
+    AND HAS_SCHEMA_PRIVILEGE(n.oid, 'USAGE') AND HAS_FUNCTION_PRIVILEGE(p.oid, 'EXECUTE')""".format(
+                schema=proc_schema, proc=proc_name.split('.')[-1]))
+            is_deployed = (cmd_result.exit_code == 0 and cmd_result.stdout.strip() == '1')
+            StoredProc.deployed_procs[key] = proc_name if is_deployed else None
+            if Common.verbose >= 2:
+                print('%s: %s' % (Text.color('--Deployed proc', style='bold')
+                    , proc_name if is_deployed else 'not found, running the proc as an anonymous block'))
+
+        return StoredProc.deployed_procs[key]
+
+    def deployed_proc_call_sql(self, proc_name, args={}):
+        """Get the SQL expression calling the deployed proc.
+
+        :param proc_name: the deployed proc name, see deployed_proc
+        :param args: a dictionary of input args/values to use when calling the stored proc
+        """
+        return '%s(%s)' % (proc_name, self.input_args_to_args_clause(args, is_declare=False))
+
     def input_args_to_args_clause(self, input_args, is_declare=True):
         args_clause = '--arguments\n' if is_declare else '\n'
         delim = ';' if is_declare else ','
@@ -1650,10 +3375,36 @@ class StoredProc:
         the stored procedure without building the procedure, lowering the
         barrier to run.
 
+        If the proc is deployed, see yb_deploy_procs.py, the deployed proc is
+        called instead.
+
         :param args: a dictionary of input args/values to use when calling the stored proc
         :param pre_sql: SQL to execute before the stored proc
         :param post_sql: SQL to execute after the stored proc
         """
+        deployed_proc = self.deployed_proc()
+        if deployed_proc:
+            # the return value is raised like the anonymous block does, so the
+            #   result is processed the same
+            sql = """
+{pre_sql}
+DO $PROC$ BEGIN RAISE INFO '>!>RETURN<!<:%', {proc_call}; END $PROC$;
+{post_sql}""".format(
+                pre_sql=pre_sql, post_sql=post_sql
+                , proc_call=self.deployed_proc_call_sql(deployed_proc, args))
+        else:
+            sql = self.anonymous_block_sql(args, pre_sql, post_sql)
+
+        cmd_result = self.db_conn.ybsql_query(sql)
+        return self.process_anonymous_block_result(cmd_result)
+
+    def anonymous_block_sql(self
+        , args={}
+        , pre_sql=''
+        , post_sql=''):
+        """Get the anonymous SQL block run by call_proc_as_anonymous_block, the
+        result of running it is processed with process_anonymous_block_result.
+        """
         return_marker = '>!>RETURN<!<:'
 
         declare_clause_args = self.input_args_to_args_clause(args)
@@ -1678,8 +3429,7 @@ DECLARE
             , return_marker=return_marker, proc_return=self.proc_return
             , proc_after_return=self.proc_after_return )
 
-        cmd_result = self.db_conn.ybsql_query(anonymous_block)
-        return self.process_anonymous_block_result(cmd_result)
+        return anonymous_block
 
     def proc_setof_to_anonymous_block(self
         , args={}
@@ -1754,19 +3504,163 @@ class Report:
 
     @staticmethod
     def del_data_to_list_data(del_data, delimiter='|'):
+        """Convert delimited data, a header row followed by the data rows, to lists.
+
+        A row holds 1 less delimiter than the header, a row may span lines when its
+        values have embedded newlines; the last value of a row extends to the last
+        newline before the next delimiter.
+
+        :return: a tuple of the headers list and a list of row lists
+        """
         raw_data = del_data.split('\n', 1) # split the first row the header row from the data rows
         headers = raw_data[0].split(delimiter)
+        if len(raw_data) == 1:
+            return (headers, [])
+
+        # the rows are lists of strings that can't form reference cycles, pausing
+        #   the garbage collector saves it from repeatedly scanning the new rows
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            data = Report.del_data_rows(raw_data[1].split('\n'), len(headers) - 1, delimiter)[0]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        return (headers, data)
 
-        regex = r"(^([^{delimiter}]*{delimiter}){{{num_headers_minus_1}}}[^{delimiter}]*$)".format(
-            num_headers_minus_1=(len(headers)-1)
-            , delimiter=('\\%s' % hex(ord(delimiter))[1:]) )
+    @staticmethod
+    def del_data_rows(lines, row_delimiters, delimiter='|', is_last=True
+        , row_delimiter_ct=0, line_index=0):
+        """Read the delimited data rows in a single pass over the data lines, a run
+        of lines that each hold a full row is added in bulk and only the lines
+        around the irregular lines are read one at a time.
+
+        A row ends before the next line with a delimiter once it holds
+        row_delimiters delimiters.  A row with more delimiters, from a value that
+        holds the delimiter, is kept with its extra values.
+
+        :param lines: the data lines without their line ends
+        :param is_last: False if more lines follow, the last row is then not added
+            as it may continue on the lines that follow
+        :param row_delimiter_ct: the delimiters of the lines before line_index
+        :param line_index: the lines before line_index were read by a prior call,
+            they are the start of a row
+        :return: a tuple of the list of row lists, the index of the first line of
+            the row that wasn't added and the delimiters of the row
+        """
+        line_values = [line.split(delimiter) for line in lines]
+        line_ct = len(lines)
+        # the lines that don't hold a full row, and a stop at the end of the lines
+        irregular_lines = [line_index
+            for (line_index, values) in enumerate(line_values)
+            if len(values) != row_delimiters + 1]
+        irregular_lines.append(line_ct)
 
         data = []
-        matches = re.finditer(regex, raw_data[1], re.MULTILINE)
-        for matchNum, match in enumerate(matches, start=1):
-            data.append(match.groups(0)[0].split(delimiter))
+        row_start = 0 # index of the first line of the row being read
+        irregular_index = 0
+        while line_index < line_ct:
+            while irregular_lines[irregular_index] < line_index:
+                irregular_index += 1
+            next_irregular = irregular_lines[irregular_index]
+
+            if (row_delimiters
+                and line_index < next_irregular
+                and row_delimiter_ct >= row_delimiters
+                and row_start == line_index - 1):
+                # each of the regular lines ends the single line row before it
+                data.extend(line_values[row_start:next_irregular - 1])
+                row_start = next_irregular - 1
+                line_index = next_irregular
+                continue
+
+            delimiter_ct = len(line_values[line_index]) - 1
+            if row_delimiter_ct >= row_delimiters and line_index > row_start:
+                if delimiter_ct == 0:
+                    # the line continues the last value of the row
+                    line_index += 1
+                    continue
+                if line_index - row_start == 1:
+                    data.append(line_values[row_start])
+                    row_start = line_index
+                else:
+                    data.append('\n'.join(lines[row_start:line_index]).split(delimiter))
+                    # a row ending with a blank line shares the blank line with the
+                    #   next row
+                    row_start = line_index - (1 if lines[line_index - 1] == '' else 0)
+                row_delimiter_ct = 0
+
+            row_delimiter_ct += delimiter_ct
+            line_index += 1
+
+        if is_last and row_start < line_ct and row_delimiter_ct >= row_delimiters:
+            if row_start == line_ct - 1:
+                data.append(line_values[row_start])
+            else:
+                data.append('\n'.join(lines[row_start:]).split(delimiter))
+            row_start = line_ct
 
-        return (headers, data)
+        return (data, row_start, row_delimiter_ct)
+
+    @staticmethod
+    def del_data_to_column_data(del_data, delimiter='|', row_ct=None):
+        """Convert delimited data to a list of values for each column.
+
+        :param row_ct: if set, the number of rows the data must hold
+        :return: a tuple of the headers list and a list of column lists
+        """
+        (headers, data) = Report.del_data_to_list_data(del_data, delimiter)
+        if row_ct is not None and len(data) != row_ct:
+            Common.error('expected %d row/s of %d column/s, found %d row/s'
+                % (row_ct, len(headers), len(data)))
+
+        columns = [[row[index] for row in data] for index in range(len(headers))]
+
+        return (headers, columns)
+
+    @staticmethod
+    def del_lines_to_list_data(lines, delimiter='|', block_lines=10000):
+        """Yield the header row followed by the data rows of delimited lines as
+        they are read, the rows are the same as del_data_to_list_data returns.
+
+        The lines are read in blocks of block_lines lines and the rows of each
+        block are read by del_data_rows, only the block and the lines of the row
+        that continues past the block are held in memory.
+
+        :param lines: iterable of lines ending with a line end, like Cmd.lines()
+        """
+        lines = iter(lines)
+        header = next(lines, '')
+        headers = header.rstrip('\n').split(delimiter)
+        yield headers
+        if not header.endswith('\n'):
+            return
+
+        row_delimiters = len(headers) - 1
+        row_lines = [] # the lines of the row that continues into the next block
+        row_delimiter_ct = 0
+        line_end = True # the last line read ended with a line end
+        is_last = False
+        while not is_last:
+            # a row longer than half a block grows the block, so the lines of a
+            #   long row are read a limited number of times
+            block_ct = max(block_lines, 2 * len(row_lines))
+            block = list(itertools.islice(lines, block_ct))
+            is_last = len(block) < block_ct
+            if block:
+                line_end = block[-1].endswith('\n')
+            # a line holds at most 1 line end, at its end
+            block = [line.rstrip('\n') for line in block]
+            if is_last and line_end:
+                # like split('\n'), the lines end with the text after the last line end
+                block.append('')
+            block = row_lines + block
+            (data, row_start, row_delimiter_ct) = Report.del_data_rows(
+                block, row_delimiters, delimiter, is_last, row_delimiter_ct, len(row_lines))
+            for row in data:
+                yield row
+            row_lines = block[row_start:]
 
     def list_data_sort(self, headers, list_data):
         if (hasattr(self.args_handler.args, 'report_sort_column')
@@ -1809,6 +3703,7 @@ class Report:
     #    return (headers, list_data)
 
     def del_data_to_formatted_report(self, del_data, delimiter='|'):
+        from tabulate import tabulate
         (headers, data) = Report.del_data_to_list_data(del_data, delimiter)
         (headers, data) = self.list_data_sort(headers, data)
         #(headers, data) = self.list_data_filtered(headers, data)
@@ -1826,7 +3721,27 @@ class Report:
             del_data.append(delimiter.join(row))
         return '\n'.join(del_data)
 
-    def build(self, is_source_cstore=False):
+    def write_del_data(self, headers, rows, delimiter):
+        """Write delimited rows to stdout as they are read, the output is the same
+        as printing the report returned by del_data_processed.
+
+        :return: an empty string, printing it ends the last row
+        """
+        sys.stdout.write(delimiter.join(headers))
+        for row in rows:
+            sys.stdout.write('\n')
+            sys.stdout.write(delimiter.join(row))
+        self.cmd_results.on_error_exit()
+        return ''
+
+    def build(self, is_source_cstore=False, stream=False):
+        """Build the report.
+
+        :param is_source_cstore: the report query only reads column store tables
+        :param stream: for a psv report, write the report rows to stdout as they
+            are read from the database and return an empty string
+        :return: the report
+        """
         args = self.args_handler.args
 
         query = """WITH
@@ -1867,13 +3782,43 @@ FROM report_data {order_by}""".format(
                 , pre_sql=self.pre_sql
                 , query=query)
 
-            self.cmd_results = self.db_conn.ybsql_query(query, strip_warnings=self.strip_warnings)
-            self.cmd_results.on_error_exit()
+            # with a backend that streams, the query output is read a line at a time,
+            #   so the full output of a large report is never held in memory as a
+            #   single string, the other backends, like --ybsql_session, return the
+            #   full output and are not replaced by a ybsql process to stream
+            if self.db_conn.get_backend().supports_stream:
+                self.cmd_results = self.db_conn.ybsql_query(
+                    query, strip_warnings=self.strip_warnings, stream=True)
+                rows = Report.del_lines_to_list_data(self.cmd_results.lines(), delimiter)
+                headers = next(rows)
+            else:
+                self.cmd_results = self.db_conn.ybsql_query(query, strip_warnings=self.strip_warnings)
+                self.cmd_results.on_error_exit()
+                (headers, data) = Report.del_data_to_list_data(self.cmd_results.stdout, delimiter)
+                rows = iter(data)
+
+            if headers == ['']:
+                # ybsql only prints a result once the query has completed, a failed
+                #   query has no header row, so its error is written instead of an
+                #   empty report
+                rows = list(rows)
+                self.cmd_results.on_error_exit()
 
-            if args.report_type == 'formatted':
-                report = self.del_data_to_formatted_report(self.cmd_results.stdout, delimiter)
-            elif args.report_type == 'psv':
-                report = self.del_data_processed(self.cmd_results.stdout, delimiter)
+            sort_rows = (hasattr(args, 'report_sort_column') and args.report_sort_column in headers)
+            if args.report_type == 'psv' and stream and not sort_rows:
+                report = self.write_del_data(headers, rows, delimiter)
+            else:
+                data = list(rows)
+                self.cmd_results.on_error_exit()
+                (headers, data) = self.list_data_sort(headers, data)
+                if args.report_type == 'formatted':
+                    from tabulate import tabulate
+                    headers_formatted = [header.replace('_', '\n') for header in headers]
+                    report = tabulate(data, headers=headers_formatted)
+                elif stream:
+                    report = self.write_del_data(headers, data, delimiter)
+                else:
+                    report = '\n'.join([delimiter.join(row) for row in [headers] + data])
 
         elif args.report_type in ('ctas', 'insert'):
             #case 3 store report from cstore table
@@ -1911,6 +3856,87 @@ FROM report_data {order_by}""".format(
 
         return report
 
+class OutputTemplate(object):
+    """An --output_template compiled once and applied to many object rows.
+
+    The template is parsed up front so each row only gets the vars the template
+    uses, the *_path vars and object name quoting are skipped when they aren't
+    needed, and the quoting of repeated names like the database and schema is
+    cached.
+    """
+    object_keys = ('column', 'database', 'object', 'owner', 'schema', 'sequence', 'stored_proc', 'table', 'view')
+    path_objects = ('object', 'sequence', 'stored_proc', 'table', 'view')
+    # names that quote_object_paths leaves as is
+    is_unquoted_name = re.compile(r'[a-z0-9_]*\Z').match
+
+    def __init__(self, template, tmplt_vars, constant_vars):
+        """
+        :param template: the template string, like '{table_path}'
+        :param tmplt_vars: the output_tmplt_vars of the util
+        :param constant_vars: dict of vars that are the same for every row, these
+            override row vars of the same name
+        """
+        self.template = template
+        self.fields = set()
+        for (literal, field, spec, conversion) in Formatter().parse(template):
+            if field:
+                self.fields.add(re.split(r'[.\[]', field, 1)[0])
+
+        self.path_vars = []
+        for var in (tmplt_vars or []):
+            path_var = var.rsplit('_', 1)
+            if var in self.fields and len(path_var) == 2 and path_var[1] == 'path':
+                self.path_vars.append((var, path_var[0]))
+
+        # only the object names used by the template or a *_path var are quoted
+        self.quote_keys = set(self.fields)
+        if self.path_vars:
+            self.quote_keys.update(OutputTemplate.object_keys)
+        self.quote_keys.intersection_update(OutputTemplate.object_keys)
+
+        self.constant_vars = dict(
+            [(k, v) for (k, v) in constant_vars.items() if k in self.fields])
+        self.uses_max_ordinal = 'max_ordinal' in self.fields
+        self.quoted_names = {}
+
+    def quote(self, name):
+        if OutputTemplate.is_unquoted_name(name):
+            return name
+        quoted = self.quoted_names.get(name)
+        if quoted is None:
+            quoted = Common.quote_object_paths(name)
+            if len(self.quoted_names) < 100000:
+                self.quoted_names[name] = quoted
+        return quoted
+
+    def format_vars(self, row):
+        format = {}
+        for k, v in row.items():
+            if k in self.quote_keys:
+                format[k] = self.quote(v)
+            else:
+                format[k] = v
+        # build *_path vars like table_path and schema_path
+        for (var, objct) in self.path_vars:
+            if objct in OutputTemplate.path_objects:
+                format[var] = '%s.%s.%s' % (format['database'], format['schema'], format[objct])
+            elif objct == 'schema':
+                format[var] = '%s.%s' % (format['database'], format['schema'])
+            elif objct == 'column':
+                table = ('table' if ('table' in format) else 'object')
+                format[var] = '%s.%s.%s.%s' % (format['database'], format['schema'], format[table], format[objct])
+        format.update(self.constant_vars)
+        return format
+
+    def lines(self, rows):
+        """Yield the template applied to each row dict followed by a new line."""
+        template = self.template
+        for row in rows:
+            try:
+                yield template.format(**self.format_vars(row)) + '\n'
+            except KeyError as error:
+                Common.error('%s template var was not found...' % error)
+
 class Util(object):
     conn_args_file = {'$HOME/conn.args': """--host yb89
 --dbuser dze
@@ -1930,10 +3956,15 @@ class Util(object):
         , 'output_tmplt_vars': None
         , 'output_tmplt_default': None
         , 'db_filter_args': {}
+        , 'catalog_snapshot_filter_args': None
         , 'additional_args': None
         , 'report_sp_location': '.'
         , 'report_columns': None
         , 'report_default_order': [] }
+    # the CatalogSnapshot of a utility run with --catalog_snapshot
+    catalog_snapshot = None
+    # the row dictionaries the template was applied to, only kept by Util.run
+    template_rows_kept = None
 
     def __init__(self, db_conn=None, args_handler=None, init_default=True, util_name=None):
         if util_name:
@@ -1966,64 +3997,220 @@ class Util(object):
             self.args_handler.args_process()
             self.additional_args_process()
             if Common.verbose >= 3:
+                import pprint
                 print('args: %s' % pprint.PrettyPrinter().pformat(vars(self.args_handler.args)))
-            if not self.args_handler.args.skip_db_conn:
+            if self.config['catalog_snapshot_filter_args'] and self.args_handler.args.catalog_snapshot:
+                if getattr(self.args_handler.args, 'exec_output', False):
+                    self.args_handler.args_parser.error(
+                        'argument --exec_output: not allowed with argument --catalog_snapshot')
+                self.catalog_snapshot = CatalogSnapshot(self.args_handler.args.catalog_snapshot)
+                self.db_conn = None
+            elif not self.args_handler.args.skip_db_conn:
                 self.db_conn = DBConnect(self.args_handler)
 
         if hasattr(self.args_handler, 'db_filter_args'):
             self.db_filter_args = self.args_handler.db_filter_args
 
+    def init_in_process(self, args, db_conn):
+        """Initialize the utility to run in the process of a calling utility.
+
+        The args are processed like the utility was run from the command line,
+        but the db connection of the calling utility is shared, so there is no
+        new python process, connection args processing or connection verify.
+        The connection args in args are ignored, the verbose, nocolor and
+        max_concurrency settings of the calling utility are kept.
+
+        :param args: the utility args, a list or a string split like a shell does
+        :param db_conn: the DBConnect of the calling utility
+        """
+        if not isinstance(args, list):
+            args = shlex.split(args)
+
+        settings = (Common.verbose, Common.max_concurrency, Text.nocolor)
+        self.args_handler = ArgsHandler(self.config, init_default=False)
+        self.config['additional_args'] = getattr(self, 'additional_args')
+        self.args_handler.init_default()
+        self.args_handler.args_process(args)
+        (Common.verbose, Common.max_concurrency, Text.nocolor) = settings
+
+        self.additional_args_process()
+        self.db_conn = db_conn
+        self.db_filter_args = self.args_handler.db_filter_args
+
+    @classmethod
+    def run(cls, args, db_conn, **execute_args):
+        """Run the utility in the process of a calling utility, see
+        init_in_process.  An error in the utility exits, like the calling
+        utility would on the error of a utility run as a new process.
+
+        :param args: the utility args, a list or a string split like a shell does
+        :param db_conn: the DBConnect of the calling utility
+        :param execute_args: the keyword args passed to the utility execute
+        :return: a CmdResult, its stdout is the output the utility prints when run
+            from the command line, like the DDL of yb_ddl_object, and its rows are
+            the row dictionaries the output template was applied to, like the
+            owner, database, schema and table of each yb_get_table_names row, or
+            an empty list if the utility doesn't apply a template
+        """
+        return cls(init_default=False).run_in_process(args, db_conn, **execute_args)
+
+    def run_in_process(self, args, db_conn, **execute_args):
+        """Initialize the utility in the process of a calling utility and
+        execute it, see run.
+
+        :return: a CmdResult of the output and the template rows, see run
+        """
+        self.init_in_process(args, db_conn)
+        self.template_rows_kept = []
+        output = self.execute(**execute_args)
+
+        cmd_result = getattr(self, 'cmd_result', None)
+        result = CmdResult(output or ''
+            , stderr=(cmd_result.stderr if cmd_result else '')
+            , exit_code=(cmd_result.exit_code if cmd_result else 0))
+        result.rows = self.template_rows_kept
+        return result
+
     def exec_query_and_apply_template(self, sql_query, exec_output=False):
         self.cmd_result = self.db_conn.ybsql_query(sql_query)
         self.cmd_result.on_error_exit()
         return self.apply_template(self.cmd_result.stdout, exec_output)
 
     def apply_template(self, output_raw, exec_output=False):
+        """Apply the template to rows built as Python dictionary code in SQL.
+
+        Use template_rows_sql and query_and_apply_template for new code, this
+        form is kept for rows that hold multi-line values like DDL.
+        """
         # convert the SQL from code(of a dictionary) to an evaluated dictionary
-        rows = eval('[%s]' % output_raw)
+        rows = []
+        for row in eval('[%s]' % output_raw):
+            rows.append(dict(
+                [(k, (v.strip() if type(v) is str else v)) for (k, v) in row.items()]))
 
-        additional_vars = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            , 'max_ordinal': len(rows)
-            , '^M': '\n' }
+        return self.apply_template_rows(rows, exec_output)
 
-        output_new = ''
-        for row in rows:
-            format = {}
-            # strip vars and add double quotes to non-lower case db objects
-            for k, v in row.items():
-                if k in ('column', 'database', 'object', 'owner', 'schema', 'sequence', 'stored_proc', 'table', 'view'):
-                    format[k] = Common.quote_object_paths(v.strip())
-                elif type(v) is str:
-                    format[k] = v.strip()
-                else:
-                    format[k] = v
-            # build *_path vars like table_path and schema_path
-            for var in self.config['output_tmplt_vars']:
-                path_var = var.rsplit('_',1)
-                if len(path_var) == 2 and path_var[1] == 'path':
-                    if path_var[0] in ['object', 'sequence', 'stored_proc', 'table', 'view']:
-                        format[var] = '%s.%s.%s' % (format['database'], format['schema'], format[path_var[0]])
-                    elif path_var[0] in ('schema'):
-                        format[var] = '%s.%s' % (format['database'], format['schema'])
-                    elif path_var[0] in ('column'):
-                        objct = ('table' if ('table' in format) else 'object')
-                        format[var] = '%s.%s.%s.%s' % (format['database'], format['schema'], format[objct], format[path_var[0]])
-
-            format.update(additional_vars)
-            format.update(self.db_conn.ybdb)
-            try:
-                output_new += (self.args_handler.args.template.format(**format)
-                    + ('\n'))
-            except KeyError as error:
-                Common.error('%s template var was not found...' % error)
+    @staticmethod
+    def template_rows_sql(columns):
+        """Build the SQL expression for a row of the template row protocol.
+
+        Each row is output as a single ybsql column, the values are delimited
+        by the ASCII US(unit separator) and the row ends with the ASCII
+        RS(record separator), so values holding '|' or new lines still decode.
+
+        :param columns: the SQL expressions of the row values, in the order of
+            the fields passed to template_rows
+        :return: the SQL expression
+        """
+        return ' || CHR(31) || '.join(
+            ["NVL(%s, '<NULL>')" % column for column in columns]) + ' || CHR(30)'
+
+    @staticmethod
+    def template_rows(lines, fields, cmd_result=None):
+        """Decode the template row protocol, see template_rows_sql.
+
+        :param lines: the query stdout lines, a list or a Cmd.lines generator
+        :param fields: the names of the row values
+        :param cmd_result: if set, on_error_exit is called once the lines are read
+        :return: a generator of row dictionaries, each row also gets an ordinal
+        """
+        field_sep = chr(31)
+        row_sep = chr(30)
+        ordinal = 0
+        partial_row = ''
+        for line in lines:
+            row = line.rstrip('\r\n')
+            if not row.endswith(row_sep):
+                # a value with a new line
+                partial_row += line if line.endswith('\n') else line + '\n'
+                continue
+            elif partial_row:
+                row = partial_row + row
+                partial_row = ''
+            ordinal += 1
+            row = dict(zip(fields, row[:-1].split(field_sep)))
+            row['ordinal'] = ordinal
+            yield row
+
+        if cmd_result:
+            cmd_result.on_error_exit()
+
+    def query_and_apply_template(self, sql_query, fields, exec_output=False, out=None):
+        """Run a query that outputs the template row protocol and apply the template.
+
+        :param sql_query: the query, see template_rows_sql
+        :param fields: the names of the row values
+        :param exec_output: run the templated output as SQL
+        :param out: a file like sys.stdout, when set the query output is read
+            and the templated rows are written a line at a time
+        :return: the templated output, or '' when written to out
+        """
+        # only a backend that streams is used to stream, a ybsql process isn't
+        #   started in place of --ybsql_session or --query_backend wire
+        if out and not exec_output and self.db_conn.get_backend().supports_stream:
+            self.cmd_result = self.db_conn.ybsql_query(sql_query, stream=True)
+            lines = self.cmd_result.lines()
+        else:
+            self.cmd_result = self.db_conn.ybsql_query(sql_query)
+            # not splitlines, it also splits on the chr(30) row separator
+            lines = self.cmd_result.stdout.split('\n')
+
+        rows = Util.template_rows(lines, fields, self.cmd_result)
+        return self.apply_template_rows(rows, exec_output, out)
+
+    def snapshot_query_and_apply_template(self, sql_query, fields, out=None):
+        """Run a query of the --catalog_snapshot and apply the template, see
+        CatalogSnapshot.
+
+        :param sql_query: the SQLite query, its {filter_clause} is replaced with
+            the db filter args applied to the catalog_snapshot_filter_args columns
+        :param fields: the names of the row values
+        :param out: a file like sys.stdout to write the templated rows to
+        :return: the templated output, or '' when written to out
+        """
+        self.cmd_result = CmdResult()
+        rows = self.catalog_snapshot.rows(
+            sql_query.format(filter_clause=self.snapshot_filter_sql()), fields)
+        return self.apply_template_rows(rows, out=out)
+
+    def snapshot_filter_sql(self):
+        return self.catalog_snapshot.filter_sql(self.db_filter_args.build_sql_filter(
+            self.config['catalog_snapshot_filter_args']))
+
+    def apply_template_rows(self, rows, exec_output=False, out=None):
+        """Apply the template to each row.
+
+        :param rows: iterable of row dictionaries
+        :param exec_output: run the templated output as SQL
+        :param out: a file like sys.stdout to write the templated rows to
+        :return: the templated output, or '' when written to out
+        """
+        template = OutputTemplate(
+            self.args_handler.args.template, self.config['output_tmplt_vars']
+            , dict([
+                ('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                , ('^M', '\n') ]
+                + list((self.catalog_snapshot.ybdb if self.catalog_snapshot else self.db_conn.ybdb).items())) )
+
+        # max_ordinal requires all the rows before the first is output
+        if template.uses_max_ordinal or self.template_rows_kept is not None:
+            rows = list(rows)
+            template.constant_vars['max_ordinal'] = len(rows)
+            if self.template_rows_kept is not None:
+                self.template_rows_kept.extend(rows)
 
         if exec_output:
-            self.cmd_result = self.db_conn.ybsql_query(output_new)
+            self.cmd_result = self.db_conn.ybsql_query(''.join(template.lines(rows)))
             self.cmd_result.on_error_exit()
+            if out:
+                out.write(self.cmd_result.stdout)
+                return ''
             return self.cmd_result.stdout
+        elif out:
+            out.writelines(template.lines(rows))
+            return ''
         else:
-            return output_new
+            return ''.join(template.lines(rows))
 
     def db_filter_sql(self, db_filter_args='db_filter_args'):
         return self.db_filter_args.build_sql_filter(self.config[db_filter_args])
@@ -2080,7 +4267,7 @@ WHERE
 ORDER BY
     name""".format(filter_clause = filter_clause)
 
-        cmd_result = self.db_conn.ybsql_query(sql_query)
+        cmd_result = self.db_conn.ybsql_query(sql_query, cache=True)
         cmd_result.on_error_exit()
 
         dbs = cmd_result.stdout.strip()
@@ -2143,9 +4330,9 @@ wrkr AS (
 )
 SELECT * FROM clstr
 """
-        cmd_result = self.db_conn.ybsql_query(sql_query)
+        cmd_result = self.db_conn.ybsql_query(sql_query, cache=True)
         cmd_result.on_error_exit()
-        (headers, data) = Report.del_data_to_list_data(cmd_result.stdout.strip())
+        (headers, columns) = Report.del_data_to_column_data(cmd_result.stdout.strip(), row_ct=1)
 
         if return_format == 'sql':
             cluster_info = '    SELECT'
@@ -2155,10 +4342,10 @@ SELECT * FROM clstr
             if return_format == 'sql':
                 cluster_info += '\n        %s%s AS %s' % (
                     '' if index == 0 else ', '
-                    , data[0][index]
+                    , columns[index][0]
                     , headers[index])
             else:
-                cluster_info[headers[index]] = data[0][index]
+                cluster_info[headers[index]] = columns[index][0]
 
         return cluster_info
 
@@ -2253,6 +4440,525 @@ class UtilDualDBConn(Util):
         self.args_handler.args_usage_example()
 
 
+class UtilChunkDML(Util):
+    """A utility that chunks DML with one of the yb_chunk_dml_by_*_p stored procs.
+
+    The proc runs the chunk DMLs one after another in its own session.  With
+    --parallel_sessions or --chunk_plan the proc only builds the chunk plan, the
+    chunk boundaries and row counts, the chunk DMLs are then built from the
+    plan and run by a pool of sessions, each chunk in its own transaction, see
+    execute_chunks.  With --chunk_boundaries estimate the proc is not run, the
+    chunk boundaries are estimated from the column statistics, see
+    estimated_chunks.  yb_chunk_dml_by_hash has no proc, it builds its plan
+    from the row counts of hash buckets of the table.
+    """
+    # the proc's verbose line before each chunk DML, like:
+    #   --2024-08-22 10:15:00.123456-07: Chunk: 3, Rows: 1000000, Range 2000 <= sale_id < 3000
+    chunk_line = re.compile(r'^--.*?: Chunk: (\d+), Rows: (\d+), ')
+    total_line = re.compile(r'^--(Total Rows|IS NULL Rows)\s*: (\d+)$')
+    # the DML the proc builds a plan with, the proc prints the boundaries of
+    #   each chunk in place of its DML
+    plan_dml = '>!>CHUNK<!<<chunk_first_val>|<chunk_last_val>|<chunk_where_clause>'
+    plan_line = re.compile(r'^>!>CHUNK<!<(.*?)\|(.*?)\|(.*);$')
+    # the command tag ybsql prints for a DML when it is not run quietly
+    dml_tag_line = re.compile(r'^(?:INSERT \d+|UPDATE|DELETE|SELECT) (\d+)$', re.MULTILINE)
+    # the proc args that a plan is built from, a plan is only reused for the same args
+    plan_key_args = ('a_table', 'a_integer_column', 'a_yyyymmdd_column', 'a_ts_column', 'a_date_part'
+        , 'a_hash_columns', 'a_hash_buckets', 'a_table_where_clause', 'a_min_chunk_size', 'a_add_null_chunk')
+    # a --pre_sql statement that only applies to the session it is run in, like
+    #   a SET or a TEMP table
+    session_sql = re.compile(r'(?:^|;)\s*(SET|RESET|PREPARE|DISCARD|CREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?TEMP(?:ORARY)?)\b'
+        , re.IGNORECASE)
+
+    def add_parallel_args(self, args_grp):
+        args_grp.add_argument("--parallel_sessions", metavar="SESSIONS"
+            , type=ArgIntRange(1,64), default=1
+            , help="run the chunked DML on SESSIONS concurrent sessions, each chunk is run in its own"
+                " transaction, the --pre_sql is run once before the chunks are built and the"
+                " --post_sql is run once after all the chunks succeed, a --pre_sql that sets up its"
+                " session, like a SET or a TEMP table, is rejected as the chunks don't run in that"
+                " session, defaults to 1")
+        args_grp.add_argument("--chunk_retries", metavar="RETRIES"
+            , type=ArgIntRange(0,10), default=0
+            , help="with --parallel_sessions, the number of times a failed chunk is run again"
+                ", the wait before each retry doubles starting at 10 seconds, defaults to 0")
+        args_grp.add_argument("--chunk_plan", metavar="PLAN_FILE"
+            , help="the file the chunk plan is saved to, later runs with the same table, column, where"
+                " clause and chunk rows reuse the plan, instead of scanning the table, until the table"
+                " is recreated or its row count drifts beyond --chunk_plan_drift")
+        args_grp.add_argument("--chunk_plan_drift", metavar="PCT"
+            , type=ArgIntRange(0,100), default=5
+            , help="the percent the table row count may change before the chunk plan is rebuilt"
+                ", defaults to 5")
+
+    def add_estimate_args(self, args_grp):
+        args_grp.add_argument("--chunk_boundaries", choices=['exact', 'estimate'], default='exact'
+            , help="exact chunks are built by the proc from a group by scan of the table, estimated"
+                " chunks are built from the column statistics, or the column MIN/MAX, without the group by"
+                " scan and are resized from the rows of each chunk run, when the catalog row count of the"
+                " table is 0 the chunks are exact, defaults to exact")
+
+    def chunks_run_in_own_sessions(self):
+        """The chunk DMLs are run by the proc in the session of the --pre_sql,
+        unless they are run by execute_chunks, then each chunk DML is run in a
+        session of its own."""
+        args = self.args_handler.args
+        return bool(getattr(args, 'chunk_boundaries', 'exact') == 'estimate'
+            or getattr(args, 'chunk_plan', None)
+            or getattr(args, 'parallel_sessions', 1) > 1)
+
+    def check_pre_sql(self):
+        """Reject a --pre_sql that sets up its session, like a SET or a TEMP table,
+        when the chunk DMLs don't run in that session."""
+        args = self.args_handler.args
+        if not (args.execute_chunk_dml and args.pre_sql and self.chunks_run_in_own_sessions()):
+            return
+        match = UtilChunkDML.session_sql.search(args.pre_sql)
+        if match:
+            self.args_handler.args_parser.error(
+                "the --pre_sql %s only applies to the session it is run in and the chunk DMLs are"
+                " run in sessions of their own, put the session setup in the --dml instead"
+                % re.sub(r'\s+', ' ', match.group(1).upper()))
+
+    def call_chunk_proc(self, proc_name, proc_args):
+        """Call the chunking proc, or build the chunk plan with the proc, or reuse a
+        saved plan, and run the chunks with execute_chunks."""
+        args = self.args_handler.args
+        if getattr(args, 'chunk_boundaries', 'exact') == 'estimate':
+            # the estimate is sized from the catalog row count, a count of 0, like the rowstore
+            #   rows before version 5, would size the first chunk to hold the whole table
+            table_state = self.table_state(proc_args['a_table'])
+            if table_state and table_state['rows']:
+                self.run_estimated_chunks(proc_args, table_state)
+                return
+            Common.error("the catalog row count of the table '%s' is 0, the chunk boundaries are exact"
+                % proc_args['a_table'], exit_code=None, color='yellow')
+
+        plan_file = getattr(args, 'chunk_plan', None)
+        if not (plan_file or (args.execute_chunk_dml and getattr(args, 'parallel_sessions', 1) > 1)):
+            self.cmd_results = StoredProc(proc_name, self.db_conn).call_proc_as_anonymous_block(
+                args=proc_args, pre_sql=args.pre_sql, post_sql=args.post_sql)
+            return
+
+        verbose = (proc_args['a_verbose'] == 'TRUE')
+        plan = (self.read_chunk_plan(plan_file, proc_name, proc_args, verbose) if plan_file else None)
+        if plan:
+            if args.pre_sql:
+                cmd_result = self.db_conn.ybsql_query(args.pre_sql)
+                if cmd_result.exit_code:
+                    self.cmd_results = cmd_result
+                    return
+        else:
+            plan = self.build_chunk_plan(proc_name, proc_args)
+            if not plan:
+                return
+            if plan_file:
+                self.write_chunk_plan(plan_file, plan)
+                if verbose:
+                    sys.stdout.write('--%s: Saved chunk plan: %s, Chunks: %d\n' % (
+                        datetime.now(), plan_file, len(plan['chunks'])))
+
+        for chunk in plan['chunks']:
+            chunk['dml'] = self.chunk_dml(args.dml, chunk)
+        add_null_chunk = (proc_args['a_add_null_chunk'] == 'TRUE')
+        if args.execute_chunk_dml:
+            self.cmd_results = self.execute_chunks(plan['chunks'], plan['totals'], add_null_chunk)
+        else:
+            self.print_chunks(plan['chunks'], verbose)
+
+    def print_chunks(self, chunks, verbose):
+        """Print the chunks without running them."""
+        for chunk in chunks:
+            if 'dml' not in chunk:
+                chunk['dml'] = self.chunk_dml(self.args_handler.args.dml, chunk)
+            if verbose:
+                sys.stdout.write('--%s: Chunk: %d, Rows: %d\n' % (datetime.now(), chunk['chunk'], chunk['rows']))
+            if self.args_handler.args.print_chunk_dml:
+                sys.stdout.write('%s;\n' % chunk['dml'])
+        self.cmd_results = CmdResult()
+
+    def run_estimated_chunks(self, proc_args, table_state):
+        """Build the chunks from an estimate of the column's value distribution,
+        see estimated_chunks, and run them with execute_chunks.
+
+        :param table_state: the catalog state of the table, see table_state
+        """
+        args = self.args_handler.args
+        verbose = (proc_args['a_verbose'] == 'TRUE')
+        if args.pre_sql:
+            cmd_result = self.db_conn.ybsql_query(args.pre_sql)
+            if cmd_result.exit_code:
+                self.cmd_results = cmd_result
+                return
+
+        estimate = self.column_estimate(
+            proc_args['a_table'], proc_args['a_integer_column'], proc_args['a_table_where_clause']
+            , table_state['rows'])
+        if verbose:
+            sys.stdout.write('--%s: Estimated Chunking, Rows: %d, IS NULL Rows: %d, Estimated from: %s\n' % (
+                datetime.now(), estimate['rows'], estimate['null_rows'], estimate['source']))
+
+        add_null_chunk = (proc_args['a_add_null_chunk'] == 'TRUE')
+        chunks = self.estimated_chunks(estimate, proc_args['a_integer_column']
+            , proc_args['a_min_chunk_size'], add_null_chunk)
+        if args.execute_chunk_dml:
+            self.cmd_results = self.execute_chunks(chunks
+                , {'Total Rows': estimate['rows'] + estimate['null_rows'], 'IS NULL Rows': estimate['null_rows']}
+                , add_null_chunk)
+        else:
+            self.print_chunks(chunks, verbose)
+
+    def column_estimate(self, table, column, table_where_clause, rows):
+        """Estimate the value distribution of an integer column without scanning
+        the table.  The row count is the catalog row count, see table_state, the
+        boundaries are the histogram bounds of the column statistics, or the
+        column MIN/MAX when the statistics are not readable or have no histogram.
+
+        :param rows: the catalog row count of the table
+        :return: a dictionary of the estimated non NULL rows and NULL rows, the
+            sorted boundaries which each hold an equal part of the rows, and the
+            source of the boundaries
+        """
+        (database, schema, table_name) = Common.split_db_object_name(table)
+        (schema, table_name, column_name) = [
+            (None if name is None else name[1:-1] if name.startswith('"') else name.lower())
+            for name in (schema, table_name, column)]
+
+        null_frac = 0.0
+        bounds = None
+        source = 'histogram'
+        cmd_result = self.db_conn.ybsql_query("""
+SELECT null_frac, histogram_bounds::VARCHAR
+FROM {database}pg_catalog.pg_stats
+WHERE schemaname = {schema} AND tablename = '{table}' AND attname = '{column}'""".format(
+            database=('%s.' % database if database else '')
+            , schema=("'%s'" % schema.replace("'", "''") if schema else 'CURRENT_SCHEMA')
+            , table=table_name.replace("'", "''"), column=column_name.replace("'", "''")))
+        stats = cmd_result.stdout.strip().split('\n')[0] if cmd_result.exit_code == 0 else ''
+        if '|' in stats:
+            (null_frac, histogram) = stats.split('|', 1)
+            null_frac = float(null_frac or 0)
+            try:
+                bounds = sorted(set([int(bound) for bound in histogram.strip('{}').split(',')]))
+            except ValueError:
+                bounds = None
+        if not bounds or len(bounds) < 2:
+            source = 'min/max'
+            cmd_result = self.db_conn.ybsql_query('SELECT MIN({column}), MAX({column}) FROM {table} WHERE {where}'.format(
+                column=column, table=table, where=table_where_clause))
+            cmd_result.on_error_exit()
+            (min_val, max_val) = cmd_result.stdout.strip().split('|')
+            bounds = ([] if min_val == '' else [int(min_val), int(max_val) + 1])
+
+        null_rows = int(round(rows * null_frac))
+        return {'rows': rows - null_rows, 'null_rows': null_rows, 'bounds': bounds, 'source': source}
+
+    def estimated_chunks(self, estimate, column, chunk_rows, add_null_chunk):
+        """Generate the chunks of the estimated value distribution of a column.
+
+        The rows are assumed to be spread evenly between the boundaries.  The
+        chunks are built one at a time as they are run, each chunk is sized from
+        the estimated rows per actual row of the chunks run before it, so the
+        estimate is corrected as the chunks run, see correct_estimate.  The first
+        and last chunks are open ended, so every row is in a chunk even if the
+        estimate is off.
+        """
+        import bisect, math
+        bounds = estimate['bounds']
+        buckets = len(bounds) - 1
+        rows = max(estimate['rows'], 1)
+        self.estimate_scale = 1.0
+
+        def rows_below(value):
+            if value <= bounds[0]:
+                return 0.0
+            if value >= bounds[-1]:
+                return float(rows)
+            bucket = bisect.bisect_right(bounds, value) - 1
+            return rows * (bucket + float(value - bounds[bucket]) / (bounds[bucket + 1] - bounds[bucket])) / buckets
+
+        def value_at(rows_below_value):
+            position = rows_below_value * buckets / rows
+            bucket = int(position)
+            if bucket >= buckets:
+                return bounds[-1]
+            return bounds[bucket] + int(math.ceil((position - bucket) * (bounds[bucket + 1] - bounds[bucket])))
+
+        chunk = 0
+        first_val = (bounds[0] if bounds else None)
+        while bounds:
+            chunk += 1
+            start_rows = rows_below(first_val)
+            last_val = max(value_at(start_rows + chunk_rows * self.estimate_scale), first_val + 1)
+            is_last = (last_val >= bounds[-1])
+            size = int(round((rows if is_last else rows_below(last_val)) - start_rows))
+            where = ' AND '.join(
+                ([] if chunk == 1 else ['%d <= %s' % (first_val, column)])
+                + ([] if is_last else ['%s < %d' % (column, last_val)])) or 'TRUE'
+            yield {'chunk': chunk, 'rows': size, 'estimated': True
+                , 'first_val': str(first_val), 'last_val': str(last_val)
+                , 'where': '/* chunk_clause(chunk: %d, size: %d) >>>*/ %s /*<<< chunk_clause */' % (
+                    chunk, size, where)}
+            if is_last:
+                break
+            first_val = last_val
+
+        if add_null_chunk:
+            yield {'chunk': chunk + 1, 'rows': estimate['null_rows'], 'estimated': True
+                , 'first_val': None, 'last_val': None, 'where': '%s IS NULL' % column}
+
+    def correct_estimate(self, chunk):
+        """Correct the estimated rows per actual row from the rows of a chunk run,
+        the correction is smoothed over the chunks and kept within 1/16 and 16."""
+        if chunk.get('done_rows') is None or chunk['first_val'] is None:
+            return
+        scale = (float(chunk['rows']) / chunk['done_rows'] if chunk['done_rows'] else 2 * self.estimate_scale)
+        self.estimate_scale = min(max((self.estimate_scale + scale) / 2, 1 / 16.0), 16.0)
+
+    @staticmethod
+    def chunk_dml(dml, chunk):
+        """Build the DML of a chunk of the plan, the same as the proc builds it."""
+        dml = dml.replace('<chunk_where_clause>', chunk['where'])
+        if chunk['first_val'] is None:
+            # like the proc, only the where clause of the NULL chunk is replaced
+            return dml
+        for (token, value) in (
+            ('<chunk_first_val>', chunk['first_val']), ('<chunk_last_val>', chunk['last_val'])
+            , ('<chunk_size>', str(chunk['rows'])), ('<chunk>', str(chunk['chunk']))):
+            dml = dml.replace(token, value)
+        return dml
+
+    def build_chunk_plan(self, proc_name, proc_args):
+        """Build the chunk plan of the table with the proc, the proc prints the
+        boundaries of each chunk in place of its DML.
+
+        :return: the plan dictionary, or None if the proc failed, its result is
+            then set to self.cmd_results
+        """
+        plan_args = proc_args.copy()
+        plan_args.update({'a_dml': self.plan_dml, 'a_verbose': 'TRUE', 'a_print_chunk_dml': 'TRUE'
+            , 'a_execute_chunk_dml': 'FALSE'})
+        # the table state is read first, so a change during the build causes a rebuild
+        table_state = self.table_state(proc_args['a_table'])
+        plan_results = StoredProc(proc_name, self.db_conn).call_proc_as_anonymous_block(
+            args=plan_args, pre_sql=self.args_handler.args.pre_sql)
+        if plan_results.exit_code:
+            self.cmd_results = plan_results
+            return None
+
+        chunks = []
+        totals = {}
+        for line in plan_results.stdout.split('\n'):
+            chunk_match = self.chunk_line.match(line)
+            plan_match = self.plan_line.match(line)
+            total_match = self.total_line.match(line)
+            if chunk_match:
+                chunks.append({'chunk': int(chunk_match.group(1)), 'rows': int(chunk_match.group(2))})
+            elif plan_match and chunks:
+                chunks[-1].update({
+                    'first_val': (None if plan_match.group(1) == '<chunk_first_val>' else plan_match.group(1))
+                    , 'last_val': (None if plan_match.group(2) == '<chunk_last_val>' else plan_match.group(2))
+                    , 'where': plan_match.group(3)})
+            elif total_match:
+                totals[total_match.group(1)] = int(total_match.group(2))
+
+        return {
+            'proc': proc_name
+            , 'args': dict([(arg, proc_args[arg]) for arg in self.plan_key_args if arg in proc_args])
+            , 'table_state': table_state
+            , 'built': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            , 'totals': totals
+            , 'chunks': [chunk for chunk in chunks if 'where' in chunk] }
+
+    def table_state(self, table):
+        """Get the catalog state of a table, its table id and row count, read from
+        the catalog without scanning the table.
+
+        :return: a dictionary of the table_id and rows, or None if the table
+            is not found in the catalog
+        """
+        (database, schema, table_name) = Common.split_db_object_name(table)
+        (database, schema, table_name) = [
+            (None if name is None else name[1:-1] if name.startswith('"') else name.lower())
+            for name in (database, schema, table_name)]
+        sql_query = """
+SELECT t.table_id, {rowstore_rows}NVL(SUM(ts.rows_columnstore), 0)
+FROM
+    sys.table AS t
+    JOIN sys.schema AS s
+        ON t.schema_id = s.schema_id AND t.database_id = s.database_id
+    JOIN sys.database AS d
+        ON t.database_id = d.database_id
+    LEFT JOIN sys.table_storage AS ts
+        ON t.table_id = ts.table_id
+WHERE
+    d.name = {database}
+    AND s.name = {schema}
+    AND t.name = '{table}'
+GROUP BY 1{rowstore_group}""".format(
+            rowstore_rows=('NVL(t.rowstore_row_count, 0) + '
+                if self.db_conn.ybdb['version_major'] >= 5 else '')
+            , rowstore_group=(', t.rowstore_row_count' if self.db_conn.ybdb['version_major'] >= 5 else '')
+            , database=("'%s'" % database.replace("'", "''") if database else 'CURRENT_DATABASE()')
+            , schema=("'%s'" % schema.replace("'", "''") if schema else 'CURRENT_SCHEMA')
+            , table=table_name.replace("'", "''"))
+
+        cmd_result = self.db_conn.ybsql_query(sql_query)
+        cmd_result.on_error_exit()
+        for line in cmd_result.stdout.strip().split('\n'):
+            if '|' in line:
+                (table_id, rows) = line.split('|')
+                return {'table_id': int(table_id), 'rows': int(rows)}
+        return None
+
+    def read_chunk_plan(self, plan_file, proc_name, proc_args, verbose):
+        """Read a saved chunk plan, the plan is reused if it was built with the same
+        proc args, the table has not been recreated and its row count has not
+        drifted beyond --chunk_plan_drift.
+
+        :return: the plan dictionary, or None if the plan must be rebuilt
+        """
+        import json
+        if not os.path.exists(plan_file):
+            return None
+        try:
+            plan = json.loads(Common.read_file(plan_file))
+        except (IOError, OSError, ValueError) as error:
+            Common.error('the chunk plan could not be read: %s' % error)
+
+        reason = None
+        table_state = self.table_state(proc_args['a_table'])
+        plan_args = dict([(arg, proc_args[arg]) for arg in self.plan_key_args if arg in proc_args])
+        if plan.get('proc') != proc_name or plan.get('args') != plan_args:
+            reason = 'the plan is of different chunking arguments'
+        elif not (table_state and plan.get('table_state')
+            and table_state['table_id'] == plan['table_state']['table_id']):
+            reason = 'the table has changed'
+        else:
+            drift = (abs(table_state['rows'] - plan['table_state']['rows'])
+                * 100.0 / max(plan['table_state']['rows'], 1))
+            if drift > self.args_handler.args.chunk_plan_drift:
+                reason = 'the table row count drifted %.1f%%' % drift
+
+        if verbose:
+            sys.stdout.write('--%s: %s chunk plan: %s, Built: %s%s\n' % (
+                datetime.now(), ('Rebuilding' if reason else 'Reusing'), plan_file, plan.get('built')
+                , (', %s' % reason if reason else '')))
+        return (None if reason else plan)
+
+    @staticmethod
+    def write_chunk_plan(plan_file, plan):
+        """Write the chunk plan, the plan is replaced in one step so it is never
+        left partially written."""
+        import json, tempfile
+        (fd, tmp_file) = tempfile.mkstemp(prefix='.chunk_plan.', dir=(os.path.dirname(plan_file) or '.'))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(plan, f, indent=1)
+        if Common.is_windows and os.path.exists(plan_file):
+            os.remove(plan_file)
+        os.rename(tmp_file, plan_file)
+
+    def execute_chunk(self, chunk):
+        """Run the DML of a chunk in a transaction, a failed chunk is rolled back
+        and run again up to --chunk_retries times."""
+        args = self.args_handler.args
+        sql = 'BEGIN;\n%s;\nCOMMIT;' % chunk['dml']
+        # the rows of an estimated chunk are read from the DML's command tag
+        options = (DBConnect.ybsql_default_options.replace('-q ', '')
+            if chunk.get('estimated') else DBConnect.ybsql_default_options)
+        start_ts = time.time()
+        for attempt in range(1, args.chunk_retries + 2):
+            if attempt > 1:
+                time.sleep(min(10 * 2 ** (attempt - 2), 300))
+            chunk['cmd_result'] = self.db_conn.ybsql_query(sql, options=options)
+            chunk['attempts'] = attempt
+            if chunk['cmd_result'].exit_code == 0:
+                break
+        chunk['duration'] = time.time() - start_ts
+        tags = self.dml_tag_line.findall(chunk['cmd_result'].stdout)
+        chunk['done_rows'] = (int(tags[-1]) if tags and chunk['cmd_result'].exit_code == 0 else None)
+        return chunk
+
+    def execute_chunks(self, chunks, totals, add_null_chunk):
+        """Run the chunk DMLs on a pool of --parallel_sessions sessions, the chunks
+        are started in chunk order.  After a chunk has failed all its retries no
+        new chunks are started.
+
+        The running total check is the proc's check of the rows of the chunks
+        run against the rows of the table, only the chunks that succeeded are
+        counted.  The rows of estimated chunks are not known before they are
+        run, the rows their DMLs report are summed and checked against the
+        catalog row count of the table, the check is not done when a
+        --table_where_clause filters the rows or the NULL rows have no chunk.
+
+        :return: a CmdResult of the summary of the run
+        """
+        args = self.args_handler.args
+        start_ts = time.time()
+        failed = []
+        running_total = 0
+        started = {'chunks': 0, 'estimated': False}
+
+        def start_chunks():
+            for chunk in chunks:
+                if chunk.get('estimated'):
+                    started['estimated'] = True
+                    chunk['dml'] = self.chunk_dml(args.dml, chunk)
+                started['chunks'] += 1
+                yield chunk
+
+        for chunk in Common.run_threaded(self.execute_chunk, start_chunks(), args.parallel_sessions
+            , is_stopped=lambda: failed):
+            if chunk['cmd_result'].exit_code == 0:
+                if chunk.get('estimated'):
+                    running_total += (chunk['done_rows'] or 0)
+                    self.correct_estimate(chunk)
+                else:
+                    running_total += chunk['rows']
+            else:
+                failed.append(chunk)
+                chunk['cmd_result'].write()
+            if args.verbose_chunk_off:
+                sys.stdout.write('--%s: Chunk: %d, Rows: %s, Duration: %s, Attempts: %d, %s\n' % (
+                    datetime.now(), chunk['chunk']
+                    , (('%d, Estimated Rows: %d' % (chunk['done_rows'], chunk['rows']))
+                        if chunk.get('estimated') and chunk['done_rows'] is not None
+                        else chunk['rows'])
+                    , timedelta(seconds=int(round(chunk['duration']))), chunk['attempts']
+                    , Text.color('Failed', fg='red') if chunk['cmd_result'].exit_code else 'Completed'))
+            if args.print_chunk_dml:
+                sys.stdout.write('%s;\n' % chunk['dml'])
+            sys.stdout.flush()
+        (chunk_ct, estimated) = (started['chunks'], started['estimated'])
+
+        exit_code = (failed[0]['cmd_result'].exit_code if failed else 0)
+        if not failed and args.post_sql:
+            cmd_result = self.db_conn.ybsql_query(args.post_sql)
+            if cmd_result.exit_code:
+                cmd_result.write()
+                exit_code = cmd_result.exit_code
+
+        total_rows = totals.get('Total Rows', 0)
+        null_rows = totals.get('IS NULL Rows', 0)
+        expected_rows = (total_rows if add_null_chunk else total_rows - null_rows)
+        if estimated and (not add_null_chunk or args.table_where_clause.strip().upper() != 'TRUE'):
+            expected_rows = None
+        stdout = ''
+        if args.verbose_chunk_off:
+            stdout = ('--Total Rows         : %d\n'
+                '--IS NULL Rows       : %d\n'
+                '--Running total check: %s\n'
+                '--Duration           : %s\n'
+                '--Total Chunks       : %d\n'
+                '--Failed Chunks      : %d\n'
+                '--Sessions           : %d\n') % (
+                total_rows, null_rows
+                , ('not checked' if expected_rows is None
+                    else 'PASSED' if expected_rows == running_total and not failed else 'FAILED')
+                , timedelta(seconds=int(round(time.time() - start_ts)))
+                , chunk_ct, len(failed), args.parallel_sessions)
+        return CmdResult(stdout=stdout, exit_code=exit_code)
+
 class UtilArgParser(argparse.ArgumentParser):
     @staticmethod
     def error(message):
@@ -2312,6 +5018,8 @@ convert_arg_line_to_args.arg_ct = 0
 # Standalone tests
 # Example: yb_common.py -h YB14 -U denav -D denav
 if __name__ == "__main__":
+    import platform, pprint
+
     class test_util(Util):
         config = {
             'description': 'User Usage Report.'
@@ -11,7 +11,6 @@ OPTIONS:
 Output:
       SQL Script to perform table/s distribution converstion.
 """
-import copy
 import re
 
 from yb_common import Common, Util
@@ -52,7 +51,7 @@ class convert_table_to_dist_replicate(Util):
     def execute(self):
         self.db_filter_args.schema_set_all_if_none()
 
-        ddl = self.table_ddl(self.db_conn, self.args_handler)
+        ddl = self.table_ddl()
 
         distribute = ('random' if self.args_handler.args.distribute == 'RANDOM' else 'replicated')
 
@@ -134,21 +133,12 @@ COMMIT;\n""".format(
         else:
             return(sql_query)
 
-    def table_ddl(self, db_conn, in_args_handler):
-        args_handler = copy.deepcopy(in_args_handler)
-        db_conn = copy.deepcopy(db_conn)
-
-        ddlo = ddl_object(db_conn=db_conn, args_handler=args_handler)
-
-        ddlo.init_config('table')
-        args_handler.args.template        = '{ddl}'
-        args_handler.args.with_schema     = False
-        args_handler.args.with_db         = True
-        args_handler.args.exec_output     = False
-        args_handler.args.new_schema_name = None
-        args_handler.args.new_db_name     = None
-
-        return(ddlo.execute())
+    def table_ddl(self):
+        # the DDL of the tables matching the same filters
+        return ddl_object.run(
+            ['--output_template', '{ddl}', '--with_db']
+                + self.db_filter_args.optional_args_multi_to_args(['owner', 'schema', 'table'])
+            , self.db_conn, object_type='table').stdout
 
 def main():
     ctdr = convert_table_to_dist_replicate()
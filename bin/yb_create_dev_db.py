@@ -16,6 +16,9 @@ Output:
 import re
 
 from yb_common import Common, Util
+from yb_ddl_object import ddl_object
+from yb_get_table_names import get_table_names
+from yb_get_view_names import get_view_names
 
 class CreateDevDB(Util):
     """Create a new development DB based on an existing DB.
@@ -41,6 +44,7 @@ class CreateDevDB(Util):
 ]"""'''}] }
     }
     dst_schemas = []
+    get_names_utils = {'table': get_table_names, 'view': get_view_names}
 
     def additional_args(self):
         args_grp = self.args_handler.args_parser.add_argument_group('create database arguments')
@@ -52,14 +56,15 @@ class CreateDevDB(Util):
         args_grp.add_argument("--exec_sql",     action="store_true", help="execute generated SQL in the target database, defaults to FALSE")
 
     def get_object_list(self, rule):
-        cmd = "'%s/yb_get_%s_names.py' %s" % (Common.util_dir_path, rule['type'], rule['filter'])
-        cmd_results = self.db_conn.ybtool_cmd(cmd)
-        cmd_results.on_error_exit()
-        src_object_paths = (cmd_results.stdout.strip()).splitlines()
+        # the yb_get_*_names and yb_ddl_* utilities are run in this process
+        #   with the same db connection
+        rows = self.get_names_utils[rule['type']].run(rule['filter'], self.db_conn).rows
 
         objects = []
-        for src_object_path in src_object_paths:
-            (db, schema, object) = Common.split(src_object_path, '.')
+        for row in rows:
+            (db, schema, object) = [Common.quote_object_paths(row[name])
+                for name in ('database', 'schema', rule['type'])]
+            src_object_path = '%s.%s.%s' % (db, schema, object)
             dst_schema = (rule['dst_schema'] if ('dst_schema' in rule) else schema)
             dst_object_path = ('{dst_schema}.{object}'.format(dst_schema = dst_schema, object = object))
             if dst_schema not in self.dst_schemas:
@@ -101,11 +106,10 @@ SELECT * FROM (
         return '\n\n'.join(sql)
 
     def get_objects(self, rule, objects):
-        dst_schema_arg = ((' --schema_name %s' % rule['dst_schema']) if ('dst_schema' in rule) else '')
-        cmd = ("'%s/yb_ddl_%s.py' %s %s --with_schema" % (Common.util_dir_path, rule['type'], dst_schema_arg, rule['filter']) )
-        cmd_results = self.db_conn.ybtool_cmd(cmd)
-        cmd_results.on_error_exit()
-        sql = cmd_results.stdout
+        dst_schema_arg = ((' --new_schema_name %s' % rule['dst_schema']) if ('dst_schema' in rule) else '')
+        sql = ddl_object.run(
+            '%s %s --with_schema' % (dst_schema_arg, rule['filter'])
+            , self.db_conn, object_type=rule['type']).stdout + '\n'
 
         if rule['type'] == 'table':
             sql += '\n\n' + self.get_object_querys(rule, 'INSERT', objects)
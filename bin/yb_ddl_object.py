@@ -105,6 +105,20 @@ ORDER BY LOWER(schema), LOWER(stored_proc)
         self.init_config(object_type)
         self.init_default(db_conn, args_handler)
 
+    @classmethod
+    def run(cls, args, db_conn, object_type=None):
+        """Run the DDL utility of the object type in the process of a calling
+        utility, see Util.run.
+
+        :param object_type: the object type; sequence, stored_proc, table or view
+        :return: a CmdResult, its stdout is the DDL, see Util.run
+        """
+        if object_type not in ('sequence', 'stored_proc', 'table', 'view'):
+            Common.error('unhandled DDL object type: %s' % object_type)
+        ddlo = cls(util_name='ddl_%s' % object_type, init_default=False)
+        ddlo.init_config(object_type)
+        return ddlo.run_in_process(args, db_conn)
+
     def additional_args(self):
         args_ddl_grp = self.args_handler.args_parser.add_argument_group('optional DDL arguments')
         args_ddl_grp.add_argument("--with_schema"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+USAGE:
+      yb_deploy_procs.py [options]
+
+PURPOSE:
+      Deploy the YbEasyCli stored procedures to a utility schema.
+
+OPTIONS:
+      See the command line help message for all options.
+      (yb_deploy_procs.py --help)
+
+Output:
+      A line for each stored procedure deployed.
+"""
+import os
+
+from yb_build_proc_manifests import build_proc_manifests
+from yb_common import Common, StoredProc, Text, Util
+
+class deploy_procs(Util):
+    """Deploy the YbEasyCli stored procedures to a utility schema.
+
+    Without a deployed proc a utility runs the stored procedure as an
+    anonymous block, the full procedure is sent, parsed and compiled on every
+    run.  A deployed proc is named with a hash of the stored procedure file, a
+    utility run with the YBEASYCLI_PROC_SCHEMA env variable set to the utility
+    schema calls the deployed proc when the hash matches the stored procedure
+    file it would run and the db user may run the proc, otherwise it falls back
+    to the anonymous block.
+
+    As every change of a stored procedure file deploys a new proc, --prune
+    drops the versions of each proc deployed from older files.
+    """
+    config = {
+        'description': 'Deploy the YbEasyCli stored procedures to a utility schema.'
+            '\n'
+            '\nnote:'
+            '\n  the deployed procs are only called when the YBEASYCLI_PROC_SCHEMA env variable'
+            '\n  is set to the utility schema and the utility connects to the same database,'
+            '\n  the procs are deployed with SECURITY INVOKER so they run with the privileges'
+            '\n  of the db user as the anonymous block does'
+        , 'optional_args_single': []
+        , 'usage_example': {
+            'cmd_line_args': '@$HOME/conn.args --proc_schema ybeasycli --grant_to PUBLIC --prune'
+            , 'file_args': [Util.conn_args_file] } }
+
+    def additional_args(self):
+        args_grp = self.args_handler.args_parser.add_argument_group('optional arguments')
+        args_grp.add_argument("--proc_schema"
+            , default=(os.environ.get(StoredProc.proc_schema_env) or 'ybeasycli')
+            , help="the schema to deploy the procs to, created if it does not exist"
+                ", defaults to the YBEASYCLI_PROC_SCHEMA env variable or ybeasycli")
+        args_grp.add_argument("--procs", nargs="+", metavar="PROC"
+            , help="stored procedures to deploy, like 'sysviews_yb5/table_info_p'"
+                ", defaults to all the stored procedures for the database version")
+        args_grp.add_argument("--grant_to", metavar="USER_OR_ROLE"
+            , help="user or role granted EXECUTE on the deployed procs")
+        args_grp.add_argument("--redeploy", action="store_true"
+            , help="deploy the procs even if the same version is already deployed")
+        args_grp.add_argument("--prune", action="store_true"
+            , help="drop the versions of the deployed procs that were deployed from older"
+                " stored procedure files")
+
+    def additional_args_process(self):
+        if not StoredProc.deployed_proc_schema_is_valid(self.args_handler.args.proc_schema):
+            Common.error('invalid --proc_schema, the schema name must be lower case: %s'
+                % self.args_handler.args.proc_schema)
+
+    def execute(self):
+        args = self.args_handler.args
+        proc_names = (args.procs if args.procs
+            else build_proc_manifests.get_proc_names(
+                ['.', 'sysviews_yb%d' % (4 if self.db_conn.ybdb['version_major'] < 5 else 5)]))
+
+        cmd_result = self.db_conn.ybsql_query('CREATE SCHEMA IF NOT EXISTS %s;' % args.proc_schema)
+        cmd_result.on_error_exit()
+
+        self.failed_ct = 0
+        deployed_ct = 0
+        pruned_ct = 0
+        for proc_name in proc_names:
+            if not StoredProc.proc_file_exists(proc_name):
+                Common.error("Stored proc '%s' file not found." % proc_name)
+            if not build_proc_manifests.has_return(proc_name):
+                # like yb_build_proc_manifests, a proc without a RETURN isn't run by the utilities
+                print('%s: %s' % (Text.color('Skipped', fg='yellow'), proc_name))
+                continue
+            try:
+                sp = StoredProc(proc_name, self.db_conn)
+            except SystemExit:
+                # the parse error is printed by Common.error
+                self.failed_ct += 1
+                print('%s: %s' % (Text.color('Failed', fg='red'), proc_name))
+                continue
+
+            if not args.redeploy and sp.deployed_proc(args.proc_schema):
+                print('%s: %s' % (Text.color('Deployed', fg='cyan'), sp.deployed_names(args.proc_schema)[0]))
+            else:
+                cmd_result = self.db_conn.ybsql_query(sp.deploy_sql(args.proc_schema, args.grant_to))
+                if cmd_result.exit_code == 0:
+                    deployed_ct += 1
+                    print('%s: %s' % (Text.color('Deployed', fg='green'), sp.deployed_names(args.proc_schema)[0]))
+                else:
+                    self.failed_ct += 1
+                    print('%s: %s' % (Text.color('Failed', fg='red'), proc_name))
+                    cmd_result.write()
+                    continue
+
+            if args.prune:
+                pruned_ct += self.prune(sp)
+
+        print('%s: %d, %s: %d%s' % (
+            Text.color('Procs deployed', style='bold'), deployed_ct
+            , Text.color('Failed', style='bold'), self.failed_ct
+            , (', %s: %d' % (Text.color('Pruned', style='bold'), pruned_ct)) if args.prune else ''))
+        print('--set the %s env variable to %s to run the deployed procs'
+            % (StoredProc.proc_schema_env, args.proc_schema))
+
+    def prune(self, sp):
+        """Drop the versions of the deployed proc deployed from older stored
+        procedure files.
+
+        :return: the count of dropped procs and setof tables
+        """
+        old_versions = sp.deployed_old_versions(self.args_handler.args.proc_schema)
+        if not old_versions:
+            return 0
+
+        # a setof table is dropped with CASCADE, like deploy_sql drops it
+        drop_sql = '\n'.join(['DROP %s %s%s;' % (object_type, object_name
+            , (' CASCADE' if object_type == 'TABLE' else '')) for (object_type, object_name) in old_versions])
+        cmd_result = self.db_conn.ybsql_query('BEGIN;\n%s\nCOMMIT;' % drop_sql)
+        if cmd_result.exit_code:
+            self.failed_ct += 1
+            print('%s: %s' % (Text.color('Failed', fg='red'), 'pruning %s' % sp.proc_name))
+            cmd_result.write()
+            return 0
+
+        for (object_type, object_name) in old_versions:
+            print('%s: %s' % (Text.color('Pruned', fg='yellow'), object_name))
+        return len(old_versions)
+
+def main():
+    dp = deploy_procs()
+    dp.execute()
+    exit(1 if dp.failed_ct else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ OPTIONS:
 Output:
       The column names and column attributes for filtered columns.
 """
-from yb_common import StoredProc, Util
+from yb_common import CmdResult, StoredProc, Util
 
 class find_columns(Util):
     """Issue the ybsql command used to list the column names comprising an object.
@@ -29,32 +29,50 @@ class find_columns(Util):
         , 'output_tmplt_vars': ['column_path', 'table_path', 'schema_path', 'column', 'ordinal', 'data_type', 'table_ordinal', 'schema', 'database', 'owner']
         , 'output_tmplt_default': '-- Table: {table_path}, Column: {column}, Table Ordinal: {table_ordinal}, Data Type: {data_type}'
         , 'db_filter_args':
-            {'owner':'tableowner', 'schema':'schemaname', 'table':'tablename', 'column':'columnname', 'datatype':'datatype'} }
+            {'owner':'tableowner', 'schema':'schemaname', 'table':'tablename', 'column':'columnname', 'datatype':'datatype'}
+        , 'catalog_snapshot_filter_args':
+            {'owner':'owner', 'schema':'schema', 'table':'object', 'column':'name', 'datatype':'UPPER(data_type)'} }
 
     def execute(self):
         self.db_filter_args.schema_set_all_if_none()
 
+        if self.catalog_snapshot:
+            return self.execute_snapshot()
+
         self.cmd_results = StoredProc('yb_find_columns_p', self.db_conn).call_proc_as_anonymous_block(
                 args = {
                     'a_column_filter_clause' : self.db_filter_sql() } )
 
-        rows_as_dict_str = ''
-        self.col_ct = 0
+        rows = []
         if len(self.cmd_results.stdout.strip()):
             for line in self.cmd_results.stdout.strip().split('\n'):
-                self.col_ct += 1
-                row = line.split('|')
-                rows_as_dict_str += ( ('' if self.col_ct == 1 else ', ') + '{'
-                    + ("'ordinal': %d" % self.col_ct)
-                    + (', "table_ordinal": ""\" %s ""\" ' % row[0])
-                    + (', "database": ""\" %s ""\" '      % row[1])
-                    + (', "schema": ""\" %s ""\" '        % row[2])
-                    + (', "table": ""\" %s ""\" '         % row[3])
-                    + (', "column": ""\" %s ""\" '        % row[4])
-                    + (', "data_type": ""\" %s ""\" '     % row[5])
-                    + (', "owner": ""\" %s ""\" '         % row[6]) + '}\n' )
-
-        return self.apply_template(rows_as_dict_str, exec_output=self.args_handler.args.exec_output)
+                row = dict(zip(
+                    ['table_ordinal', 'database', 'schema', 'table', 'column', 'data_type', 'owner']
+                    , [value.strip() for value in line.split('|')] ))
+                row['ordinal'] = len(rows) + 1
+                rows.append(row)
+        self.col_ct = len(rows)
+
+        return self.apply_template_rows(rows, exec_output=self.args_handler.args.exec_output)
+
+    def execute_snapshot(self):
+        """Find the columns in the --catalog_snapshot, like yb_find_columns_p finds
+        them in the connected database."""
+        self.cmd_results = CmdResult()
+        rows = list(self.catalog_snapshot.rows("""
+SELECT ordinal, database, schema, object, name, UPPER(data_type), owner
+FROM catalog_column
+WHERE
+    object_type = 'table'
+    AND database = '{database}'
+    AND {filter_clause}
+ORDER BY UPPER(database), UPPER(schema), UPPER(object), ordinal""".format(
+                database=(self.args_handler.args.database or self.catalog_snapshot.info.get('database'))
+                , filter_clause=self.snapshot_filter_sql())
+            , ['table_ordinal', 'database', 'schema', 'table', 'column', 'data_type', 'owner']))
+        self.col_ct = len(rows)
+
+        return self.apply_template_rows(rows)
 
 def main():
     fcs = find_columns()
@@ -28,11 +28,23 @@ class get_column_names(Util):
         , 'default_args': {'template': '<raw>', 'exec_output': False}
         , 'output_tmplt_vars': ['column_path', 'object_path', 'schema_path', 'column', 'object', 'schema', 'database', 'owner']
         , 'output_tmplt_default': '{column_path}'
-        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'object':'o.name', 'column':'c.name'} }
+        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'object':'o.name', 'column':'c.name'}
+        , 'catalog_snapshot_filter_args': {'owner':'owner', 'database':'database', 'schema':'schema', 'object':'object', 'column':'name'} }
 
-    def execute(self):
+    def execute(self, out=None):
         self.db_filter_args.schema_set_all_if_none()
 
+        row_fields = ['owner', 'database', 'schema', 'object', 'column']
+
+        if self.catalog_snapshot:
+            return self.snapshot_query_and_apply_template("""
+SELECT owner, database, schema, object, name
+FROM catalog_column
+WHERE {filter_clause}
+ORDER BY LOWER(database), LOWER(schema), LOWER(object), ordinal""", row_fields, out=out)
+
+        row_sql = self.template_rows_sql(['u.name', 'd.name', 's.name', 'o.name', 'c.name'])
+
         sql_query = ''
         for db in self.get_dbs():
             if not(self.db_conn.ybdb['is_super_user']):
@@ -47,12 +59,7 @@ obj AS (
 , data AS (
     SELECT
         ROW_NUMBER() OVER (ORDER BY LOWER(d.name), LOWER(s.name), LOWER(o.name), object_ordinal) AS ordinal
-        , '{{'
-        || '"owner":""\" '     || NVL(u.name, '<NULL>') || ' ""\"'
-        || ',"database":""\" ' || NVL(d.name, '<NULL>') || ' ""\"'
-        || ',"schema":""\" '   || NVL(s.name, '<NULL>') || ' ""\"'
-        || ',"object":""\" '   || NVL(o.name, '<NULL>') || ' ""\"'
-        || ',"column":""\" '   || NVL(c.name, '<NULL>') || ' ""\"' || '}}, ' AS data
+        , {row_sql} AS data
     FROM
         obj AS o
         LEFT JOIN sys.schema AS s
@@ -69,23 +76,16 @@ obj AS (
         AND {filter_clause}
 )
 SELECT data FROM data ORDER BY ordinal;\n""".format(
-                filter_clause = self.db_filter_sql() )
-
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
-        self.cmd_result.on_error_exit()
-
-        data = ''
-        ordinal = 1
-        for line in self.cmd_result.stdout.splitlines():
-            data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
-            ordinal += 1
+                row_sql = row_sql
+                , filter_clause = self.db_filter_sql() )
 
-        return self.exec_query_and_apply_template(sql_query, exec_output=self.args_handler.args.exec_output)
+        return self.query_and_apply_template(sql_query, row_fields
+            , exec_output=self.args_handler.args.exec_output, out=out)
 
 def main():
     gcns = get_column_names()
     
-    sys.stdout.write(gcns.execute())
+    gcns.execute(out=sys.stdout)
 
     exit(gcns.cmd_result.exit_code)
 
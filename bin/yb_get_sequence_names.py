@@ -28,9 +28,12 @@ class get_sequence_names(Util):
         , 'output_tmplt_default': '{sequence_path}'
         , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'sequence':'seq.name'} }
 
-    def execute(self):
+    def execute(self, out=None):
         self.db_filter_args.schema_set_all_if_none()
 
+        row_fields = ['owner', 'database', 'schema', 'sequence']
+        row_sql = self.template_rows_sql(['u.name', 'd.name', 's.name', 'seq.name'])
+
         sql_query = ''
         for db in self.get_dbs():
             sql_query += '\\c %s' % db
@@ -48,11 +51,7 @@ seq AS (
 , data AS (
     SELECT
         ROW_NUMBER() OVER (ORDER BY LOWER(d.name), LOWER(s.name), LOWER(seq.name)) AS ordinal
-        , '{{'
-        || '"owner":""\" '     || NVL(u.name, '<NULL>')   || ' ""\"'
-        || ',"database":""\" ' || NVL(d.name, '<NULL>')   || ' ""\"'
-        || ',"schema":""\" '   || NVL(s.name, '<NULL>')   || ' ""\"'
-        || ',"sequence":""\" ' || NVL(seq.name, '<NULL>') || ' ""\"' || '}}, ' AS data
+        , {row_sql} AS data
     FROM
         seq
         LEFT JOIN sys.schema AS s
@@ -66,24 +65,16 @@ seq AS (
         AND {filter_clause}
 )
 SELECT data FROM data ORDER BY ordinal;\n""".format(
-                filter_clause = self.db_filter_sql() )
-
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
-        self.cmd_result.on_error_exit()
-
-        data = ''
-        ordinal = 1
-        for line in self.cmd_result.stdout.splitlines():
-            data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
-            ordinal += 1
-
-        return self.apply_template(data, exec_output=self.args_handler.args.exec_output)
+                row_sql = row_sql
+                , filter_clause = self.db_filter_sql() )
 
+        return self.query_and_apply_template(sql_query, row_fields
+            , exec_output=self.args_handler.args.exec_output, out=out)
 
 def main():
     gsn = get_sequence_names()
     
-    sys.stdout.write(gsn.execute())
+    gsn.execute(out=sys.stdout)
 
     exit(gsn.cmd_result.exit_code)
 
@@ -31,9 +31,12 @@ class get_stored_proc_names(Util):
         , 'output_tmplt_default': '{stored_proc_path}'
         , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'stored_proc':'sp.name'} }
 
-    def execute(self):
+    def execute(self, out=None):
         self.db_filter_args.schema_set_all_if_none()
 
+        row_fields = ['owner', 'database', 'schema', 'stored_proc']
+        row_sql = self.template_rows_sql(['u.name', 'd.name', 's.name', 'sp.name'])
+
         sql_query = ''
         for db in self.get_dbs():
             sql_query += '\\c %s' % db
@@ -61,11 +64,7 @@ sp AS (
 , data AS (
     SELECT
         ROW_NUMBER() OVER (ORDER BY LOWER(d.name), LOWER(s.name), LOWER(sp.name)) AS ordinal
-        , '{{'
-        || '"owner":""\" '        || NVL(u.name, '<NULL>')  || ' ""\"'
-        || ',"database":""\" '    || NVL(d.name, '<NULL>')  || ' ""\"'
-        || ',"schema":""\" '      || NVL(s.name, '<NULL>')  || ' ""\"'
-        || ',"stored_proc":""\" ' || NVL(sp.name, '<NULL>') || ' ""\"' || '}}, ' AS data
+        , {row_sql} AS data
     FROM
         sp
         CROSS JOIN d
@@ -78,23 +77,16 @@ sp AS (
         AND {filter_clause}
 )
 SELECT data FROM data ORDER BY ordinal;\n""".format(
-                filter_clause = self.db_filter_sql() )
-
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
-        self.cmd_result.on_error_exit()
-
-        data = ''
-        ordinal = 1
-        for line in self.cmd_result.stdout.splitlines():
-            data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
-            ordinal += 1
+                row_sql = row_sql
+                , filter_clause = self.db_filter_sql() )
 
-        return self.apply_template(data, exec_output=self.args_handler.args.exec_output)
+        return self.query_and_apply_template(sql_query, row_fields
+            , exec_output=self.args_handler.args.exec_output, out=out)
 
 def main():
     gspn = get_stored_proc_names()
 
-    sys.stdout.write(gspn.execute())
+    gspn.execute(out=sys.stdout)
 
     exit(gspn.cmd_result.exit_code)
 
@@ -100,7 +100,7 @@ WHERE s.nspname IN ('sys', 'pg_catalog')
             , file_name  = tmp_dat_path)
         report = Report(self.args_handler, self.db_conn, self.config['report_columns']
             , pre_sql  = temp_table_script
-            , query    = 'select * from {tmp}'.format(tmp=temp_table_name)).build(is_source_cstore = True)
+            , query    = 'select * from {tmp}'.format(tmp=temp_table_name)).build(is_source_cstore = True, stream = True)
         os.remove(tmp_dat_path)
         return report
 
@@ -17,7 +17,7 @@ Output:
 """
 import sys
 
-from yb_common import Common, Util
+from yb_common import CmdResult, Common, Util
 
 class get_table_distribution_key(Util):
     """Issue the ybsql command used to identify the column name(s) on which
@@ -30,9 +30,13 @@ class get_table_distribution_key(Util):
         , 'usage_example': {
             'cmd_line_args': "@$HOME/conn.args --schema Prod --table sales --"
             , 'file_args': [Util.conn_args_file] }
-        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'table':'t.name'} }
+        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'table':'t.name'}
+        , 'catalog_snapshot_filter_args': {'owner':'owner', 'database':'database', 'schema':'schema', 'table':'name'} }
 
     def execute(self):
+        if self.catalog_snapshot:
+            return self.execute_snapshot()
+
         sql_query = ''
         if not(self.db_conn.ybdb['is_super_user']) and self.args_handler.args.database:
             sql_query = '\\c %s' % self.args_handler.args.database
@@ -63,6 +67,20 @@ WHERE
 
         self.cmd_results = self.db_conn.ybsql_query(sql_query)
 
+    def execute_snapshot(self):
+        if not(self.args_handler.args.database):
+            self.args_handler.args.database = self.catalog_snapshot.info.get('database')
+        if not(self.args_handler.args.schema):
+            self.args_handler.args.schema = self.catalog_snapshot.info.get('schema')
+
+        rows = self.catalog_snapshot.rows("""
+SELECT distribution
+FROM catalog_object
+WHERE
+    type = 'table'
+    AND {filter_clause}""".format(filter_clause=self.snapshot_filter_sql()), ['distribution'])
+        self.cmd_results = CmdResult(''.join(['%s\n' % row['distribution'] for row in rows]))
+
     def execute2(self):
         sql_query = """
 WITH
@@ -26,11 +26,25 @@ class get_table_names(Util):
         , 'default_args': {'template': '{table_path}', 'exec_output': False}
         , 'output_tmplt_vars': ['table_path', 'schema_path', 'table', 'schema', 'database', 'owner']
         , 'output_tmplt_default': '{table_path}'
-        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'table':'t.name'} }
+        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'table':'t.name'}
+        , 'catalog_snapshot_filter_args': {'owner':'owner', 'database':'database', 'schema':'schema', 'table':'name'} }
 
-    def execute(self):
+    def execute(self, out=None):
         self.db_filter_args.schema_set_all_if_none()
 
+        row_fields = ['owner', 'database', 'schema', 'table']
+
+        if self.catalog_snapshot:
+            return self.snapshot_query_and_apply_template("""
+SELECT owner, database, schema, name
+FROM catalog_object
+WHERE
+    type = 'table'
+    AND {filter_clause}
+ORDER BY LOWER(database), LOWER(schema), LOWER(name)""", row_fields, out=out)
+
+        row_sql = self.template_rows_sql(['u.name', 'd.name', 's.name', 't.name'])
+
         sql_query = ''
         dbs = [None]
         # super users get results for all DBs from sys.table
@@ -48,11 +62,7 @@ WITH
 data as (
     SELECT
         ROW_NUMBER() OVER (ORDER BY LOWER(d.name), LOWER(s.name), LOWER(t.name)) AS ordinal
-        , '{{'
-        || '"owner":""\" '     || NVL(u.name, '<NULL>') || ' ""\"'
-        || ',"database":""\" ' || NVL(d.name, '<NULL>') || ' ""\"'
-        || ',"schema":""\" '   || NVL(s.name, '<NULL>') || ' ""\"'
-        || ',"table":""\" '    || NVL(t.name, '<NULL>') || ' ""\"' || '}}, ' AS data
+        , {row_sql} AS data
     FROM
         sys.table AS t
         LEFT JOIN sys.schema AS s
@@ -66,23 +76,16 @@ data as (
         AND {filter_clause}
 )
 SELECT data FROM data ORDER BY ordinal;\n""".format(
-                filter_clause = self.db_filter_sql() )
-
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
-        self.cmd_result.on_error_exit()
-
-        data = ''
-        ordinal = 1
-        for line in self.cmd_result.stdout.splitlines():
-            data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
-            ordinal += 1
+                row_sql = row_sql
+                , filter_clause = self.db_filter_sql() )
 
-        return self.apply_template(data, exec_output=self.args_handler.args.exec_output)
+        return self.query_and_apply_template(sql_query, row_fields
+            , exec_output=self.args_handler.args.exec_output, out=out)
 
 def main():
     gtns = get_table_names()
     
-    sys.stdout.write(gtns.execute())
+    gtns.execute(out=sys.stdout)
 
     exit(gtns.cmd_result.exit_code)
 
@@ -26,11 +26,25 @@ class get_view_names(Util):
         , 'default_args': {'template': '<raw>', 'exec_output': False}
         , 'output_tmplt_vars': ['view_path', 'schema_path', 'view', 'schema', 'database', 'owner']
         , 'output_tmplt_default': '{view_path}'
-        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'view':'v.name'} }
+        , 'db_filter_args': {'owner':'u.name', 'database':'d.name', 'schema':'s.name', 'view':'v.name'}
+        , 'catalog_snapshot_filter_args': {'owner':'owner', 'database':'database', 'schema':'schema', 'view':'name'} }
 
-    def execute(self):
+    def execute(self, out=None):
         self.db_filter_args.schema_set_all_if_none()
  
+        row_fields = ['owner', 'database', 'schema', 'view']
+
+        if self.catalog_snapshot:
+            return self.snapshot_query_and_apply_template("""
+SELECT owner, database, schema, name
+FROM catalog_object
+WHERE
+    type = 'view'
+    AND {filter_clause}
+ORDER BY LOWER(database), LOWER(schema), LOWER(name)""", row_fields, out=out)
+
+        row_sql = self.template_rows_sql(['u.name', 'd.name', 's.name', 'v.name'])
+
         sql_query = ''
         dbs = [None]
         # super users get results for all DBs from sys.view
@@ -48,11 +62,7 @@ WITH
 data as (
     SELECT
         ROW_NUMBER() OVER (ORDER BY LOWER(d.name), LOWER(s.name), LOWER(v.name)) AS ordinal
-        , '{{'
-        || '"owner":""\" '     || NVL(u.name, '<NULL>') || ' ""\"'
-        || ',"database":""\" ' || NVL(d.name, '<NULL>') || ' ""\"'
-        || ',"schema":""\" '   || NVL(s.name, '<NULL>') || ' ""\"'
-        || ',"view":""\" '     || NVL(v.name, '<NULL>') || ' ""\"' || '}}, ' AS data
+        , {row_sql} AS data
     FROM
         sys.view AS v
         LEFT JOIN sys.schema AS s
@@ -66,23 +76,16 @@ data as (
         AND {filter_clause}
 )
 SELECT data FROM data ORDER BY ordinal;\n""".format(
-                filter_clause = self.db_filter_sql() )
-
-        self.cmd_result = self.db_conn.ybsql_query(sql_query)
-        self.cmd_result.on_error_exit()
-
-        data = ''
-        ordinal = 1
-        for line in self.cmd_result.stdout.splitlines():
-            data += line.replace('{', '{"ordinal":""\" %d ""\", ' % ordinal) + '\n'
-            ordinal += 1
+                row_sql = row_sql
+                , filter_clause = self.db_filter_sql() )
 
-        return self.apply_template(data, exec_output=self.args_handler.args.exec_output)
+        return self.query_and_apply_template(sql_query, row_fields
+            , exec_output=self.args_handler.args.exec_output, out=out)
 
 def main():
     gvns = get_view_names()
 
-    sys.stdout.write(gvns.execute())
+    gvns.execute(out=sys.stdout)
 
     exit(gvns.cmd_result.exit_code)
 
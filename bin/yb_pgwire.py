@@ -0,0 +1,775 @@
+#!/usr/bin/env python3
+"""
+A PostgreSQL frontend/backend(wire) protocol client used as a DBConnect query
+backend, it runs SQL from Python without forking a ybsql process per query.
+
+The module provides:
+    - PGWireConnection: a protocol version 3 connection supporting SSL,
+      cleartext, MD5 and SCRAM-SHA-256 authentication, simple queries and
+      server-side cursors, rows are returned typed
+    - YbsqlScript: runs a ybsql script on a PGWireConnection with the same
+      output as 'ybsql -A -q -t -v ON_ERROR_STOP=1 -X', including the ybsql
+      meta-commands used by the utilities; \\echo, \\qecho, \\pset, \\t,
+      \\c, \\connect, \\i and \\include
+
+This module has no dependencies beyond the python standard library.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import re
+import socket
+import ssl
+import struct
+from datetime import datetime
+from decimal import Decimal
+
+class PGWireError(Exception):
+    """An ErrorResponse received from the database server, or a failure to
+    connect to the database server.
+    """
+    def __init__(self, fields=None, message=None):
+        self.fields = fields if fields else {}
+        # an error raised by the client, not received from the server
+        self.is_client_error = (message is not None)
+        if message:
+            self.fields.setdefault('S', 'ERROR')
+            self.fields.setdefault('M', message)
+        self.severity = self.fields.get('S', 'ERROR')
+        self.sqlstate = self.fields.get('C')
+        self.message = self.fields.get('M', '')
+        super(PGWireError, self).__init__(self.message)
+
+    def ybsql_text(self, query=None):
+        """The error as ybsql writes it to stderr."""
+        if self.is_client_error:
+            return '%s\n' % self.message
+        return format_message(self.fields, query)
+
+def format_message(fields, query=None):
+    """Format an ErrorResponse or NoticeResponse as ybsql writes it to stderr."""
+    lines = ['%s:  %s' % (fields.get('S', 'ERROR'), fields.get('M', ''))]
+    if query is not None and 'P' in fields:
+        lines.extend(error_position_lines(query, int(fields['P'])))
+    labels = [('D', 'DETAIL'), ('H', 'HINT')]
+    if fields.get('S') in ('ERROR', 'FATAL', 'PANIC'):
+        labels.append(('W', 'CONTEXT'))
+    for (field, label) in labels:
+        if field in fields:
+            lines.append('%s:  %s' % (label, fields[field]))
+    return '\n'.join(lines) + '\n'
+
+def error_position_lines(query, position, display_size=60, min_right_cut=10):
+    """The 'LINE n:' and caret lines that ybsql writes under an error that has
+    a statement position, long lines are truncated around the position.
+    """
+    query = query.replace('\t', ' ')
+    loc = min(max(position - 1, 0), len(query))
+    line_no = query.count('\n', 0, loc) + 1
+    ibeg = query.rfind('\n', 0, loc) + 1
+    iend = query.find('\n', loc)
+    iend = len(query) if iend == -1 else iend
+    if iend > ibeg and query[iend - 1] == '\r':
+        iend -= 1
+
+    beg_trunc = end_trunc = False
+    if iend - ibeg > display_size:
+        if ibeg + display_size >= loc + min_right_cut:
+            iend = ibeg + display_size
+            end_trunc = True
+        else:
+            if loc + min_right_cut < iend:
+                iend = loc + min_right_cut
+                end_trunc = True
+            if iend - ibeg > display_size:
+                ibeg = iend - display_size
+                beg_trunc = True
+
+    prefix = 'LINE %d: %s' % (line_no, '...' if beg_trunc else '')
+    return [
+        '%s%s%s' % (prefix, query[ibeg:iend], '...' if end_trunc else '')
+        , '%s^' % (' ' * (len(prefix) + loc - ibeg))]
+
+class PGWireResultSet(object):
+    """The rows returned by one SQL statement."""
+    def __init__(self, columns, type_oids, rows, command_tag):
+        self.columns = columns
+        self.type_oids = type_oids
+        self.rows = rows                 # rows of text values, None for NULL
+        self.command_tag = command_tag
+
+    def typed_rows(self):
+        converters = [type_converter(oid) for oid in self.type_oids]
+        return [tuple(
+                (None if value is None else converter(value))
+                    for (converter, value) in zip(converters, row))
+            for row in self.rows]
+
+def parse_bool(value):
+    return value == 't'
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return value # like: infinity or BC dates
+
+def parse_timestamp(value):
+    try:
+        return datetime.strptime(value, ('%Y-%m-%d %H:%M:%S.%f' if '.' in value else '%Y-%m-%d %H:%M:%S'))
+    except ValueError:
+        return value
+
+# text to python conversion by type OID
+type_converters = {
+    16: parse_bool                           # BOOLEAN
+    , 20: int, 21: int, 23: int, 26: int     # BIGINT, SMALLINT, INTEGER, OID
+    , 700: float, 701: float                 # REAL, DOUBLE PRECISION
+    , 1700: Decimal                          # NUMERIC
+    , 1082: parse_date                       # DATE
+    , 1114: parse_timestamp }                # TIMESTAMP
+
+def type_converter(type_oid):
+    return type_converters.get(type_oid, str)
+
+class PGWireConnection(object):
+    """A database connection speaking the PostgreSQL wire protocol version 3."""
+    protocol_version = 196608 # 3.0
+    ssl_request_code = 80877103
+
+    def __init__(self, host=None, port=None, user=None, database=None, password=None
+        , connect_timeout=10, sslmode=None, application_name='YbEasyCli'):
+        """Connect and authenticate to the database.
+
+        :param host: database server host, a unix domain socket is used when None
+        :param port: database server port, defaults to 5432
+        :param user: database user
+        :param database: database to connect to, defaults to the user name
+        :param password: user password
+        :param connect_timeout: seconds to wait while connecting
+        :param sslmode: disable, prefer or require, defaults to the YBSSLMODE or
+            PGSSLMODE env variable, otherwise prefer
+        :raises PGWireError: on a failed connection or authentication
+        """
+        self.host = host
+        self.port = int(port) if port else 5432
+        self.user = user
+        self.database = database if database else user
+        self.password = password
+        self.connect_timeout = connect_timeout
+        self.sslmode = (sslmode
+            or os.environ.get('YBSSLMODE')
+            or os.environ.get('PGSSLMODE')
+            or 'prefer')
+        self.application_name = application_name
+        self.server_params = {}
+        self.transaction_status = 'I'
+        self.notices = []
+        self.cursor_ct = 0
+
+        self.sock = None
+        try:
+            self.connect()
+        except (socket.error, ssl.SSLError) as error:
+            self.close()
+            raise PGWireError(message='could not connect to server: %s' % error)
+
+    def connect(self):
+        unix_socket = '/tmp/.s.PGSQL.%d' % self.port
+        if not self.host and hasattr(socket, 'AF_UNIX') and os.path.exists(unix_socket):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.connect_timeout)
+            self.sock.connect(unix_socket)
+        else:
+            self.sock = socket.create_connection(
+                (self.host if self.host else 'localhost', self.port), self.connect_timeout)
+            if self.sslmode != 'disable':
+                self.ssl_negotiate()
+        self.stream = self.sock.makefile('rb')
+
+        params = [('user', self.user), ('database', self.database)
+            , ('application_name', self.application_name), ('client_encoding', 'UTF8')]
+        body = struct.pack('!i', self.protocol_version)
+        for (key, value) in params:
+            if value:
+                body += key.encode('utf-8') + b'\x00' + value.encode('utf-8') + b'\x00'
+        body += b'\x00'
+        self.sock.sendall(struct.pack('!i', len(body) + 4) + body)
+
+        self.authenticate()
+        self.wait_ready()
+        self.sock.settimeout(None)
+
+    def ssl_negotiate(self):
+        self.sock.sendall(struct.pack('!ii', 8, self.ssl_request_code))
+        response = self.sock.recv(1)
+        if response == b'S':
+            # like ybsql/libpq sslmode prefer and require, the server certificate is not verified
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            self.sock = context.wrap_socket(self.sock)
+        elif self.sslmode == 'require':
+            raise PGWireError(message='server does not support SSL, but SSL was required')
+
+    def send(self, msg_type, body=b''):
+        self.sock.sendall(msg_type + struct.pack('!i', len(body) + 4) + body)
+
+    def recv(self):
+        header = self.stream.read(5)
+        if len(header) < 5:
+            raise PGWireError(message='server closed the connection unexpectedly')
+        (msg_type, length) = struct.unpack('!ci', header)
+        body = self.stream.read(length - 4)
+        return (msg_type, body)
+
+    @staticmethod
+    def parse_fields(body):
+        fields = {}
+        for field in body.split(b'\x00'):
+            if field:
+                fields[field[0:1].decode('ascii')] = field[1:].decode('utf-8', errors='replace')
+        return fields
+
+    def authenticate(self):
+        scram = None
+        while True:
+            (msg_type, body) = self.recv()
+            if msg_type == b'E':
+                raise PGWireError(PGWireConnection.parse_fields(body))
+            elif msg_type != b'R':
+                raise PGWireError(message='unexpected message during authentication: %s' % msg_type)
+
+            code = struct.unpack('!i', body[0:4])[0]
+            if code == 0:   # AuthenticationOk
+                return
+            elif code == 3: # AuthenticationCleartextPassword
+                self.send(b'p', self.require_password() + b'\x00')
+            elif code == 5: # AuthenticationMD5Password
+                inner = hashlib.md5(self.require_password() + self.user.encode('utf-8')).hexdigest()
+                outer = hashlib.md5(inner.encode('ascii') + body[4:8]).hexdigest()
+                self.send(b'p', b'md5' + outer.encode('ascii') + b'\x00')
+            elif code == 10: # AuthenticationSASL
+                mechanisms = body[4:].split(b'\x00')
+                if b'SCRAM-SHA-256' not in mechanisms:
+                    raise PGWireError(message='unsupported SASL authentication mechanisms: %s' % mechanisms)
+                scram = ScramSha256(self.require_password())
+                client_first = scram.client_first()
+                self.send(b'p', b'SCRAM-SHA-256\x00' + struct.pack('!i', len(client_first)) + client_first)
+            elif code == 11: # AuthenticationSASLContinue
+                self.send(b'p', scram.client_final(body[4:]))
+            elif code == 12: # AuthenticationSASLFinal
+                scram.verify_server_final(body[4:])
+            else:
+                raise PGWireError(message='unsupported authentication request: %d' % code)
+
+    def require_password(self):
+        if self.password is None:
+            raise PGWireError(message='fe_sendauth: no password supplied')
+        return self.password.encode('utf-8')
+
+    def wait_ready(self):
+        """Process messages up to ReadyForQuery, an ErrorResponse is raised after
+        ReadyForQuery is received so the connection stays usable.
+        """
+        error = None
+        while True:
+            (msg_type, body) = self.recv()
+            if msg_type == b'Z':
+                self.transaction_status = body.decode('ascii')
+                if error:
+                    raise error
+                return
+            elif msg_type == b'E':
+                error = PGWireError(PGWireConnection.parse_fields(body))
+            else:
+                self.handle_async_message(msg_type, body)
+
+    def handle_async_message(self, msg_type, body):
+        if msg_type == b'S':   # ParameterStatus
+            (key, value) = body.split(b'\x00')[0:2]
+            self.server_params[key.decode('utf-8')] = value.decode('utf-8')
+        elif msg_type == b'N': # NoticeResponse
+            self.notices.append(PGWireConnection.parse_fields(body))
+        # BackendKeyData('K') and NotificationResponse('A') are not used
+
+    def execute(self, sql, copy_out=None):
+        """Run a single SQL statement with the simple query protocol.
+
+        :param sql: the SQL statement
+        :param copy_out: file like object that receives 'COPY ... TO STDOUT' data
+        :return: a list of PGWireResultSet, one for each statement in sql
+        :raises PGWireError: when the statement fails
+        """
+        self.send(b'Q', sql.encode('utf-8') + b'\x00')
+
+        result_sets = []
+        columns = type_oids = None
+        rows = []
+        error = None
+        while True:
+            (msg_type, body) = self.recv()
+            if msg_type == b'T':   # RowDescription
+                (columns, type_oids) = PGWireConnection.parse_row_description(body)
+                rows = []
+            elif msg_type == b'D': # DataRow
+                rows.append(PGWireConnection.parse_data_row(body))
+            elif msg_type == b'C': # CommandComplete
+                tag = body.rstrip(b'\x00').decode('utf-8')
+                result_sets.append(PGWireResultSet(columns, type_oids, rows, tag))
+                columns = type_oids = None
+                rows = []
+            elif msg_type == b'I': # EmptyQueryResponse
+                None
+            elif msg_type == b'E':
+                error = PGWireError(PGWireConnection.parse_fields(body))
+                error.query = sql
+            elif msg_type == b'G': # CopyInResponse
+                self.send(b'f', b'COPY FROM STDIN is not supported\x00')
+            elif msg_type == b'H': # CopyOutResponse
+                None
+            elif msg_type == b'd': # CopyData
+                if copy_out:
+                    copy_out.write(body.decode('utf-8', errors='replace'))
+            elif msg_type == b'c': # CopyDone
+                None
+            elif msg_type == b'Z':
+                self.transaction_status = body.decode('ascii')
+                if error:
+                    raise error
+                return result_sets
+            else:
+                self.handle_async_message(msg_type, body)
+
+    @staticmethod
+    def parse_row_description(body):
+        count = struct.unpack('!h', body[0:2])[0]
+        pos = 2
+        columns = []
+        type_oids = []
+        for i in range(count):
+            end = body.index(b'\x00', pos)
+            columns.append(body[pos:end].decode('utf-8'))
+            pos = end + 1
+            (table_oid, attnum, type_oid, typlen, typmod, fmt) = struct.unpack('!ihihih', body[pos:pos+18])
+            type_oids.append(type_oid)
+            pos += 18
+        return (columns, type_oids)
+
+    @staticmethod
+    def parse_data_row(body):
+        count = struct.unpack('!h', body[0:2])[0]
+        pos = 2
+        row = []
+        for i in range(count):
+            length = struct.unpack('!i', body[pos:pos+4])[0]
+            pos += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(body[pos:pos+length].decode('utf-8', errors='replace'))
+                pos += length
+        return row
+
+    def query(self, sql):
+        """Run a query and return the typed rows of the last result set."""
+        result_sets = self.execute(sql)
+        return result_sets[-1].typed_rows() if result_sets else []
+
+    def cursor(self, sql, fetch_rows=10000):
+        """Run a query with a server-side cursor and yield the typed rows in
+        batches of fetch_rows, the result set is never fully held in memory.
+
+        If no transaction is open a transaction is started for the life of the cursor.
+        """
+        self.cursor_ct += 1
+        cursor_name = 'yb_easycli_cursor_%d' % self.cursor_ct
+        own_transaction = (self.transaction_status == 'I')
+        if own_transaction:
+            self.execute('BEGIN')
+        try:
+            self.execute('DECLARE %s NO SCROLL CURSOR FOR %s' % (cursor_name, sql))
+            while True:
+                result_sets = self.execute('FETCH FORWARD %d FROM %s' % (fetch_rows, cursor_name))
+                rows = result_sets[-1].typed_rows()
+                for row in rows:
+                    yield row
+                if len(rows) < fetch_rows:
+                    break
+            self.execute('CLOSE %s' % cursor_name)
+        finally:
+            if own_transaction:
+                self.execute('ROLLBACK' if self.transaction_status == 'E' else 'COMMIT')
+
+    def is_alive(self):
+        return self.sock is not None
+
+    def close(self):
+        if self.sock:
+            try:
+                self.send(b'X')
+            except (socket.error, ssl.SSLError):
+                None
+            self.sock.close()
+            self.sock = None
+
+class ScramSha256(object):
+    """Client side of the SCRAM-SHA-256 SASL authentication exchange, RFC 5802/7677."""
+    def __init__(self, password):
+        self.password = password
+        self.client_nonce = base64.b64encode(os.urandom(18))
+
+    def client_first(self):
+        self.client_first_bare = b'n=,r=' + self.client_nonce
+        return b'n,,' + self.client_first_bare
+
+    def client_final(self, server_first):
+        attrs = dict(attr.split(b'=', 1) for attr in server_first.split(b','))
+        nonce = attrs[b'r']
+        if not nonce.startswith(self.client_nonce):
+            raise PGWireError(message='invalid SCRAM server nonce')
+        salted_password = hashlib.pbkdf2_hmac(
+            'sha256', self.password, base64.b64decode(attrs[b's']), int(attrs[b'i']))
+        client_key = hmac.new(salted_password, b'Client Key', hashlib.sha256).digest()
+        stored_key = hashlib.sha256(client_key).digest()
+        client_final_no_proof = b'c=biws,r=' + nonce
+        self.auth_message = b','.join((self.client_first_bare, server_first, client_final_no_proof))
+        client_signature = hmac.new(stored_key, self.auth_message, hashlib.sha256).digest()
+        proof = bytes(bytearray(k ^ s for (k, s) in zip(bytearray(client_key), bytearray(client_signature))))
+        self.server_key = hmac.new(salted_password, b'Server Key', hashlib.sha256).digest()
+        return client_final_no_proof + b',p=' + base64.b64encode(proof)
+
+    def verify_server_final(self, server_final):
+        attrs = dict(attr.split(b'=', 1) for attr in server_final.split(b','))
+        server_signature = hmac.new(self.server_key, self.auth_message, hashlib.sha256).digest()
+        if base64.b64decode(attrs.get(b'v', b'')) != server_signature:
+            raise PGWireError(message='invalid SCRAM server signature')
+
+def split_script(script):
+    """Split a ybsql script into SQL statements and meta-commands the same way
+    ybsql does; a ';' outside of quotes, comments and parentheses ends a
+    statement and a backslash outside of quotes starts a meta-command that
+    runs to the end of the line.
+
+    :return: list of ('sql', statement) and ('meta', command) tuples
+    """
+    items = []
+    buf = []
+    i = 0
+    length = len(script)
+    paren_depth = 0
+    while i < length:
+        char = script[i]
+        if char == '-' and script.startswith('--', i):
+            end = script.find('\n', i)
+            end = length if end == -1 else end
+            # like ybsql a '--' comment before the statement is not sent
+            if ''.join(buf).strip() != '':
+                buf.append(script[i:end])
+            i = end
+        elif char == '/' and script.startswith('/*', i):
+            depth = 0
+            j = i
+            while j < length:
+                if script.startswith('/*', j):
+                    depth += 1
+                    j += 2
+                elif script.startswith('*/', j):
+                    depth -= 1
+                    j += 2
+                    if depth == 0:
+                        break
+                else:
+                    j += 1
+            buf.append(script[i:j])
+            i = j
+        elif char == "'":
+            escapes = (i > 0 and script[i-1] in 'eE')
+            j = i + 1
+            while j < length:
+                if escapes and script[j] == '\\':
+                    j += 2
+                elif script[j] == "'":
+                    if script.startswith("''", j):
+                        j += 2
+                    else:
+                        break
+                else:
+                    j += 1
+            buf.append(script[i:j+1])
+            i = j + 1
+        elif char == '"':
+            end = script.find('"', i + 1)
+            end = length - 1 if end == -1 else end
+            buf.append(script[i:end+1])
+            i = end + 1
+        elif char == '$':
+            match = re.match(r'\$([A-Za-z_][A-Za-z_0-9]*)?\$', script[i:])
+            if match and not (i > 0 and re.match(r'[A-Za-z_0-9]', script[i-1])):
+                tag = match.group(0)
+                end = script.find(tag, i + len(tag))
+                end = length if end == -1 else end + len(tag)
+                buf.append(script[i:end])
+                i = end
+            else:
+                buf.append(char)
+                i += 1
+        elif char == '(':
+            paren_depth += 1
+            buf.append(char)
+            i += 1
+        elif char == ')':
+            paren_depth = max(0, paren_depth - 1)
+            buf.append(char)
+            i += 1
+        elif char == ';' and paren_depth == 0:
+            buf.append(char)
+            items.append(('sql', ''.join(buf).strip()))
+            buf = []
+            i += 1
+        elif char == '\\':
+            end = script.find('\n', i)
+            end = length if end == -1 else end
+            command = script[i+1:end].strip()
+            if command.startswith('\\'): # '\\' is a meta-command separator
+                command = command[1:].strip()
+            if command:
+                items.append(('meta', command))
+            i = end
+        else:
+            buf.append(char)
+            i += 1
+
+    if ''.join(buf).strip() != '':
+        items.append(('sql', ''.join(buf).strip()))
+
+    return items
+
+def split_meta_args(args_str):
+    """Split the arguments of a meta-command like ybsql; a single quoted
+    argument supports C like escapes and '' and a double quoted argument
+    keeps its quotes.
+    """
+    args = []
+    arg = None
+    i = 0
+    length = len(args_str)
+    escapes = {'n': '\n', 't': '\t', 'b': '\b', 'r': '\r', 'f': '\f'}
+    while i < length:
+        char = args_str[i]
+        if char.isspace():
+            if arg is not None:
+                args.append(arg)
+                arg = None
+            i += 1
+            continue
+
+        arg = '' if arg is None else arg
+        if char == "'":
+            i += 1
+            while i < length:
+                if args_str.startswith("''", i):
+                    arg += "'"
+                    i += 2
+                elif args_str[i] == "'":
+                    i += 1
+                    break
+                elif args_str[i] == '\\' and i + 1 < length:
+                    nxt = args_str[i+1]
+                    hex_match = re.match(r'x([0-9a-fA-F]{1,2})', args_str[i+1:])
+                    oct_match = re.match(r'([0-7]{1,3})', args_str[i+1:])
+                    if nxt in escapes:
+                        arg += escapes[nxt]
+                        i += 2
+                    elif hex_match:
+                        arg += chr(int(hex_match.group(1), 16))
+                        i += 1 + len(hex_match.group(0))
+                    elif oct_match:
+                        arg += chr(int(oct_match.group(1), 8))
+                        i += 1 + len(oct_match.group(0))
+                    else:
+                        arg += nxt
+                        i += 2
+                else:
+                    arg += args_str[i]
+                    i += 1
+        elif char == '"':
+            end = args_str.find('"', i + 1)
+            end = length - 1 if end == -1 else end
+            arg += args_str[i:end+1]
+            i = end + 1
+        else:
+            arg += char
+            i += 1
+
+    if arg is not None:
+        args.append(arg)
+    return args
+
+class UnsupportedMetaCommand(Exception):
+    """A ybsql meta-command that YbsqlScript can not run."""
+
+class YbsqlScript(object):
+    """Run ybsql scripts on a PGWireConnection producing the stdout, stderr and
+    exit code that 'ybsql -A -q -t -v ON_ERROR_STOP=1 -X' would produce.
+    """
+    supported_meta_commands = ('echo', 'qecho', 'pset', 't', 'c', 'connect', 'i', 'include')
+    supported_pset_options = ('format', 'tuples_only', 'footer', 'fieldsep', 'recordsep', 'null')
+
+    def __init__(self, connect):
+        """
+        :param connect: function taking a database name, or None for the
+            default database, that returns a new PGWireConnection
+        """
+        self.connect = connect
+        self.conn = None
+
+    @staticmethod
+    def check_supported(script):
+        """Raise UnsupportedMetaCommand if the script has a meta-command that can't
+        be run by YbsqlScript, \\i files are not checked until they are run.
+        """
+        for (item_type, item) in split_script(script):
+            if item_type == 'meta':
+                YbsqlScript.check_meta_command(item)
+
+    @staticmethod
+    def check_meta_command(command):
+        parts = command.split(None, 1)
+        name = parts[0]
+        args = split_meta_args(parts[1]) if len(parts) > 1 else []
+        if name not in YbsqlScript.supported_meta_commands:
+            raise UnsupportedMetaCommand(command)
+        if name == 'pset':
+            if not args or args[0] not in YbsqlScript.supported_pset_options:
+                raise UnsupportedMetaCommand(command)
+            if args[0] == 'format' and args[1:2] != ['unaligned']:
+                raise UnsupportedMetaCommand(command)
+        if name in ('c', 'connect') and len(args) > 1:
+            raise UnsupportedMetaCommand(command)
+        return (name, args)
+
+    def reset_settings(self):
+        self.settings = {'tuples_only': True, 'footer': True
+            , 'fieldsep': '|', 'recordsep': '\n', 'null': ''}
+
+    def run(self, script):
+        """Run the script in a fresh ybsql like session, the connection to the
+        default database is reused between runs.
+
+        :return: a tuple of (stdout, stderr, exit_code, result_sets)
+        """
+        self.reset_settings()
+        self.stdout = []
+        self.stderr = []
+        self.result_sets = []
+        exit_code = 0
+        try:
+            if not self.conn or self.conn.database_changed:
+                self.reconnect(None)
+            self.conn.execute('RESET SESSION AUTHORIZATION; RESET ALL')
+            self.run_items(split_script(script))
+        except PGWireError as error:
+            self.write_notices()
+            if error.is_client_error or error.severity == 'FATAL':
+                self.stderr.append('ybsql: %s' % error.ybsql_text())
+                exit_code = 2
+            else:
+                self.stderr.append(error.ybsql_text(getattr(error, 'query', None)))
+                exit_code = 3
+            if self.conn and self.conn.transaction_status != 'I':
+                self.close()
+        except UnsupportedMetaCommand as error:
+            self.stderr.append('invalid command \\%s\n' % error)
+            exit_code = 1
+        except (IOError, OSError) as error:
+            self.stderr.append('%s\n' % error)
+            exit_code = 1
+
+        if exit_code == 0 and self.conn and self.conn.transaction_status != 'I':
+            # like a ybsql exit, roll back a transaction left open by the script
+            self.conn.execute('ROLLBACK')
+
+        return (''.join(self.stdout), ''.join(self.stderr), exit_code, self.result_sets)
+
+    def reconnect(self, database):
+        self.close()
+        self.conn = self.connect(database)
+        self.conn.database_changed = (database is not None)
+
+    def run_items(self, items):
+        for (item_type, item) in items:
+            if item_type == 'meta':
+                self.run_meta_command(item)
+            else:
+                result_sets = self.conn.execute(item, copy_out=self)
+                self.write_notices()
+                for result_set in result_sets:
+                    self.result_sets.append(result_set)
+                    if result_set.columns is not None:
+                        self.write_result_set(result_set)
+
+    def write(self, data):
+        """COPY ... TO STDOUT data is written to stdout."""
+        self.stdout.append(data)
+
+    def write_notices(self):
+        if self.conn:
+            for notice in self.conn.notices:
+                self.stderr.append(format_message(notice))
+            self.conn.notices = []
+
+    def write_result_set(self, result_set):
+        fieldsep = self.settings['fieldsep']
+        recordsep = self.settings['recordsep']
+        null = self.settings['null']
+        lines = []
+        if not self.settings['tuples_only']:
+            lines.append(fieldsep.join(result_set.columns))
+        for row in result_set.rows:
+            lines.append(fieldsep.join((null if value is None else value) for value in row))
+        if not self.settings['tuples_only'] and self.settings['footer']:
+            row_ct = len(result_set.rows)
+            lines.append('(%d row%s)' % (row_ct, '' if row_ct == 1 else 's'))
+        if lines:
+            self.stdout.append(recordsep.join(lines) + '\n')
+
+    @staticmethod
+    def on_off(value, current):
+        if value is None:
+            return not current
+        return value.lower() in ('on', 'true', '1', 'yes')
+
+    def run_meta_command(self, command):
+        (name, args) = YbsqlScript.check_meta_command(command)
+        if name in ('echo', 'qecho'):
+            newline = '\n'
+            if args[0:1] == ['-n']:
+                newline = ''
+                args = args[1:]
+            self.stdout.append(' '.join(args) + newline)
+        elif name == 't':
+            self.settings['tuples_only'] = YbsqlScript.on_off(
+                args[0] if args else None, self.settings['tuples_only'])
+        elif name == 'pset':
+            option = args[0]
+            value = args[1] if len(args) > 1 else None
+            if option in ('tuples_only', 'footer'):
+                self.settings[option] = YbsqlScript.on_off(value, self.settings[option])
+            elif option in ('fieldsep', 'recordsep', 'null'):
+                self.settings[option] = value if value is not None else ''
+        elif name in ('c', 'connect'):
+            database = args[0] if args and args[0] != '-' else self.conn.database
+            self.reconnect(database.strip('"'))
+        elif name in ('i', 'include'):
+            with open(args[0]) as sql_file:
+                script = sql_file.read()
+            YbsqlScript.check_supported(script)
+            self.run_items(split_script(script))
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
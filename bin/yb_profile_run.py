@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+USAGE:
+      yb_profile_run.py [options]
+
+PURPOSE:
+      Report the client and server time of each query of a utility run.
+
+OPTIONS:
+      See the command line help message for all options.
+      (yb_profile_run.py --help)
+
+Output:
+      A report with a row for each ybsql call of the run.
+"""
+import re
+
+from yb_common import Common, Report, Trace, Util
+
+class profile_run(Util):
+    """Report the client and server time of each query of a utility run.
+
+    Every query of a utility is tagged with the ybd_query_tags
+    'YbEasyCli:<util>:<run id>:ybsql(<n>)', the server timings of the queries
+    of a run are read from sys.log_query by the tags, the client timings are
+    read from the trace file of the run, see Trace.
+    """
+    config = {
+        'description': 'Report the client and server time of each query of a utility run.'
+            '\n'
+            '\nnote:'
+            '\n  the client timings are read from the --trace_file of the profiled run, without'
+            '\n  a trace file only the server timings are reported.  The server timings are read'
+            '\n  from sys.log_query which only has completed queries, a db super user sees the'
+            '\n  queries of all users, any other user only sees their own queries.'
+        , 'optional_args_single': []
+        , 'usage_example': {
+            'cmd_line_args': '@$HOME/conn.args --trace_file /tmp/yb.jsonl --run_id 20240822_101500_12345'
+            , 'file_args': [Util.conn_args_file] }
+        , 'report_columns': 'util|ybsql_call|stmts|submit_time|client_ms|login|login_ms|server_ms'
+            '|queue_ms|plan_ms|compile_ms|run_ms|io_wait_ms|spool_ms|client_wait_ms|restart_ms'
+            '|restarts|spill_mb|overhead_ms|overhead_pct'
+        , 'report_default_order': 'util|ybsql_call' }
+
+    def additional_args(self):
+        args_grp = self.args_handler.args_parser.add_argument_group('optional arguments')
+        args_grp.add_argument("--run_id"
+            , help="the run id to profile, the run id of a utility is set with the %s env variable"
+                ", defaults to the last run in the --trace_file" % Common.run_id_env)
+
+    def additional_args_process(self):
+        args = self.args_handler.args
+        if args.run_id and not re.match(r'^[A-Za-z0-9_.-]+$', args.run_id):
+            self.args_handler.args_parser.error('invalid --run_id: %s' % args.run_id)
+        if not args.run_id and not Trace.file_path:
+            self.args_handler.args_parser.error('one of the arguments --run_id --trace_file is required')
+
+    @staticmethod
+    def read_trace_queries(trace_file):
+        """Read the ybsql_query events of a trace file, in the JSON lines or Chrome format.
+
+        :return: a list of the query event dictionaries, in the order they were traced
+        """
+        import json
+        queries = []
+        for line in Common.read_file(trace_file).split('\n'):
+            line = line.strip().rstrip(',')
+            if line in ('', '[', ']'):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue # a partially written event
+            if event.get('event') == 'ybsql_query':
+                queries.append(event)
+            elif event.get('name') == 'ybsql_query':
+                query = event['args'].copy()
+                query['duration_ms'] = event['dur'] / 1000.0
+                queries.append(query)
+        return queries
+
+    def client_sql(self, queries):
+        """Build the SELECT of the client timing of each ybsql call of the run."""
+        sql = ('SELECT NULL::VARCHAR(256) AS query_tag, NULL::NUMERIC(19,1) AS client_ms'
+            ', NULL::BOOLEAN AS login, NULL::NUMERIC(19,1) AS login_ms WHERE FALSE')
+        for query in queries:
+            sql += "\n    UNION ALL SELECT '%s', %.1f, %s, %s" % (
+                query['query_tag'].replace("'", "''"), query['duration_ms']
+                , ('TRUE' if query.get('login') else 'FALSE')
+                , ('%.1f' % query['connect_ms'] if 'connect_ms' in query else 'NULL'))
+        return sql
+
+    def execute(self):
+        args = self.args_handler.args
+        queries = []
+        if Trace.file_path:
+            # the queries of this profile run are also traced to the trace file
+            queries = [query for query in self.read_trace_queries(Trace.file_path)
+                if query.get('run_id') and query['run_id'] != Common.get_run_id()]
+        run_id = args.run_id or (queries[-1]['run_id'] if queries else None)
+        if not run_id:
+            Common.error('no utility run found in the trace file: %s' % Trace.file_path)
+        queries = [query for query in queries if query['run_id'] == run_id]
+
+        query = """WITH
+client AS (
+    {client_sql}
+)
+, server AS (
+    SELECT
+        SPLIT_PART(tags, ':', 1) || ':' || SPLIT_PART(tags, ':', 2) || ':'
+            || SPLIT_PART(tags, ':', 3) || ':' || SPLIT_PART(tags, ':', 4) AS query_tag
+        , COUNT(*)                                    AS stmts
+        , DATE_TRUNC('secs', MIN(submit_time))::TIMESTAMP AS submit_time
+        , SUM(total_ms)                               AS server_ms
+        , SUM(acquire_resources_ms)                   AS queue_ms
+        , SUM(parse_ms + wait_parse_ms + wait_lock_ms + plan_ms + wait_plan_ms
+            + assemble_ms + wait_assemble_ms)         AS plan_ms
+        , SUM(compile_ms)                             AS compile_ms
+        , SUM(run_ms)                                 AS run_ms
+        , SUM(wait_run_io_ms)                         AS io_wait_ms
+        , SUM(spool_ms)                               AS spool_ms
+        , SUM(client_ms)                              AS client_wait_ms
+        , SUM(restart_ms)                             AS restart_ms
+        , SUM(num_restart)                            AS restarts
+        , MAX(io_spill_space_bytes_max) / 1024.0^2    AS spill_mb
+    FROM sys.log_query
+    WHERE
+        tags LIKE 'YbEasyCli:%'
+        AND SPLIT_PART(tags, ':', 3) = '{run_id}'
+    GROUP BY 1
+)
+SELECT
+    SPLIT_PART(query_tag, ':', 2)::VARCHAR(128)     AS util
+    , REGEXP_REPLACE(SPLIT_PART(query_tag, ':', 4), '[^0-9]', '', 'g')::INT AS ybsql_call
+    , s.stmts
+    , s.submit_time
+    , c.client_ms
+    , c.login
+    , c.login_ms
+    , ROUND(s.server_ms, 1)::NUMERIC(19,1)          AS server_ms
+    , ROUND(s.queue_ms, 1)::NUMERIC(19,1)           AS queue_ms
+    , ROUND(s.plan_ms, 1)::NUMERIC(19,1)            AS plan_ms
+    , ROUND(s.compile_ms, 1)::NUMERIC(19,1)         AS compile_ms
+    , ROUND(s.run_ms, 1)::NUMERIC(19,1)             AS run_ms
+    , ROUND(s.io_wait_ms, 1)::NUMERIC(19,1)         AS io_wait_ms
+    , ROUND(s.spool_ms, 1)::NUMERIC(19,1)           AS spool_ms
+    , ROUND(s.client_wait_ms, 1)::NUMERIC(19,1)     AS client_wait_ms
+    , ROUND(s.restart_ms, 1)::NUMERIC(19,1)         AS restart_ms
+    , s.restarts
+    , ROUND(s.spill_mb, 0)::NUMERIC(19,0)           AS spill_mb
+    , ROUND(c.client_ms - COALESCE(s.server_ms, 0), 1)::NUMERIC(19,1) AS overhead_ms
+    , ROUND(100.0 * (c.client_ms - COALESCE(s.server_ms, 0)) / NULLIF(c.client_ms, 0), 1)::NUMERIC(19,1) AS overhead_pct
+FROM
+    client AS c
+    FULL OUTER JOIN server AS s USING (query_tag)""".format(
+            client_sql=self.client_sql(queries)
+            , run_id=run_id)
+
+        report = Report(self.args_handler, self.db_conn
+            , self.config['report_columns'], query).build(stream=True)
+
+        if queries and args.report_type in ('formatted', 'psv'):
+            client_ms = sum([query['duration_ms'] for query in queries])
+            report += '\n--run id: %s, ybsql calls: %d, logins: %d, client time: %.1f ms' % (
+                run_id, len(queries), len([query for query in queries if query.get('login')])
+                , client_ms)
+        return report
+
+def main():
+    pr = profile_run()
+    print(pr.execute())
+
+
+if __name__ == "__main__":
+    main()
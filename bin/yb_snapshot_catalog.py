@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+USAGE:
+      yb_snapshot_catalog.py [options]
+
+PURPOSE:
+      Build or refresh a local catalog snapshot of the tables, views and columns of databases.
+
+OPTIONS:
+      See the command line help message for all options.
+      (yb_snapshot_catalog.py --help)
+
+Output:
+      A line for each database in the snapshot.
+"""
+from yb_common import CatalogSnapshot, Text, Util
+
+class snapshot_catalog(Util):
+    """Build or refresh a local catalog snapshot of the tables, views and
+    columns of databases, see CatalogSnapshot.
+
+    A refresh first gets a fingerprint of the catalog of each database, only
+    the databases with a changed fingerprint are pulled again.  The catalogs
+    of all the databases are read with a single ybsql call.
+    """
+    config = {
+        'description': 'Build or refresh a local catalog snapshot of the tables, views and columns of databases.'
+            '\n'
+            '\nnote:'
+            '\n  utilities run with --catalog_snapshot answer from the snapshot instead of'
+            '\n  connecting to the database, like: yb_get_table_names.py --catalog_snapshot <file>'
+        , 'optional_args_single': []
+        , 'optional_args_multi': ['database']
+        , 'usage_example': {
+            'cmd_line_args': '@$HOME/conn.args --database_in stores --catalog_snapshot $HOME/stores.catalog'
+            , 'file_args': [Util.conn_args_file] } }
+
+    # the tables and views of the connected database
+    objects_sql = """
+    SELECT
+        t.table_id AS object_id, t.name, t.schema_id, t.owner_id, 'table' AS type
+        , DECODE(LOWER(t.distribution), 'hash', t.distribution_key, UPPER(t.distribution)) AS distribution
+    FROM sys.table AS t
+    WHERE t.database_id = (SELECT database_id FROM sys.database WHERE name = CURRENT_DATABASE())
+    UNION ALL SELECT
+        v.view_id AS object_id, v.name, v.schema_id, v.owner_id, 'view' AS type
+        , NULL AS distribution
+    FROM sys.view AS v
+    WHERE v.database_id = (SELECT database_id FROM sys.database WHERE name = CURRENT_DATABASE())"""
+
+    fields = ['row_type', 'database', 'schema', 'object', 'object_type', 'owner', 'distribution'
+        , 'column', 'attnum', 'data_type']
+
+    def additional_args(self):
+        args_grp = self.args_handler.args_parser.add_argument_group('snapshot arguments')
+        args_grp.add_argument("--catalog_snapshot", metavar="SNAPSHOT_FILE", required=True
+            , help="the snapshot file to build or refresh")
+        args_grp.add_argument("--rebuild", action="store_true"
+            , help="pull the catalog of every database even if it has not changed")
+
+    def fingerprint_sql(self, db):
+        """A query of the fingerprint of the catalog of a database, a hash of the
+        names, owners, distributions and column types of its tables and views.
+
+        The items are hashed in the order of the sorted sub-query, if the order
+        ever differs the database is only pulled again.
+        """
+        return """\\c {db}
+SELECT CURRENT_DATABASE() || '|' || MD5(NVL(STRING_AGG(item, ','), ''))
+FROM (
+    SELECT item
+    FROM (
+        SELECT
+            'o:' || o.object_id || ':' || s.name || ':' || o.name || ':' || o.owner_id
+                || ':' || NVL(o.distribution, '') AS item
+        FROM ({objects}) AS o
+            JOIN sys.schema AS s
+                ON o.schema_id = s.schema_id
+                AND s.database_id = (SELECT database_id FROM sys.database WHERE name = CURRENT_DATABASE())
+        UNION ALL SELECT
+            'c:' || a.attrelid || ':' || a.attnum || ':' || a.attname
+                || ':' || pg_catalog.format_type(a.atttypid, a.atttypmod) AS item
+        FROM ({objects}) AS o
+            JOIN pg_catalog.pg_attribute AS a
+                ON a.attrelid = o.object_id
+        WHERE a.attnum > 0
+    ) AS i
+    ORDER BY item
+) AS f;\n""".format(db=db, objects=self.objects_sql)
+
+    def catalog_sql(self, db):
+        """A query of the object and column rows of a database, in the template
+        row protocol, see Util.template_rows_sql."""
+        return """\\c {db}
+WITH
+obj AS ({objects}
+)
+, obj_names AS (
+    SELECT o.*, d.name AS database_name, s.name AS schema_name, u.name AS owner_name
+    FROM obj AS o
+        JOIN sys.database AS d
+            ON d.name = CURRENT_DATABASE()
+        LEFT JOIN sys.schema AS s
+            ON o.schema_id = s.schema_id AND s.database_id = d.database_id
+        LEFT JOIN sys.user AS u
+            ON o.owner_id = u.user_id
+    WHERE s.name NOT IN ('sys', 'pg_catalog', 'information_schema')
+)
+SELECT {object_row}
+FROM obj_names AS o
+UNION ALL SELECT {column_row}
+FROM obj_names AS o
+    JOIN pg_catalog.pg_attribute AS a
+        ON a.attrelid = o.object_id
+WHERE a.attnum > 0;\n""".format(
+            db=db, objects=self.objects_sql
+            , object_row=self.template_rows_sql(["'o'", 'o.database_name', 'o.schema_name', 'o.name'
+                , 'o.type', 'o.owner_name', 'o.distribution', 'NULL', 'NULL', 'NULL'])
+            , column_row=self.template_rows_sql(["'c'", 'o.database_name', 'o.schema_name', 'o.name'
+                , 'o.type', 'o.owner_name', 'NULL', 'a.attname', 'a.attnum::VARCHAR'
+                , 'pg_catalog.format_type(a.atttypid, a.atttypmod)']))
+
+    def execute(self):
+        import json
+        args = self.args_handler.args
+        snapshot = CatalogSnapshot(args.catalog_snapshot, create=True)
+        snapshot.set_info(
+            host=self.db_conn.env['host'], database=self.db_conn.database, schema=self.db_conn.schema
+            , ybdb=json.dumps(self.db_conn.ybdb))
+
+        dbs = self.get_dbs()
+        snapshot_fingerprints = snapshot.fingerprints()
+
+        cmd_result = self.db_conn.ybsql_query(''.join([self.fingerprint_sql(db) for db in dbs]))
+        cmd_result.on_error_exit()
+        fingerprints = dict([line.split('|', 1)
+            for line in cmd_result.stdout.strip().split('\n') if '|' in line])
+
+        pull_dbs = [db for db in dbs
+            if args.rebuild or snapshot_fingerprints.get(db) != fingerprints.get(db)]
+        catalogs = dict([(db, ([], [])) for db in pull_dbs])
+        if pull_dbs:
+            # the catalog rows are streamed when the backend streams, see query_and_apply_template
+            stream = self.db_conn.get_backend().supports_stream
+            self.cmd_result = self.db_conn.ybsql_query(
+                ''.join([self.catalog_sql(db) for db in pull_dbs]), stream=stream)
+            lines = (self.cmd_result.lines() if stream else self.cmd_result.stdout.split('\n'))
+            for row in self.template_rows(lines, self.fields, self.cmd_result):
+                row = dict([(k, (None if v == '<NULL>' else v)) for (k, v) in row.items()])
+                if row['row_type'] == 'o':
+                    catalogs[row['database']][0].append(
+                        (row['database'], row['schema'], row['object'], row['object_type']
+                        , row['owner'], row['distribution']))
+                else:
+                    catalogs[row['database']][1].append(
+                        (row['database'], row['schema'], row['object'], row['object_type']
+                        , row['owner'], row['column'], int(row['attnum']), row['data_type']))
+
+        for db in dbs:
+            if db in catalogs:
+                (objects, columns) = catalogs[db]
+                snapshot.put_database(db, fingerprints.get(db), objects, columns)
+                print('%s: %s, objects: %d, columns: %d' % (
+                    Text.color('Pulled', fg='green'), db, len(objects), len(columns)))
+            else:
+                print('%s: %s' % (Text.color('Unchanged', fg='cyan'), db))
+
+        # the databases no longer in the cluster are removed from the snapshot
+        all_dbs = self.get_dbs(filter_clause="has_database_privilege(name, 'CONNECT')")
+        for db in sorted(set(snapshot_fingerprints.keys()) - set(all_dbs)):
+            snapshot.delete_database(db)
+            print('%s: %s' % (Text.color('Removed', fg='yellow'), db))
+
+        print('%s: %d, %s: %d, %s: %s' % (
+            Text.color('Databases', style='bold'), len(dbs)
+            , Text.color('Pulled', style='bold'), len(pull_dbs)
+            , Text.color('Snapshot', style='bold'), args.catalog_snapshot))
+
+def main():
+    sc = snapshot_catalog()
+    sc.execute()
+    exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ class SPReportUtil(Util):
             , version=version
             , proc_name= ((self.__class__.__name__).replace('report_', '') + '_p') )
         if StoredProc.proc_file_exists(full_proc_name):
-            self.sp = StoredProc(full_proc_name)
+            self.sp = StoredProc(full_proc_name, self.db_conn)
         else:
             Common.error('is not implemented for YBDB version: %d' % self.db_conn.ybdb['version_major'])
 
@@ -35,7 +35,15 @@ class SPReportUtil(Util):
             else '')
 
     def build_for_su(self, args, where_clause):
-        (new_table_name, anonymous_pl) = self.sp.proc_setof_to_anonymous_block(args)
+        # the report is selected from the deployed proc, see yb_deploy_procs.py,
+        #   a ctas or insert report is still run as an anonymous block as it
+        #   writes the report from a cstore temp table
+        deployed_proc = (self.sp.deployed_proc()
+            if self.args_handler.args.report_type not in ('ctas', 'insert') else None)
+        if deployed_proc:
+            (new_table_name, anonymous_pl) = (self.sp.deployed_proc_call_sql(deployed_proc, args), '')
+        else:
+            (new_table_name, anonymous_pl) = self.sp.proc_setof_to_anonymous_block(args)
 
         where_clause = ((' WHERE %s' % where_clause) if where_clause else '')
 
@@ -48,7 +56,7 @@ class SPReportUtil(Util):
             , report_query
             , pre_sql=anonymous_pl
             , order_by=self.order_by_clause
-            , strip_warnings=self.strip_warnings).build(is_source_cstore=True)
+            , strip_warnings=self.strip_warnings).build(is_source_cstore=(not deployed_proc), stream=True)
 
     def get_create_table(self):
         self.sp.parse_setof_create_table(new_table_name=self.args_handler.args.report_dst_table)
@@ -98,7 +106,7 @@ class SPReportUtil(Util):
             , self.config['report_columns']
             , report_query
             , order_by=self.order_by_clause
-            , strip_warnings=self.strip_warnings).build()
+            , strip_warnings=self.strip_warnings).build(stream=(report_type == 'psv'))
         self.db_conn.env['conn_db'] = pre_conn_db
 
         if report_type in ('ctas', 'insert'):
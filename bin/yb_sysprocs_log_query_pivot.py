@@ -13,7 +13,7 @@ OPTIONS:
 Output:
       The report as a formatted table, pipe separated value rows, or inserted into a database table.
 """
-import io, shutil, time, zipfile
+import io, os, shutil, sys, time, zipfile
 from datetime import datetime
 
 #from yb_sp_report_util import SPReportUtil
@@ -101,26 +101,46 @@ SELECT * FROM {new_table_name} ORDER BY 1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,1
             , tmp_log_query=tmp_log_query
             , log_query=self.args_handler.args.source_table
             , new_table_name=new_table_name
-            , anonymous_pl=anonymous_pl ) )
-
-        cmd_result.on_error_exit()
+            , anonymous_pl=anonymous_pl )
+            , stream=True)
 
+        # the query output is streamed, the CSV data of a large sys.log_query
+        #   is never held in memory
         if not self.step2:
-            zfile = zipfile.ZipFile('%s.zip' % self.pivot_name, 'w', zipfile.ZIP_DEFLATED)
+            zip_file_name = '%s.zip' % self.pivot_name
+            zfile = zipfile.ZipFile(zip_file_name, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
             zinfo = zipfile.ZipInfo('%s.csv' % self.pivot_name)
             zinfo.compress_type = zipfile.ZIP_DEFLATED
-            zfile.writestr(zinfo, cmd_result.stdout)
+            if sys.version_info >= (3, 6):
+                with zfile.open(zinfo, 'w', force_zip64=True) as cfile:
+                    for line in cmd_result.lines():
+                        cfile.write(line.encode('utf-8'))
+            else:
+                # Fallback for python2, a zip file member can't be opened for
+                #   write, the CSV is streamed to a temp file which is then zipped
+                import tempfile
+                (tmp_csv_fd, tmp_csv_path) = tempfile.mkstemp(prefix='YbEasyCli_', suffix='.csv')
+                try:
+                    with os.fdopen(tmp_csv_fd, 'w') as cfile:
+                        for line in cmd_result.lines():
+                            cfile.write(line)
+                    zfile.write(tmp_csv_path, zinfo.filename)
+                finally:
+                    os.remove(tmp_csv_path)
             zfile.close()
-            print('--created Zip file: %s.zip' % self.pivot_name)
+            if cmd_result.exit_code != 0 or cmd_result.stderr != '':
+                os.remove(zip_file_name)
+                cmd_result.on_error_exit()
+            print('--created Zip file: %s' % zip_file_name)
         else:
-            self.report = cmd_result.stdout
+            self.report_cmd = cmd_result
+            self.report_lines = cmd_result.lines()
 
     def build_spreadsheet(self):
         if not self.step1:
             zfile = zipfile.ZipFile(self.args_handler.args.step2)
             cfile = zfile.open('%s.csv' % self.pivot_name, 'r')
-            cfile = io.TextIOWrapper(cfile, encoding='iso-8859-1', newline='')
-            self.report = cfile.read()
+            self.report_lines = io.TextIOWrapper(cfile, encoding='iso-8859-1', newline='')
 
             dbv = int((self.args_handler.args.step2.rsplit('.', 1)[0]).split('__')[2][1:])
         else:
@@ -148,8 +168,8 @@ SELECT * FROM {new_table_name} ORDER BY 1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,1
         batchCt = 0
         batchSize = 10000
         rows = []
-        for line in self.report.split('\n'):
-            row = line.split('|')
+        for line in self.report_lines:
+            row = line.rstrip('\r\n').split('|')
             if (len(row) > 1):
                 rowCt += 1
                 rows.append(row)
@@ -164,6 +184,9 @@ SELECT * FROM {new_table_name} ORDER BY 1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,1
             insertCell = 'A%d' % ((batchCt * batchSize) + 2)
             sheet.range(insertCell).value = rows
 
+        if self.step1:
+            self.report_cmd.on_error_exit()
+
 
         #if Common.is_windows:
         if True:
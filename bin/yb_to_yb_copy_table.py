@@ -14,13 +14,17 @@ Output:
       Tables that have been copied.
 """
 
+import copy
+import itertools
 import sys
 import os
 import re
 import random
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 
-from yb_common import ArgIntRange, ArgsHandler, Cmd, Common, DBConnect, DBFilterArgs, Text, Util
+from yb_common import ArgIntRange, ArgsHandler, Cmd, Common, DBConnect, DBFilterArgs, StoredProc, Text, Util
 from yb_chunk_dml_by_integer import chunk_dml_by_integer
 
 class yb_to_yb_copy_table(Util):
@@ -32,6 +36,7 @@ class yb_to_yb_copy_table(Util):
             'Copy a table from a source cluster to a destination cluster.'
             '\n'
             '\nnote:'
+            '\n  To copy multiple tables, use the --schema_* and --table_* filter arguments instead of --src_table.'
             '\n  If the src and dst user password differ use SRC_YBPASSWORD and DST_YBPASSWORD env variables.'
             '\n  For manual password entry unset all env passwords or use the --src_W and --dst_W options.')
         , 'positional_args_usage': None
@@ -70,13 +75,18 @@ class yb_to_yb_copy_table(Util):
         self.args_handler.args_add_connection_group('dst', 'destination')
         self.args_handler.args_usage_example()
 
-        copy_table_r_grp = self.args_handler.args_parser.add_argument_group('required copy table arguments')
-        copy_table_r_grp.add_argument(
-            "--src_table", required=True
-            , help=("source table to copy"))
-        copy_table_r_grp.add_argument(
-            "--dst_table", required=True
-            , help=("destination table"))
+        copy_table_grp = self.args_handler.args_parser.add_argument_group('copy table arguments')
+        copy_table_grp.add_argument(
+            "--src_table"
+            , help=("source table to copy, to copy multiple tables use the --schema_* and --table_*"
+                " filter arguments instead"))
+        copy_table_grp.add_argument(
+            "--dst_table"
+            , help=("destination table, required with --src_table"))
+        copy_table_grp.add_argument(
+            "--dst_schema"
+            , help=("destination schema of the tables copied with the filter arguments"
+                ", defaults to the source schema of each table"))
 
         copy_table_o_grp = self.args_handler.args_parser.add_argument_group('optional copy table arguments')
         copy_table_o_grp.add_argument(
@@ -99,13 +109,53 @@ class yb_to_yb_copy_table(Util):
             "--chunk_rows", dest="chunk_rows", metavar='ROWS'
             , type=ArgIntRange(1,9223372036854775807)
             , help="when set data copying will be performed in chunks of rows rather than one big copy")
+        copy_table_o_grp.add_argument(
+            "--chunk_target_secs", metavar='SECONDS'
+            , type=ArgIntRange(10,86400)
+            , help="copy in chunks that are resized as the copy runs toward chunks that take SECONDS"
+                " to copy, the first chunks are --chunk_rows rows or the size estimated by"
+                " yb_chunk_optimal_rows_p")
         copy_table_o_grp.add_argument(
             "--threads"
             , type=ArgIntRange(1,20), default=1
-            , help="when set data copying will be performed in parallel ybunload/ybload threads")
+            , help="the number of ybunload/ybload pipelines run at the same time, each pipeline"
+                " copies the next chunk as soon as it is done with its last one, defaults to 1")
+        copy_table_o_grp.add_argument(
+            "--manifest", metavar="MANIFEST_FILE"
+            , help="the file the status of each chunk of the copy is recorded in, the copy is"
+                " resumed from the manifest with --resume, defaults to a _manifest.json file"
+                " named like the log files")
+        copy_table_o_grp.add_argument(
+            "--resume", metavar="MANIFEST_FILE"
+            , help="resume a failed copy from its manifest, the chunks already copied are skipped")
+        copy_table_o_grp.add_argument(
+            "--retries", type=ArgIntRange(0,10), default=0
+            , help="the number of times a failed chunk is copied again before the copy fails"
+                ", the wait before each retry doubles starting at 10 seconds, defaults to 0")
+        copy_table_o_grp.add_argument(
+            "--progress_interval", metavar="SECONDS", type=ArgIntRange(0,3600), default=30
+            , help="seconds between the live progress lines of the running pipelines, 0 turns"
+                " the progress lines off, defaults to 30")
+        copy_table_o_grp.add_argument(
+            "--metrics_file", metavar="METRICS_FILE"
+            , help="the JSON file the throughput of the copy and of each task is written to"
+                ", defaults to a _metrics.json file named like the log files, the metrics of the"
+                " recopy of --verify are written to a _recopy file named like it")
+        copy_table_o_grp.add_argument(
+            "--verify", action="store_true"
+            , help="after the copy, compare the row counts and row hashes of the source and"
+                " destination tables in buckets of rows, the rows of the mismatched buckets"
+                " are deleted from the destination table and copied again, the"
+                " --unload_where_clause also filters the destination rows compared and deleted")
+        copy_table_o_grp.add_argument(
+            "--verify_buckets", metavar="BUCKETS", type=ArgIntRange(1,4096), default=64
+            , help="the number of buckets the rows of a table are compared in, defaults to 64")
         copy_table_o_grp.add_argument("--dry_run", action="store_true"
             , help="prints all the ybunload/ybload commands without running the commands, defaults to FALSE")
 
+        # the source tables to copy in multi-table mode
+        self.args_handler.db_filter_args = DBFilterArgs([], [], ['schema', 'table'], self.args_handler)
+
     def set_db_connections(self):
         pwd = os.environ['YBPASSWORD'] if 'YBPASSWORD' in os.environ else None
         src_pwd = os.environ['SRC_YBPASSWORD'] if 'SRC_YBPASSWORD' in os.environ else None
@@ -127,12 +177,40 @@ class yb_to_yb_copy_table(Util):
             del os.environ['YBPASSWORD']
 
     def additional_args_process(self):
-        if self.args_handler.args.create_dst_table:
-            self.src_to_dst_table_ddl(
-                self.args_handler.args.src_table, self.args_handler.args.dst_table
-                , self.src_conn, self.dst_conn
-                , self.args_handler)
-            print('-- created destination table: %s' % self.args_handler.args.dst_table)
+        args = self.args_handler.args
+        db_filter_args = self.args_handler.db_filter_args
+        has_filter_args = (db_filter_args.has_optional_args_multi_set('schema')
+            or db_filter_args.has_optional_args_multi_set('table'))
+        self.multi_table = not args.src_table
+        if self.multi_table:
+            if not has_filter_args and not args.resume:
+                self.args_handler.args_parser.error(
+                    'one of the arguments --src_table or the --schema_*/--table_* filter arguments is required')
+            if args.dst_table:
+                self.args_handler.args_parser.error('argument --dst_table: requires --src_table')
+        else:
+            if not args.dst_table:
+                self.args_handler.args_parser.error('argument --src_table: requires --dst_table')
+            if has_filter_args or args.dst_schema:
+                self.args_handler.args_parser.error(
+                    'the --dst_schema and filter arguments may not be used with --src_table')
+
+        if args.resume:
+            if args.create_dst_table:
+                self.args_handler.args_parser.error('--create_dst_table may not be used with --resume')
+            self.manifest = self.read_manifest(args.resume)
+        elif self.multi_table:
+            self.tables = self.get_tables()
+        else:
+            self.tables = [{'src_table': args.src_table, 'dst_table': args.dst_table, 'bytes': None}]
+
+        if args.create_dst_table:
+            for table in self.tables:
+                self.src_to_dst_table_ddl(
+                    table['src_table'], table['dst_table']
+                    , self.src_conn, self.dst_conn
+                    , self.args_handler)
+                print('-- created destination table: %s' % table['dst_table'])
 
         #thread use may have severe impact on the YB cluster, so I'm limiting it to super users
         if (self.args_handler.args.threads > 1
@@ -142,18 +220,19 @@ class yb_to_yb_copy_table(Util):
                 "The '--threads' option is only supported for YBDB super users."
                 , 'yellow'))
 
-        if (self.args_handler.args.chunk_rows
-            and self.src_conn.ybdb['version_major'] < 4):
-            Common.error(Text.color(
-                "The '--chunk_rows' option is only supported on YBDB version 4 or higher."
-                " The source db is running YBDB %s..." % self.src_conn.ybdb['version']
-                , 'yellow'))
+        for arg in ('chunk_rows', 'chunk_target_secs'):
+            if (getattr(self.args_handler.args, arg)
+                and self.src_conn.ybdb['version_major'] < 4):
+                Common.error(Text.color(
+                    "The '--%s' option is only supported on YBDB version 4 or higher."
+                    " The source db is running YBDB %s..." % (arg, self.src_conn.ybdb['version'])
+                    , 'yellow'))
 
         if Common.is_windows and self.src_conn.env['pwd'] != self.dst_conn.env['pwd']:
             Common.error(Text.color(
                 "The source and destination password must be the same when running with powershell...") )
 
-        self.log_file_name_template = ('{}{}{}_{}_{{{{CofC}}}}{{{{TofT}}}}_{{log_type}}.log'.format(
+        self.log_file_prefix = ('{}{}{}_{}'.format(
             ('%s/' % self.args_handler.args.log_dir
                 if self.args_handler.args.log_dir
                 else '')
@@ -162,6 +241,7 @@ class yb_to_yb_copy_table(Util):
                 else '')
             , datetime.now().strftime("%Y%m%d_%H%M%S")
             , "%04d" % random.randint(0,9999)))
+        self.log_file_name_template = self.log_file_prefix + '_{{CofC}}{{SofS}}_{log_type}.log'
 
     def build_table_copy_cmd(self):
         ybunload_env = "YBPASSWORD=$SRC_YBPASSWORD"
@@ -192,16 +272,13 @@ class yb_to_yb_copy_table(Util):
             #set default log level 
             logfile_log_level_option = ' --logfile-log-level INFO'
 
-        dst_table = Common.quote_object_paths(self.args_handler.args.dst_table)
-        if Common.is_windows:
-            dst_table = dst_table.replace('"','"\\""')
         ybload_env = "YBPASSWORD=$DST_YBPASSWORD"
         ybload_cmd = ("ybload"
             " -h {dst_host}"
             "{port_option}"
             " -U {dst_user}"
             " -d {dst_db}"
-            " -t '{dst_table}'"
+            " -t '{{dst_table}}'"
             " --delimiter '{delimiter}'"
             " --log-level OFF" #turns off console logging
             "{logfile_log_level_option}"
@@ -213,7 +290,6 @@ class yb_to_yb_copy_table(Util):
             , port_option = (' --port %s' % self.args_handler.args.dst_port if self.args_handler.args.dst_port else '')
             , dst_user = self.dst_conn.env['dbuser']
             , dst_db = self.dst_conn.database
-            , dst_table = dst_table
             , delimiter = self.args_handler.args.delimiter
             , log_file_name = (self.log_file_name_template.format(log_type='ybload'))
             , logfile_log_level_option = logfile_log_level_option
@@ -235,21 +311,78 @@ class yb_to_yb_copy_table(Util):
                 , ybload_env = ybload_env
                 , ybload_cmd = ybload_cmd)
 
-    def chunk_table_unload_sql(self, table_unload_sql):
-        self.args_handler.args.dml = ("%s AND <chunk_where_clause>" % table_unload_sql)
-        self.args_handler.args.execute_chunk_dml = False
-        self.args_handler.args.verbose_chunk_off = False
-        self.args_handler.args.null_chunk_off = False
-        self.args_handler.args.print_chunk_dml = True
-        self.args_handler.args.table = Common.quote_object_paths(self.args_handler.args.src_table)
-        self.args_handler.args.column = 'rowunique'
-        self.args_handler.args.column_cardinality = 'high'
-        if self.args_handler.args.where_clause:
-            self.args_handler.args.table_where_clause = self.args_handler.args.where_clause
+    def get_tables(self):
+        """Get the source tables that match the filter arguments, largest first,
+        so the longest copies start first.
+
+        :return: a list of the table dictionaries; src_table, dst_table and bytes
+        """
+        fields = ['schema', 'table', 'bytes']
+        sql_query = """
+SELECT {row_sql}
+FROM
+    sys.table AS t
+    JOIN sys.schema AS s
+        ON t.schema_id = s.schema_id AND t.database_id = s.database_id
+WHERE
+    t.database_id = (SELECT database_id FROM sys.database WHERE name = CURRENT_DATABASE())
+    AND s.name NOT IN ('sys', 'pg_catalog', 'information_schema')
+    AND {filter_clause}
+ORDER BY t.compressed_bytes DESC NULLS LAST, s.name, t.name""".format(
+            row_sql=self.template_rows_sql(['s.name', 't.name', 't.compressed_bytes::VARCHAR'])
+            , filter_clause=self.args_handler.db_filter_args.build_sql_filter(
+                {'schema':'s.name', 'table':'t.name'}))
+
+        cmd_result = self.src_conn.ybsql_query(sql_query)
+        cmd_result.on_error_exit()
+
+        tables = []
+        for row in self.template_rows(cmd_result.stdout.split('\n'), fields):
+            tables.append({
+                'src_table': '%s.%s' % (row['schema'], row['table'])
+                , 'dst_table': '%s.%s' % (self.args_handler.args.dst_schema or row['schema'], row['table'])
+                , 'bytes': (int(row['bytes']) if row['bytes'] != '<NULL>' else None)})
+        if not tables:
+            Common.error('no source tables match the filter arguments')
+        return tables
+
+    @staticmethod
+    def unload_escape(sql):
+        """Escape the double quotes of SQL for the ybunload --select command line."""
+        if Common.is_windows:
+            return sql.replace('"','"\\""')
+        else:
+            return sql.replace('"','\\"')
+
+    @staticmethod
+    def unload_table_name(src_table):
+        """The quoted table name, escaped for the ybunload --select command line."""
+        return yb_to_yb_copy_table.unload_escape(Common.quote_object_paths(src_table))
+
+    def table_unload_sql(self, src_table):
+        return "SELECT * FROM {src_table} WHERE TRUE{where_clause}".format(
+            src_table = self.unload_table_name(src_table)
+            , where_clause=(' AND %s' % self.args_handler.args.where_clause if self.args_handler.args.where_clause else ''))
+
+    def chunk_table_unload_sql(self, src_table, table_unload_sql):
+        # the chunking args are set on a copy of the args, so tables can be
+        #   chunked at the same time
+        args_handler = copy.copy(self.args_handler)
+        args_handler.args = copy.copy(self.args_handler.args)
+        args_handler.args.dml = ("%s AND <chunk_where_clause>" % table_unload_sql)
+        args_handler.args.execute_chunk_dml = False
+        args_handler.args.verbose_chunk_off = False
+        args_handler.args.null_chunk_off = False
+        args_handler.args.print_chunk_dml = True
+        args_handler.args.table = Common.quote_object_paths(src_table)
+        args_handler.args.column = 'rowunique'
+        args_handler.args.column_cardinality = 'high'
+        if args_handler.args.where_clause:
+            args_handler.args.table_where_clause = args_handler.args.where_clause
         else:
-            self.args_handler.args.table_where_clause = 'TRUE'
+            args_handler.args.table_where_clause = 'TRUE'
 
-        cdml = chunk_dml_by_integer(db_conn=self.src_conn, args_handler=self.args_handler)
+        cdml = chunk_dml_by_integer(db_conn=self.src_conn, args_handler=args_handler)
         cdml.execute()
         if cdml.cmd_results.exit_code:
             cdml.cmd_results.write()
@@ -257,91 +390,765 @@ class yb_to_yb_copy_table(Util):
 
         return cdml.cmd_results.stdout.strip().split('\n')
 
-    def execute(self):
-        src_table = Common.quote_object_paths(self.args_handler.args.src_table)
-        if Common.is_windows:
-            src_table = src_table.replace('"','"\\""')
-        else:
-            src_table = src_table.replace('"','\\"')
-        table_unload_sql = "SELECT * FROM {src_table} WHERE TRUE{where_clause}".format(
-            src_table = src_table
-            , where_clause=(' AND %s' % self.args_handler.args.where_clause if self.args_handler.args.where_clause else ''))
-
+    def table_tasks(self, table):
+        """Chunk a table and split its copy into tasks, see copy_tasks."""
+        table_unload_sql = self.table_unload_sql(table['src_table'])
         if self.args_handler.args.chunk_rows:
-            chunks_sql = self.chunk_table_unload_sql(table_unload_sql)
+            chunks_sql = self.chunk_table_unload_sql(table['src_table'], table_unload_sql)
             if chunks_sql[0] == '':
-                chunks_sql[0] = 'SELECT * FROM %s WHERE FALSE /* dummy chunk when source table is empty */' % src_table
+                chunks_sql[0] = 'SELECT * FROM %s WHERE FALSE /* dummy chunk when source table is empty */' % self.unload_table_name(table['src_table'])
         else:
             chunks_sql = [table_unload_sql]
+        return self.copy_tasks(chunks_sql, table)
 
-        os.environ['SRC_YBPASSWORD'] = self.src_conn.env['pwd']
-        os.environ['DST_YBPASSWORD'] = self.dst_conn.env['pwd']
+    def copy_tasks(self, chunks_sql, table):
+        """Split the copy of a table into tasks, each task is copied by one
+        ybunload/ybload pipeline.
+
+        A task is a chunk, or a slice of a chunk.  When a single table has fewer
+        chunks than --threads the chunks are sliced by rowunique so all the
+        pipelines are kept busy, every slice scans its chunk so chunks are not
+        sliced otherwise.  When multiple tables are copied the pipelines are kept
+        busy by the other tables.
 
+        :return: a list of the task dictionaries, in the order they are copied
+        """
         total_chunks = len(chunks_sql)
+        total_slices = (1 if self.multi_table
+            else max(1, self.args_handler.args.threads // total_chunks))
         format_CofC = 'chunk%.0{len}dof%.0{len}d'.format(len=len(str(total_chunks)))
-        total_threads = self.args_handler.args.threads
-        is_dry_run = self.args_handler.args.dry_run
-        format_TofT = '_thread%.0{len}dof%.0{len}d'.format(len=len(str(total_threads)))
-        TofT = ''
-        thread_clause = ''
-        for chunk in range(1,total_chunks+1):
-            unload_sql = chunks_sql[chunk-1]
-            CofC = format_CofC % (chunk, total_chunks)
-
-            cmd_threads = []
-            for thread in range(1,total_threads+1):
-                if total_threads > 1:
-                    thread_clause = ' AND /* thread_clause(thread: %d) >>>*/ rowunique %% %d = %d /*<<< thread_clause */' % (thread, total_threads, thread-1)
-                    TofT = format_TofT % (thread, total_threads)
-                copy_cmd = self.table_copy_cmd.format(
-                    unload_sql=unload_sql.rstrip().rstrip(';') + thread_clause
-                    , CofC=CofC
-                    , TofT=TofT)
-                if is_dry_run:
-                    print(copy_cmd)
-                else:
-                    cmd = Cmd(copy_cmd, False, wait=False)
-                    cmd.TofT = TofT
-                    cmd_threads.append(cmd)
-
-            thread_exit_code = 0
-            thread_failed = False
-            for cmd in cmd_threads:
-                cmd.wait()
-
-                loaded = False
-                print('-- %s%s'
-                    % (CofC, cmd.TofT))
-                if cmd.exit_code == 0:
-                    ybload_log_file_name = self.log_file_name_template.format(
-                        log_type='ybload').format(
-                            CofC=CofC
-                            , TofT=cmd.TofT)
-                    file = open(ybload_log_file_name, "r")
+        if self.multi_table:
+            # the log files of each table are named by the table
+            format_CofC = '%s_%s' % (re.sub(r'[^A-Za-z0-9_.-]', '_', table['src_table']), format_CofC)
+        format_SofS = '_slice%.0{len}dof%.0{len}d'.format(len=len(str(total_slices)))
+        tasks = []
+        for chunk in range(1, total_chunks+1):
+            for slice in range(1, total_slices+1):
+                slice_clause = ''
+                SofS = ''
+                if total_slices > 1:
+                    slice_clause = ' AND /* slice_clause(slice: %d) >>>*/ rowunique %% %d = %d /*<<< slice_clause */' % (slice, total_slices, slice-1)
+                    SofS = format_SofS % (slice, total_slices)
+                tasks.append({
+                    'src_table': table['src_table']
+                    , 'dst_table': table['dst_table']
+                    , 'bytes': (table['bytes'] // (total_chunks * total_slices)
+                        if table['bytes'] is not None else None)
+                    , 'CofC': format_CofC % (chunk, total_chunks)
+                    , 'SofS': SofS
+                    , 'unload_sql': chunks_sql[chunk-1].rstrip().rstrip(';') + slice_clause
+                    , 'status': 'pending'
+                    , 'attempts': 0})
+        return tasks
+
+    def initial_chunk_rows(self, table):
+        """The rows of the first chunks of an adaptive copy, --chunk_rows or the
+        optimal chunk rows of the table estimated by yb_chunk_optimal_rows_p."""
+        if self.args_handler.args.chunk_rows:
+            return self.args_handler.args.chunk_rows
+        (database, schema, table_name) = Common.split_db_object_name(table['src_table'])
+        cmd_results = StoredProc('yb_chunk_optimal_rows_p', self.src_conn).call_proc_as_anonymous_block(
+            args = {
+                'a_table'      : table_name.replace('"', '')
+                , 'a_schema'   : (schema or self.src_conn.schema).replace('"', '')
+                , 'a_database' : database or self.src_conn.database})
+        cmd_results.on_error_exit()
+        # the proc's minimum chunk size
+        return cmd_results.proc_return or 10000000
+
+    def chunk_groups(self, table, state):
+        """Get the row groups of a table, the adaptive chunks are built from the
+        groups.
+
+        Like yb_chunk_dml_by_integer_highcard_p, the rows are grouped by the high
+        bits of rowunique, the groups are small enough to build chunks down to
+        1/64 of the first chunk size.  Only the groups not copied yet are read.
+
+        :return: a list of the tuples of the group's first rowunique and row count
+        """
+        sql_query = """
+SELECT MIN(rowunique) AS start_val, COUNT(*) AS cnt
+FROM {table}
+WHERE {where_clause}{from_clause}
+GROUP BY rowunique >> {bit_shift}
+ORDER BY 1""".format(
+            table=Common.quote_object_paths(table['src_table'])
+            , where_clause=(self.args_handler.args.where_clause or 'TRUE')
+            , from_clause=(' AND rowunique >= %d' % state['next_start']
+                if state['next_start'] is not None else '')
+            , bit_shift=(state['initial_rows'] // 64).bit_length())
+
+        cmd_result = self.src_conn.ybsql_query(sql_query)
+        cmd_result.on_error_exit()
+        return [tuple([int(value) for value in line.split('|')])
+            for line in cmd_result.stdout.strip().split('\n') if '|' in line]
+
+    def adaptive_tasks(self, table):
+        """Generate the tasks of a table in chunks that are sized toward
+        --chunk_target_secs, see adapt_chunk_rows.
+
+        The chunks are built one at a time as a pipeline is free to copy the
+        next chunk, so each chunk is sized from the throughput of the chunks
+        copied before it.  The generator's progress is kept in self.adaptive,
+        which is recorded in the manifest so --resume continues from it.
+        """
+        state = self.adaptive[table['src_table']]
+        if state['done']:
+            return
+        groups = self.chunk_groups(table, state)
+        total_rows = sum([cnt for (start_val, cnt) in groups])
+        if state['total_rows'] is None:
+            state['total_rows'] = total_rows
+        bytes_per_row = ((table['bytes'] / float(state['total_rows']))
+            if table['bytes'] is not None and state['total_rows'] else None)
+
+        format_CofC = 'chunk%d'
+        if self.multi_table:
+            format_CofC = '%s_%s' % (re.sub(r'[^A-Za-z0-9_.-]', '_', table['src_table']), format_CofC)
+
+        group = 0
+        while True:
+            first_val = state['next_start']
+            rows = 0
+            while group < len(groups):
+                rows += groups[group][1]
+                group += 1
+                if rows >= state['target_rows']:
+                    break
+            is_last = (group >= len(groups))
+            state['chunks'] += 1
+            state['next_start'] = None if is_last else groups[group][0]
+            state['done'] = is_last
+
+            if not groups:
+                chunk_clause = 'FALSE /* dummy chunk when source table is empty */'
+            else:
+                chunk_clause = ('/* chunk_clause(chunk: %d, size: %d) >>>*/ %s /*<<< chunk_clause */' % (
+                    state['chunks'], rows, ' AND '.join(
+                        ([] if first_val is None else ['%d <= rowunique' % first_val])
+                        + ([] if is_last else ['rowunique < %d' % state['next_start']])) or 'TRUE'))
+            yield {
+                'src_table': table['src_table']
+                , 'dst_table': table['dst_table']
+                , 'bytes': (int(rows * bytes_per_row) if bytes_per_row is not None else None)
+                , 'CofC': format_CofC % state['chunks']
+                , 'SofS': ''
+                , 'unload_sql': '%s AND %s' % (self.table_unload_sql(table['src_table']), chunk_clause)
+                , 'status': 'pending'
+                , 'attempts': 0
+                , 'adaptive': True}
+            if is_last:
+                return
+
+    def adapt_chunk_rows(self, task):
+        """Resize the later chunks of a table from the throughput of its copied
+        chunk, toward chunks that take --chunk_target_secs to copy.
+
+        The rows/s of the table is smoothed over its copied chunks, and a chunk
+        is resized to no less than 1/8 and no more than 8 times the first chunk
+        size, so a single slow or fast chunk doesn't swing the size.
+        """
+        state = self.adaptive.get(task['src_table'])
+        if not (state and task.get('adaptive') and task['rows'] and task['duration']):
+            return
+        rows_per_s = task['rows'] / max(task['duration'], 0.001)
+        state['rows_per_s'] = (rows_per_s if state['rows_per_s'] is None
+            else (state['rows_per_s'] + rows_per_s) / 2)
+        state['target_rows'] = int(min(max(
+            state['rows_per_s'] * state['chunk_target_secs']
+            , state['initial_rows'] // 8), state['initial_rows'] * 8))
+        if Common.verbose >= 1:
+            print('-- %s, chunk rows/s: %.1f, MB/s: %s, next chunk rows: %d' % (
+                task['src_table'], rows_per_s
+                , ('%.2f' % self.mb_per_s(task['read_bytes'], task['duration'])
+                    if task['read_bytes'] is not None else 'unknown')
+                , state['target_rows']))
+
+    def task_copy_cmd(self, task):
+        dst_table = Common.quote_object_paths(task['dst_table'])
+        if Common.is_windows:
+            dst_table = dst_table.replace('"','"\\""')
+        return self.table_copy_cmd.format(
+            unload_sql=task['unload_sql'], CofC=task['CofC'], SofS=task['SofS'], dst_table=dst_table)
+
+    def copy_task(self, task):
+        """Copy a task with a ybunload/ybload pipeline, run by the threads of the pool.
+
+        A failed copy is retried up to --retries times, a failed ybload loads
+        no rows so the task is copied again from the start.
+
+        :return: the task, with the cmd, the ybload 'SUCCESSFUL BULK LOAD' log
+            line, the rows loaded and the start, end and duration of the copy added
+        """
+        copy_cmd = self.task_copy_cmd(task)
+        ybload_log_file_name = self.log_file_name_template.format(
+            log_type='ybload').format(CofC=task['CofC'], SofS=task['SofS'])
+        retries = self.args_handler.args.retries
+        for retry in range(retries + 1):
+            if retry:
+                delay = min(10 * 2 ** (retry - 1), 300)
+                print('-- %s%s failed, retry %d of %d in %d seconds' % (
+                    task['CofC'], task['SofS'], retry, retries, delay))
+                time.sleep(delay)
+
+            task['attempts'] += 1
+            task['running_since'] = time.time()
+            task['cmd'] = Cmd(copy_cmd, False)
+            task['running_since'] = None
+            task['start'] = task['cmd'].start_ts
+            task['end'] = time.time()
+            task['duration'] = task['end'] - task['start']
+            task['exit_code'] = task['cmd'].exit_code
+            task['log_file'] = ybload_log_file_name
+
+            task['loaded_line'] = None
+            task['rows'] = None
+            task['read_bytes'] = None
+            if task['cmd'].exit_code == 0 and os.path.exists(ybload_log_file_name):
+                with open(ybload_log_file_name, "r") as file:
                     for line in file:
                         if re.search('SUCCESSFUL BULK LOAD', line):
-                            loaded = True
-                            sys.stdout.write(line)
+                            task['loaded_line'] = line
+                            matches = re.search(r'Loaded (\d+) good rows', line)
+                            task['rows'] = int(matches.group(1)) if matches else None
+                            task['read_bytes'] = self.loaded_line_bytes(line)
                             break
+            if task['loaded_line']:
+                break
+        return task
 
-                if not loaded:
-                    cmd.write()
-                    log_file_name = self.log_file_name_template.format(
-                        log_type='*').format(
-                            CofC=CofC
-                            , TofT=cmd.TofT)
-                    print('Table Copy {}, please review the log files: {}'.format(
-                        Text.color('Failed', 'red'), log_file_name))
-                    thread_exit_code = cmd.exit_code
-                    thread_failed = True
+    # the task keys recorded in the manifest
+    manifest_task_keys = ('src_table', 'dst_table', 'bytes', 'CofC', 'SofS', 'unload_sql', 'status', 'attempts', 'rows'
+        , 'read_bytes', 'adaptive'
+        , 'exit_code', 'start', 'end', 'duration', 'log_file')
+
+    def read_manifest(self, manifest_file):
+        """Read the manifest of a copy to resume, it must be a copy of the same
+        source and destination table."""
+        import json
+        try:
+            manifest = json.loads(Common.read_file(manifest_file))
+        except (IOError, OSError, ValueError) as error:
+            Common.error('the manifest could not be read: %s' % error)
+
+        args = self.args_handler.args
+        for arg in ('src_table', 'dst_table', 'dst_schema', 'where_clause'):
+            if manifest.get(arg) != getattr(args, arg):
+                Common.error("the manifest is of a different copy, --%s: %s, manifest %s: %s" % (
+                    'unload_where_clause' if arg == 'where_clause' else arg
+                    , getattr(args, arg), arg, manifest.get(arg)))
+        return manifest
+
+    def write_manifest(self, tasks):
+        """Write the manifest of the copy, the manifest is replaced in one step so
+        it is never left partially written."""
+        import json, tempfile
+        args = self.args_handler.args
+        manifest = {
+            'src_host': self.src_conn.env['host'], 'src_db': self.src_conn.database
+            , 'src_table': args.src_table
+            , 'dst_host': self.dst_conn.env['host'], 'dst_db': self.dst_conn.database
+            , 'dst_table': args.dst_table
+            , 'dst_schema': args.dst_schema
+            , 'where_clause': args.where_clause
+            , 'chunk_rows': args.chunk_rows
+            , 'adaptive': self.adaptive
+            , 'updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            , 'tasks': [dict([(key, task.get(key)) for key in self.manifest_task_keys])
+                for task in tasks] }
+
+        manifest_dir = os.path.dirname(self.manifest_file) or '.'
+        (fd, tmp_file) = tempfile.mkstemp(prefix='.manifest.', dir=manifest_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        if Common.is_windows and os.path.exists(self.manifest_file):
+            os.remove(self.manifest_file)
+        os.rename(tmp_file, self.manifest_file)
+
+    size_units = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+    @staticmethod
+    def log_line_stats(line):
+        """Get the rows and bytes read reported by a ybunload/ybload log line, like
+        the progress lines '... 1,234,567 rows ... READ: 1.2GB ...'.
+
+        :return: a tuple of the rows and the bytes, None when the line doesn't have them
+        """
+        rows = None
+        read_bytes = None
+        matches = re.findall(r'([\d,]+)\s+(?:good\s+)?rows\b(?!/)', line)
+        if matches:
+            rows = int(matches[-1].replace(',', ''))
+        matches = re.search(r'\bREAD:?\s+([\d.]+)\s*([KMGT]?)i?B\b(?!/)', line, re.IGNORECASE)
+        if matches:
+            read_bytes = int(float(matches.group(1))
+                * yb_to_yb_copy_table.size_units[matches.group(2).upper()])
+        return (rows, read_bytes)
+
+    @staticmethod
+    def loaded_line_bytes(line):
+        """Get the bytes read by a load from its 'SUCCESSFUL BULK LOAD' log line, the
+        line has the READ rate and the load duration, like:
+        'Loaded 2560 good rows in   0:00:06 (READ: 109.6KB/s WRITE: 58.92KB/s)'"""
+        duration = re.search(r' in\s+(\d+):(\d{2}):(\d{2})', line)
+        rate = re.search(r'READ:\s*([\d.]+)\s*([KMGT]?)i?B/s', line, re.IGNORECASE)
+        if not (duration and rate):
+            return None
+        seconds = int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + int(duration.group(3))
+        return int(float(rate.group(1)) * yb_to_yb_copy_table.size_units[rate.group(2).upper()] * seconds)
+
+    @staticmethod
+    def mb_per_s(read_bytes, duration):
+        return (read_bytes / 1024.0 ** 2) / max(duration, 0.001)
+
+    def monitor(self, tasks, stop, start_ts):
+        """Print a live progress line every --progress_interval seconds, run by the
+        monitor thread while the tasks are copied.
+
+        The logs of the running pipelines are tailed for the rows and bytes they
+        have read so far, each progress line is also kept as a sample for the
+        metrics file.
+        """
+        offsets = {}
+        log_stats = {}
+        (last_ts, last_rows, last_bytes) = (start_ts, 0, 0)
+        while not stop.wait(self.args_handler.args.progress_interval):
+            now = time.time()
+            (rows, read_bytes, pipeline_mb_per_s) = (0, 0, [])
+            for task in tasks:
+                if task.get('running_since'):
+                    (task_rows, task_bytes) = (0, 0)
+                    for log_type in ('ybunload', 'ybload'):
+                        log_file_name = self.log_file_name_template.format(
+                            log_type=log_type).format(CofC=task['CofC'], SofS=task['SofS'])
+                        (line_rows, line_bytes) = self.tail_log_stats(log_file_name, offsets, log_stats)
+                        (task_rows, task_bytes) = (max(task_rows, line_rows), max(task_bytes, line_bytes))
+                    rows += task_rows
+                    read_bytes += task_bytes
+                    pipeline_mb_per_s.append(self.mb_per_s(task_bytes, now - task['running_since']))
+                elif task['status'] == 'copied' and (task.get('end') or 0) >= start_ts:
+                    # the end of a task read from the task file of an earlier run may be None
+                    rows += task['rows'] or 0
+                    read_bytes += task['read_bytes'] or 0
+
+            sample = {
+                'elapsed': round(now - start_ts, 1), 'pipelines': len(pipeline_mb_per_s)
+                , 'rows': rows, 'read_bytes': read_bytes
+                # the rates are clamped at 0 when a completed task reports fewer
+                #   rows or bytes than its log did while it ran
+                , 'rows_per_s': round(max(0, rows - last_rows) / max(now - last_ts, 0.001), 1)
+                , 'mb_per_s': round(self.mb_per_s(max(0, read_bytes - last_bytes), now - last_ts), 3)}
+            self.samples.append(sample)
+            (last_ts, last_rows, last_bytes) = (now, rows, read_bytes)
+            print('-- live, pipelines: %d, rows: %d, MB: %.1f, rows/s: %.1f, MB/s: %.2f%s' % (
+                sample['pipelines'], rows, read_bytes / 1024.0 ** 2, sample['rows_per_s'], sample['mb_per_s']
+                , (', pipeline MB/s min: %.2f, max: %.2f' % (min(pipeline_mb_per_s), max(pipeline_mb_per_s))
+                    if pipeline_mb_per_s else '')))
+            sys.stdout.flush()
+
+    @staticmethod
+    def tail_log_stats(log_file_name, offsets, log_stats):
+        """Read the lines added to a log file since it was last read.
+
+        :return: the last rows and bytes read reported by the log, 0 if none yet
+        """
+        (rows, read_bytes) = log_stats.get(log_file_name, (0, 0))
+        try:
+            with open(log_file_name, 'r') as file:
+                file.seek(offsets.get(log_file_name, 0))
+                data = file.read()
+                # a partially written last line is read again the next time
+                data = data[:data.rfind('\n') + 1]
+                offsets[log_file_name] = offsets.get(log_file_name, 0) + len(data)
+        except (IOError, OSError):
+            return (rows, read_bytes)
+        for line in data.split('\n'):
+            (line_rows, line_bytes) = yb_to_yb_copy_table.log_line_stats(line)
+            rows = line_rows if line_rows is not None else rows
+            read_bytes = line_bytes if line_bytes is not None else read_bytes
+        log_stats[log_file_name] = (rows, read_bytes)
+        return (rows, read_bytes)
+
+    def write_metrics(self, tasks, copy_tasks, start_ts, recopy=False):
+        """Write the throughput of the copy, of each task copied by this run and
+        the live progress samples to the metrics file.  The metrics of the recopy
+        of verify_and_recopy are written to a _recopy file next to it, so the
+        metrics of the copy are kept."""
+        import json
+        args = self.args_handler.args
+        duration = time.time() - start_ts
+        copied = [task for task in copy_tasks if task['status'] == 'copied']
+        rows = sum([task['rows'] or 0 for task in copied])
+        read_bytes = sum([task['read_bytes'] or 0 for task in copied])
+        metrics = {
+            'run_id': Common.get_run_id(), 'manifest': self.manifest_file
+            , 'threads': args.threads, 'chunk_rows': args.chunk_rows
+            , 'tasks_copied': len(copied), 'tasks_failed': len([task for task in copy_tasks if task['status'] == 'failed'])
+            , 'duration': round(duration, 3), 'rows': rows, 'read_bytes': read_bytes
+            , 'rows_per_s': round(rows / max(duration, 0.001), 1)
+            , 'mb_per_s': round(self.mb_per_s(read_bytes, duration), 3)
+            , 'tasks': [{
+                'src_table': task['src_table'], 'task': task['CofC'] + task['SofS'], 'status': task['status']
+                , 'attempts': task['attempts'], 'rows': task.get('rows'), 'read_bytes': task.get('read_bytes')
+                , 'duration': (round(task['duration'], 3) if task.get('duration') is not None else None)
+                , 'rows_per_s': (round(task['rows'] / max(task['duration'], 0.001), 1)
+                    if task.get('rows') is not None else None)
+                , 'mb_per_s': (round(self.mb_per_s(task['read_bytes'], task['duration']), 3)
+                    if task.get('read_bytes') is not None else None)}
+                for task in copy_tasks if task.get('duration') is not None]
+            , 'samples': self.samples}
+        metrics_file = args.metrics_file or '%s_metrics.json' % self.log_file_prefix
+        if recopy:
+            metrics_file = '%s_recopy%s' % os.path.splitext(metrics_file)
+        try:
+            with open(metrics_file, 'w') as f:
+                json.dump(metrics, f, indent=1)
+        except (IOError, OSError) as error:
+            Common.error('the metrics file could not be written: %s' % error, exit_code=None)
+
+    def report_task(self, task):
+        """Print the result and throughput of a copied task.
+
+        :return: True if the task was loaded
+        """
+        print('-- %s%s%s' % (task['CofC'], task['SofS']
+            , (', rows: %d, duration: %s, rows/s: %.1f%s' % (
+                task['rows'], timedelta(seconds=int(round(task['duration'])))
+                , task['rows'] / max(task['duration'], 0.001)
+                , (', MB/s: %.2f' % self.mb_per_s(task['read_bytes'], task['duration'])
+                    if task['read_bytes'] is not None else ''))
+                if task['rows'] is not None else '')))
+        if task['loaded_line']:
+            sys.stdout.write(task['loaded_line'])
+            return True
+
+        task['cmd'].write()
+        log_file_name = self.log_file_name_template.format(
+            log_type='*').format(CofC=task['CofC'], SofS=task['SofS'])
+        print('Table Copy {}, please review the log files: {}'.format(
+            Text.color('Failed', 'red'), log_file_name))
+        return False
+
+    @staticmethod
+    def task_weights(tasks):
+        """The share of the copy of each task, by the estimated bytes of the task,
+        or by the task count when the bytes are not known."""
+        weights = [task.get('bytes') or 0 for task in tasks]
+        if not sum(weights):
+            weights = [1] * len(tasks)
+        return weights
+
+    def report_progress(self, tasks, copy_tasks, start_ts):
+        """Print the progress of a multi-table copy and the estimated time to
+        finish, from the bytes copied by this run so far."""
+        weights = self.task_weights(tasks)
+        copied_weight = sum([weight for (task, weight) in zip(tasks, weights) if task['status'] == 'copied'])
+        copy_task_ids = set([id(task) for task in copy_tasks])
+        run_weight = sum([weight for (task, weight) in zip(tasks, weights)
+            if task['status'] == 'copied' and id(task) in copy_task_ids])
+        tables = sorted(set([task['src_table'] for task in tasks]))
+        copied_tables = [table for table in tables
+            if not [task for task in tasks if task['src_table'] == table and task['status'] != 'copied']]
+        elapsed = time.time() - start_ts
+        eta = (elapsed * (sum(weights) - copied_weight) / run_weight) if run_weight else None
+        print('-- progress, tables: %d of %d, tasks: %d of %d, %.1f%%, elapsed: %s, ETA: %s' % (
+            len(copied_tables), len(tables)
+            , len([task for task in tasks if task['status'] == 'copied']), len(tasks)
+            , 100.0 * copied_weight / sum(weights)
+            , timedelta(seconds=int(round(elapsed)))
+            , (timedelta(seconds=int(round(eta))) if eta is not None else 'unknown')))
+
+    def report_tables(self, tasks):
+        """Print a summary line for each table of a multi-table copy."""
+        for src_table in sorted(set([task['src_table'] for task in tasks])
+            , key=[task['src_table'] for task in tasks].index):
+            table_tasks = [task for task in tasks if task['src_table'] == src_table]
+            statuses = set([task['status'] for task in table_tasks])
+            status = ('failed' if 'failed' in statuses
+                else ('copied' if statuses == set(['copied']) else 'pending'))
+            print('-- table: %s, to: %s, status: %s, tasks: %d of %d, rows: %d, copy time: %s' % (
+                src_table, table_tasks[0]['dst_table']
+                , Text.color(status, fg=('green' if status == 'copied' else 'red'))
+                , len([task for task in table_tasks if task['status'] == 'copied']), len(table_tasks)
+                , sum([task.get('rows') or 0 for task in table_tasks])
+                , timedelta(seconds=int(round(sum([task.get('duration') or 0 for task in table_tasks]))))))
+
+    def copy(self, tasks, task_source=None, recopy=False):
+        """Copy the tasks with a pool of --threads ybunload/ybload pipelines.
+
+        A task is started as soon as a pipeline is done with its last task, so a
+        slow chunk only holds up its own pipeline.  The tasks of task_source, a
+        generator of the adaptive chunks, are only built as a pipeline is free to
+        copy them, see adaptive_tasks.  After a failed task no new tasks are
+        started, the tasks already running are finished.  The manifest is written
+        as each task completes, the tasks already copied are skipped.  The metrics
+        of a recopy are written to a file of their own, see write_metrics.
+
+        :return: the exit code of the first failed task, or 0
+        """
+        copy_tasks = [task for task in tasks if task['status'] != 'copied']
+        if len(copy_tasks) < len(tasks):
+            print('-- skipped copied tasks: %d' % (len(tasks) - len(copy_tasks)))
+
+        def pending_tasks():
+            for task in list(copy_tasks):
+                yield task
+            for task in (task_source or []):
+                tasks.append(task)
+                copy_tasks.append(task)
+                yield task
+        next_tasks = pending_tasks()
+
+        self.write_manifest(tasks)
+        exit_code = 0
+        copied_rows = 0
+        start_ts = time.time()
+
+        self.samples = []
+        stop_monitor = threading.Event()
+        if self.args_handler.args.progress_interval:
+            monitor = threading.Thread(target=self.monitor, args=(tasks, stop_monitor, start_ts))
+            monitor.daemon = True
+            monitor.start()
+
+        try:
+            for task in Common.run_threaded(self.copy_task, next_tasks, self.args_handler.args.threads
+                , is_stopped=lambda: exit_code):
+                if self.report_task(task):
+                    task['status'] = 'copied'
+                    copied_rows += task['rows'] or 0
+                    self.adapt_chunk_rows(task)
+                else:
+                    task['status'] = 'failed'
+                    if not exit_code:
+                        exit_code = task['cmd'].exit_code or 1
+                self.write_manifest(tasks)
+                if self.multi_table:
+                    self.report_progress(tasks, copy_tasks, start_ts)
+        finally:
+            stop_monitor.set()
+
+        self.write_metrics(tasks, copy_tasks, start_ts, recopy)
+        if self.multi_table:
+            self.report_tables(tasks)
+
+        if exit_code:
+            print('-- copied tasks: %d of %d, to resume the copy, run with: --resume %s' % (
+                len([task for task in tasks if task['status'] == 'copied']), len(tasks)
+                , self.manifest_file))
+        elif len(copy_tasks) > 1:
+            duration = time.time() - start_ts
+            copied_bytes = sum([task['read_bytes'] or 0 for task in copy_tasks])
+            print('-- copied tasks: %d, rows: %d, duration: %s, rows/s: %.1f, MB/s: %.2f' % (
+                len(copy_tasks), copied_rows, timedelta(seconds=int(round(duration)))
+                , copied_rows / max(duration, 0.001), self.mb_per_s(copied_bytes, duration)))
+        return exit_code
+
+    def table_columns(self, src_table):
+        """Get the column names of a source table, in column order."""
+        (database, schema, table) = Common.split_db_object_name(src_table)
+        (schema, table) = [(name[1:-1] if name.startswith('"') else name.lower())
+            for name in (schema or self.src_conn.schema, table)]
+        sql_query = """
+SELECT a.attname
+FROM
+    sys.table AS t
+    JOIN sys.schema AS s
+        ON t.schema_id = s.schema_id AND t.database_id = s.database_id
+    JOIN pg_catalog.pg_attribute AS a
+        ON a.attrelid = t.table_id
+WHERE
+    t.database_id = (SELECT database_id FROM sys.database WHERE name = CURRENT_DATABASE())
+    AND s.name = '{schema}'
+    AND t.name = '{table}'
+    AND a.attnum > 0
+ORDER BY a.attnum""".format(schema=schema.replace("'", "''"), table=table.replace("'", "''"))
+
+        cmd_result = self.src_conn.ybsql_query(sql_query)
+        cmd_result.on_error_exit()
+        columns = [column for column in cmd_result.stdout.strip().split('\n') if column]
+        if not columns:
+            Common.error('the columns of the source table could not be found: %s' % src_table)
+        return columns
+
+    def row_bucket_sql(self, columns):
+        """The bucket of a row, from the hash of its column values, so the same
+        rows are in the same bucket in the source and destination table."""
+        return 'MOD(MOD({row_hash}, {buckets}) + {buckets}, {buckets})'.format(
+            row_hash=Common.row_hash_sql(columns), buckets=self.args_handler.args.verify_buckets)
+
+    def bucket_hashes(self, db_conn, table, columns, where_clause):
+        """Get the row count and the sum of the row hashes of each bucket of a
+        table, the sum doesn't depend on the order the rows are read in.
+
+        :return: a dictionary of the (row count, hash sum) tuple of each bucket
+        """
+        sql_query = """
+SELECT
+    MOD(MOD(row_hash, {buckets}) + {buckets}, {buckets}) AS bucket
+    , COUNT(*) AS cnt
+    , SUM(row_hash::NUMERIC(38,0)) AS hash_sum
+FROM (
+    SELECT {row_hash} AS row_hash
+    FROM {table}
+    WHERE {where_clause}
+) AS r
+GROUP BY 1
+ORDER BY 1""".format(
+            buckets=self.args_handler.args.verify_buckets
+            , row_hash=Common.row_hash_sql(columns)
+            , table=Common.quote_object_paths(table)
+            , where_clause=(where_clause or 'TRUE'))
+
+        cmd_result = db_conn.ybsql_query(sql_query)
+        cmd_result.on_error_exit()
+        hashes = {}
+        for line in cmd_result.stdout.strip().split('\n'):
+            if '|' in line:
+                (bucket, cnt, hash_sum) = line.split('|')
+                hashes[int(bucket)] = (int(cnt), hash_sum)
+        return hashes
+
+    def verify(self, tables):
+        """Compare the buckets of rows of the source and destination tables, see
+        bucket_hashes.  The source and destination of every table are read at the
+        same time, by --threads threads.
+
+        Like the source table, the destination table is only compared for the
+        rows of the --unload_where_clause, the other rows of the destination table
+        are neither compared nor deleted by verify_and_recopy.
+
+        :return: a list of the tables with mismatched buckets, with the columns
+            and the mismatched buckets of each table
+        """
+        threads = max(2, self.args_handler.args.threads)
+        columns = Common.map_threaded(lambda table: self.table_columns(table['src_table']), tables, threads)
+        table_hashes = Common.map_threaded(
+            lambda conn_table_columns: self.bucket_hashes(*conn_table_columns)
+            , [(conn, table[table_key], table_columns, self.args_handler.args.where_clause)
+                for (table, table_columns) in zip(tables, columns)
+                for (conn, table_key) in ((self.src_conn, 'src_table'), (self.dst_conn, 'dst_table'))]
+            , threads)
+        hashes = list(zip(table_hashes[0::2], table_hashes[1::2]))
+
+        mismatched_tables = []
+        for (table, table_columns, (src_hashes, dst_hashes)) in zip(tables, columns, hashes):
+            buckets = sorted([bucket for bucket in set(src_hashes.keys()) | set(dst_hashes.keys())
+                if src_hashes.get(bucket) != dst_hashes.get(bucket)])
+            print('-- verify %s, src rows: %d, dst rows: %d, buckets: %d, mismatched buckets: %s' % (
+                table['src_table']
+                , sum([cnt for (cnt, hash_sum) in src_hashes.values()])
+                , sum([cnt for (cnt, hash_sum) in dst_hashes.values()])
+                , self.args_handler.args.verify_buckets
+                , Text.color(str(len(buckets)), fg=('red' if buckets else 'green'))))
+            if buckets:
+                mismatched_tables.append(dict(table, columns=table_columns, buckets=buckets))
+        return mismatched_tables
+
+    def verify_and_recopy(self, tasks):
+        """Verify the copied tables, the rows of the mismatched buckets of a table
+        are deleted from the destination table and copied again by a single task,
+        then the table is verified again.
+
+        :return: the exit code of the recopy, or 1 if a table still mismatches
+        """
+        tables = []
+        for task in tasks:
+            table = {'src_table': task['src_table'], 'dst_table': task['dst_table'], 'bytes': None}
+            if table not in tables:
+                tables.append(table)
+
+        mismatched_tables = self.verify(tables)
+        if not mismatched_tables:
+            return 0
+
+        for table in mismatched_tables:
+            bucket_clause = '%s IN (%s)' % (
+                self.row_bucket_sql(table['columns']), ', '.join([str(bucket) for bucket in table['buckets']]))
+            cmd_result = self.dst_conn.ybsql_query('DELETE FROM %s WHERE %s AND %s' % (
+                Common.quote_object_paths(table['dst_table'])
+                , (self.args_handler.args.where_clause or 'TRUE'), bucket_clause))
+            cmd_result.on_error_exit()
+            tasks.append({
+                'src_table': table['src_table']
+                , 'dst_table': table['dst_table']
+                , 'bytes': None
+                , 'CofC': ('%s_recopy' % re.sub(r'[^A-Za-z0-9_.-]', '_', table['src_table'])
+                    if self.multi_table else 'recopy')
+                , 'SofS': ''
+                , 'unload_sql': '%s AND /* bucket_clause >>>*/ %s /*<<< bucket_clause */' % (
+                    self.table_unload_sql(table['src_table']), self.unload_escape(bucket_clause))
+                , 'status': 'pending'
+                , 'attempts': 0})
+
+        exit_code = self.copy(tasks, recopy=True)
+        if exit_code:
+            return exit_code
+        return (1 if self.verify([dict([(key, table[key]) for key in ('src_table', 'dst_table', 'bytes')])
+            for table in mismatched_tables]) else 0)
+
+    def adaptive_task_source(self):
+        """Chain the adaptive chunk generators of the tables not done yet, the
+        largest table first."""
+        tables = sorted([{
+                'src_table': src_table, 'dst_table': state['dst_table'], 'bytes': state['bytes']}
+            for (src_table, state) in self.adaptive.items() if not state['done']]
+            , key=lambda table: -(table['bytes'] or 0))
+        return itertools.chain(*[self.adaptive_tasks(table) for table in tables])
+
+    def execute(self):
+        args = self.args_handler.args
+        task_source = None
+        if args.resume:
+            # the chunks of the resumed copy are kept, the source table may have
+            #   changed since they were built
+            tasks = self.manifest['tasks']
+            self.manifest_file = args.resume
+            self.adaptive = self.manifest.get('adaptive') or {}
+            if self.adaptive:
+                task_source = self.adaptive_task_source()
+        elif args.chunk_target_secs:
+            tasks = []
+            self.adaptive = {}
+            for table in self.tables:
+                initial_rows = self.initial_chunk_rows(table)
+                self.adaptive[table['src_table']] = {
+                    'dst_table': table['dst_table'], 'bytes': table['bytes']
+                    , 'chunk_target_secs': args.chunk_target_secs
+                    , 'initial_rows': initial_rows, 'target_rows': initial_rows
+                    , 'rows_per_s': None, 'total_rows': None
+                    , 'next_start': None, 'chunks': 0, 'done': False}
+                if Common.verbose >= 1:
+                    print('-- %s, first chunk rows: %d' % (table['src_table'], initial_rows))
+            task_source = self.adaptive_task_source()
+            self.manifest_file = (args.manifest
+                or '%s_manifest.json' % self.log_file_prefix)
+        else:
+            self.adaptive = {}
+            # the tables are chunked at the same time, by --threads threads
+            tasks = sum(Common.map_threaded(self.table_tasks, self.tables, self.args_handler.args.threads), [])
+            self.manifest_file = (self.args_handler.args.manifest
+                or '%s_manifest.json' % self.log_file_prefix)
+
+        if self.args_handler.args.dry_run:
+            # the adaptive chunks are all built with their first size
+            for task in itertools.chain(tasks, task_source or []):
+                if task['status'] == 'copied':
+                    continue
+                print(self.task_copy_cmd(task))
+            exit(0)
+
+        os.environ['SRC_YBPASSWORD'] = self.src_conn.env['pwd']
+        os.environ['DST_YBPASSWORD'] = self.dst_conn.env['pwd']
 
-            if thread_failed:
-                exit(thread_exit_code)
+        exit_code = self.copy(tasks, task_source)
+        if not exit_code and args.verify:
+            exit_code = self.verify_and_recopy(tasks)
 
         del os.environ['SRC_YBPASSWORD']
         del os.environ['DST_YBPASSWORD']
 
-        exit(0)
+        exit(exit_code)
 
 def main():
     ytoy = yb_to_yb_copy_table(init_default=False)
@@ -117,7 +117,7 @@ class wl_profiler(Util):
             self.args_handler.args_parser.error("--dbuser '%s' must be a db super user..." % self.db_conn.ybdb['user'])
 
         non_su_sql = "SELECT COUNT(*) FROM sys.user WHERE name = '%s' AND NOT superuser;" % self.args_handler.args.non_su
-        result = self.db_conn.ybsql_query(non_su_sql)
+        result = self.db_conn.ybsql_query(non_su_sql, cache=True)
         result.on_error_exit()
         if result.stdout.strip() != '1':
             self.args_handler.args_parser.error("--non_su '%s' must be a db non-super user..." % self.args_handler.args.non_su)
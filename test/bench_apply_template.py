@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark the template row protocol of Util.query_and_apply_template against
+the eval of Python dictionary code that the get_*_names utilities used before.
+
+No database is needed, the query output of both protocols is generated for
+synthetic table rows, like:
+
+    ./bench_apply_template.py --rows 1000000 --template '{table_path}'
+
+Both paths must produce the same output, the output is checked before the
+timings are printed.  The rows of the buffered query path, used by
+--exec_output and when a utility returns its output as a string, are checked
+against the rows read a line at a time.
+"""
+
+import argparse
+import os
+import sys
+import time
+path = os.path.dirname(sys.argv[0])
+if len(path) == 0:
+    path = '.'
+sys.path.append('%s/../bin/' % path)
+
+from datetime import datetime
+
+from yb_common import CmdResult, Common, Util
+
+class bench_args_handler:
+    def __init__(self, template):
+        self.args = argparse.Namespace(template=template, exec_output=False)
+
+class bench_db_conn:
+    ybdb = {'user': 'bench', 'host': 'localhost', 'is_super_user': True}
+
+    def __init__(self, stdout=''):
+        self.stdout = stdout
+
+    def ybsql_query(self, sql_query):
+        # the buffered query output of the row protocol
+        return CmdResult(stdout=self.stdout)
+
+def eval_apply_template(util, output_raw):
+    """The eval based Util.apply_template as it was before the row protocol."""
+    rows = eval('[%s]' % output_raw)
+
+    additional_vars = {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        , 'max_ordinal': len(rows)
+        , '^M': '\n' }
+
+    output_new = ''
+    for row in rows:
+        format = {}
+        for k, v in row.items():
+            if k in ('column', 'database', 'object', 'owner', 'schema', 'sequence', 'stored_proc', 'table', 'view'):
+                format[k] = Common.quote_object_paths(v.strip())
+            elif type(v) is str:
+                format[k] = v.strip()
+            else:
+                format[k] = v
+        for var in util.config['output_tmplt_vars']:
+            path_var = var.rsplit('_',1)
+            if len(path_var) == 2 and path_var[1] == 'path':
+                if path_var[0] in ['object', 'sequence', 'stored_proc', 'table', 'view']:
+                    format[var] = '%s.%s.%s' % (format['database'], format['schema'], format[path_var[0]])
+                elif path_var[0] in ('schema'):
+                    format[var] = '%s.%s' % (format['database'], format['schema'])
+
+        format.update(additional_vars)
+        format.update(util.db_conn.ybdb)
+        output_new += (util.args_handler.args.template.format(**format) + ('\n'))
+
+    return output_new
+
+def synthetic_rows(row_ct):
+    for i in range(row_ct):
+        yield ('dbo', 'db%d' % (i % 3), ('Prod' if i % 5 == 0 else 'dev'), 'table_%d' % i)
+
+def eval_protocol_lines(row_ct):
+    # the stdout of the old get_table_names query with the ordinal added
+    lines = []
+    for (ordinal, row) in enumerate(synthetic_rows(row_ct), 1):
+        lines.append(('{"ordinal":""\" %d ""\", "owner":""\" %s ""\","database":""\" %s ""\"'
+            ',"schema":""\" %s ""\","table":""\" %s ""\"}, ') % ((ordinal,) + row))
+    return lines
+
+def row_protocol_lines(row_ct):
+    return ['%s\n' % (chr(31).join(row) + chr(30)) for row in synthetic_rows(row_ct)]
+
+def main():
+    args_parser = argparse.ArgumentParser(
+        description='Benchmark the template row protocol against the eval of Python dictionary code.')
+    args_parser.add_argument('--rows', type=int, default=1000000, help='number of synthetic rows, defaults to 1000000')
+    args_parser.add_argument('--template', default='{table_path}', help="output template, defaults to '{table_path}'")
+    args = args_parser.parse_args()
+
+    util = Util(init_default=False, util_name='get_table_names')
+    util.config = {'output_tmplt_vars': ['table_path', 'schema_path', 'table', 'schema', 'database', 'owner']}
+    util.args_handler = bench_args_handler(args.template)
+    util.db_conn = bench_db_conn()
+    fields = ['owner', 'database', 'schema', 'table']
+
+    timings = []
+
+    lines = eval_protocol_lines(args.rows)
+    start = time.time()
+    eval_output = eval_apply_template(util, '\n'.join(lines))
+    timings.append(('eval', time.time() - start))
+    del lines
+
+    lines = row_protocol_lines(args.rows)
+    start = time.time()
+    rows_output = util.apply_template_rows(Util.template_rows(lines, fields))
+    timings.append(('row protocol', time.time() - start))
+
+    if rows_output != eval_output:
+        sys.stderr.write('ERROR:  the row protocol and eval outputs differ\n')
+        exit(1)
+
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        util.apply_template_rows(Util.template_rows(lines, fields), out=devnull)
+        timings.append(('row protocol written to out', time.time() - start))
+
+    # the buffered query path is checked with a template of all the fields, so
+    #   a value decoded wrong in any field is found
+    util.args_handler = bench_args_handler('{ordinal}|{owner}|{database}|{schema}|{table}')
+    util.db_conn = bench_db_conn(''.join(lines))
+    start = time.time()
+    query_output = util.query_and_apply_template('', fields)
+    timings.append(('row protocol buffered query', time.time() - start))
+
+    if query_output != util.apply_template_rows(Util.template_rows(lines, fields)):
+        sys.stderr.write('ERROR:  the buffered query and row protocol outputs differ\n')
+        exit(1)
+
+    print('rows: %d, template: %s' % (args.rows, args.template))
+    for (desc, seconds) in timings:
+        print('%-28s %8.2f seconds' % (desc, seconds))
+
+if __name__ == "__main__":
+    main()
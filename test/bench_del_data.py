@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark Report.del_data_to_list_data, the parser of delimited report
+output, and Report.del_lines_to_list_data, the parser of streamed report
+output used by Report.build, against matching every row with a regex as
+del_data_to_list_data did before.
+
+No database is needed, the payloads are synthetic reports, by default a
+10 column by 1M row report and an 80 column by 100k row report, like:
+
+    ./bench_del_data.py
+    ./bench_del_data.py --payload 20x50000 --delimiter psv
+
+Every 100th row has a value with an embedded newline.  The parsers must
+return the same rows, the rows are checked before the timings are printed.
+"""
+
+import argparse
+import gc
+import io
+import os
+import re
+import sys
+import time
+path = os.path.dirname(sys.argv[0])
+if len(path) == 0:
+    path = '.'
+sys.path.append('%s/../bin/' % path)
+
+from yb_common import Report
+
+def synthetic_payload(column_ct, row_ct, delimiter):
+    lines = [delimiter.join(['column_%d' % i for i in range(column_ct)])]
+    for row in range(row_ct):
+        values = []
+        for column in range(column_ct):
+            if column % 4 == 0:
+                values.append(str(row * column_ct + column))
+            elif column % 4 == 1:
+                values.append('2021-02-%02d 04:05:06' % (row % 28 + 1))
+            elif row % 100 == 0 and column % 4 == 2:
+                values.append('text value\nwith a newline %d' % row)
+            else:
+                values.append('text value %d' % row)
+        lines.append(delimiter.join(values))
+    return '\n'.join(lines)
+
+def regex_del_data_to_list_data(del_data, delimiter):
+    raw_data = del_data.split('\n', 1)
+    headers = raw_data[0].split(delimiter)
+    regex = re.compile(r"(^([^{delimiter}]*{delimiter}){{{row_delimiters}}}[^{delimiter}]*$)".format(
+        row_delimiters=(len(headers) - 1)
+        , delimiter=('\\%s' % hex(ord(delimiter))[1:]) ), re.MULTILINE)
+    return (headers, [match.groups(0)[0].split(delimiter) for match in regex.finditer(raw_data[1])])
+
+def lines_to_list_data(del_data, delimiter):
+    """Parse the payload as Report.build parses the streamed output of a report,
+    a line at a time.
+    """
+    rows = Report.del_lines_to_list_data(io.StringIO(del_data), delimiter)
+    headers = next(rows)
+    return (headers, list(rows))
+
+def main():
+    args_parser = argparse.ArgumentParser(
+        description='Benchmark the delimited report output parser against a regex match of each row.')
+    args_parser.add_argument('--payload', nargs='+', default=['10x1000000', '80x100000']
+        , help="payloads as <columns>x<rows>, defaults to '10x1000000 80x100000'")
+    args_parser.add_argument('--delimiter', choices=['formatted', 'psv'], default='formatted'
+        , help="the unit separator delimiter of a formatted report or the '|' of a psv report"
+            ", defaults to formatted")
+    args = args_parser.parse_args()
+
+    delimiter = chr(31) if args.delimiter == 'formatted' else '|'
+    for payload in args.payload:
+        (column_ct, row_ct) = [int(i) for i in payload.split('x')]
+        del_data = synthetic_payload(column_ct, row_ct, delimiter)
+
+        timings = []
+        for (desc, parse) in (
+            ('regex', lambda: regex_del_data_to_list_data(del_data, delimiter))
+            , ('del_data_to_list_data', lambda: Report.del_data_to_list_data(del_data, delimiter))
+            , ('del_data_to_column_data', lambda: Report.del_data_to_column_data(del_data, delimiter, row_ct=row_ct))
+            , ('del_lines_to_list_data', lambda: lines_to_list_data(del_data, delimiter)) ):
+            # each parser starts with only the payload in memory
+            gc.collect()
+            start = time.time()
+            parsed = parse()
+            timings.append((desc, time.time() - start))
+            del parsed
+
+        rows = Report.del_data_to_list_data(del_data, delimiter)
+        if (rows != regex_del_data_to_list_data(del_data, delimiter)
+            or rows != lines_to_list_data(del_data, delimiter)
+            or len(rows[1]) != row_ct):
+            sys.stderr.write('ERROR:  the %s payload parsed rows differ\n' % payload)
+            exit(1)
+        del rows
+
+        print('%d columns x %d rows, %d MB' % (column_ct, row_ct, len(del_data) // 2**20))
+        for (desc, seconds) in timings:
+            print('    %-24s %8.2f seconds' % (desc, seconds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark the cold start of the utilities, the time python takes to import
+the modules a utility needs before it runs, like:
+
+    ./bench_startup.py
+    ./bench_startup.py --utils yb_get_table_names yb_sysprocs_query --budget_ms 50
+
+Each utility is run with --help under `python -X importtime`, no database is
+needed.  The import time of a utility is the sum of the modules it imports,
+the modules python imports at startup for any script are not counted, the
+best of --runs runs is reported.
+
+The benchmark fails, with exit code 1, if a utility's import time is over
+--budget_ms or if a utility imports a module from --forbid at startup, the
+forbidden modules are only needed by some runs of some utilities and are
+imported where they are used.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from glob import glob
+path = os.path.dirname(sys.argv[0])
+if len(path) == 0:
+    path = '.'
+bin_path = os.path.normpath('%s/../bin' % path)
+sys.path.append(bin_path)
+
+from yb_common import Text
+
+# the yb_*.py files in bin/ which are modules or templates, not utilities
+modules = ('yb_common', 'yb_pgwire', 'yb_sp_report_util', 'yb_sysprocs_template')
+
+def import_times(cmd):
+    """Run cmd under -X importtime.
+
+    :return: a tuple of the exit code and a dictionary of the cumulative
+        microseconds of each top level import
+    """
+    p = subprocess.Popen([sys.executable, '-X', 'importtime'] + cmd
+        , stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    (stdout, stderr) = p.communicate()
+
+    times = {}
+    # like: "import time:       345 |       1366 |   os", the indent of the
+    #   module name is the import depth
+    for line in stderr.decode('utf-8').splitlines():
+        matches = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|( *)(\S+)$', line)
+        if matches:
+            times[matches.group(3)] = (
+                int(matches.group(1)) if len(matches.group(2)) == 1 else times.get(matches.group(3), 0))
+    return (p.returncode, times)
+
+def main():
+    args_parser = argparse.ArgumentParser(
+        description='Benchmark the cold start import time of the utilities.')
+    args_parser.add_argument('--utils', nargs='+'
+        , help='utilities to benchmark, like yb_get_table_names, defaults to all the utilities')
+    args_parser.add_argument('--runs', type=int, default=5
+        , help='runs of each utility, the best run is reported, defaults to 5')
+    args_parser.add_argument('--budget_ms', type=float, default=100.0
+        , help='the import time budget of a utility in milliseconds, defaults to 100')
+    args_parser.add_argument('--forbid', nargs='*'
+        , default=['distutils', 'pkg_resources', 'pprint', 'setuptools', 'tabulate']
+        , help="modules a utility may not import at startup"
+            ", defaults to 'distutils pkg_resources pprint setuptools tabulate'")
+    args = args_parser.parse_args()
+
+    utils = args.utils or sorted([
+        os.path.splitext(os.path.basename(util_file))[0]
+        for util_file in glob(os.path.join(bin_path, 'yb_*.py'))
+        if os.path.splitext(os.path.basename(util_file))[0] not in modules])
+
+    # the modules imported at startup before any script runs
+    startup_modules = set(import_times(['-c', 'pass'])[1].keys())
+
+    failed_ct = 0
+    for util in utils:
+        util_file = os.path.join(bin_path, '%s.py' % util)
+        best_ms = None
+        best_wall_ms = None
+        for run in range(args.runs):
+            start = time.time()
+            (exit_code, times) = import_times([util_file, '--help'])
+            wall_ms = (time.time() - start) * 1000
+            ms = sum([us for (module, us) in times.items() if module not in startup_modules]) / 1000.0
+            best_ms = ms if best_ms is None else min(best_ms, ms)
+            best_wall_ms = wall_ms if best_wall_ms is None else min(best_wall_ms, wall_ms)
+
+        forbidden = sorted([module for module in args.forbid
+            if [imported for imported in times if imported == module or imported.startswith(module + '.')]])
+        passed = (exit_code == 0 and best_ms <= args.budget_ms and not forbidden)
+        if not passed:
+            failed_ct += 1
+        print('%s: %s, import: %6.1f ms, wall: %6.1f ms%s' % (
+            Text.color(util, style='bold')
+            , Text.color('Passed', fg='green') if passed else Text.color('Failed', fg='red')
+            , best_ms, best_wall_ms
+            , ((', forbidden imports: %s' % ', '.join(forbidden)) if forbidden else '')
+                + ((', exit code: %d' % exit_code) if exit_code else '')))
+
+    print('%s: %d, %s: %d, %s: %.1f ms' % (
+        Text.color('Utilities', style='bold'), len(utils)
+        , Text.color('Failed', style='bold'), failed_ct
+        , Text.color('Budget', style='bold'), args.budget_ms))
+    exit(1 if failed_ct else 0)
+
+main()
@@ -0,0 +1,69 @@
+# the timestamped lines of the run are mapped out, the number of chunks depends
+#   on the hash of the rows, the summary lines are checked
+map_out = [
+    { 'regex' : re.compile(r'^--\d{4}-\d{2}-\d{2} .*\n', re.MULTILINE), 'sub' : '' }
+    , { 'regex' : re.compile(r'(--Duration\s*: )\d+:\d{2}:\d{2}'), 'sub' : r'\1H:MM:SS' }
+    , { 'regex' : re.compile(r'(--Total Chunks\s*: )\d+'), 'sub' : r'\1N' } ]
+
+# the target table is kept by --post_sql '', every source row must be in it once,
+#   the source and target rows are counted and the target table is dropped
+count_and_drop_sql = (
+    """$env:YBPASSWORD='{user_password}'; ybsql -h {host} -U {user_name} -d {db1} -A -t -c 'SELECT (SELECT COUNT(*) FROM dev.data_types_t), (SELECT COUNT(*) FROM dev.new_chunked_hash_t); DROP TABLE dev.new_chunked_hash_t'"""
+    if Common.is_windows
+    else """YBPASSWORD={user_password} ybsql -h {host} -U {user_name} -d {db1} -A -t -c 'SELECT (SELECT COUNT(*) FROM dev.data_types_t), (SELECT COUNT(*) FROM dev.new_chunked_hash_t); DROP TABLE dev.new_chunked_hash_t'""")
+
+test_cases = [
+    test_case(
+        cmd=('yb_chunk_dml_by_hash.py @{argsdir}/yb_chunk_dml_by_hash__args1 '
+            '--execute_chunk_dml --post_sql "";'
+            ' %s') % count_and_drop_sql
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+--Total Rows         : 1000000
+--IS NULL Rows       : 0
+--Running total check: PASSED
+--Duration           : 0:00:03
+--Total Chunks       : 10
+--Failed Chunks      : 0
+--Sessions           : 1
+-- Completed DML chunking.
+1000000|1000000
+DROP TABLE"""
+        , stderr=''
+        , map_out=map_out)
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_hash.py @{argsdir}/yb_chunk_dml_by_hash__args1 '
+            '--columns col8 col10 --execute_chunk_dml --parallel_sessions 4 --post_sql "";'
+            ' %s') % count_and_drop_sql
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+--Total Rows         : 1000000
+--IS NULL Rows       : 0
+--Running total check: PASSED
+--Duration           : 0:00:03
+--Total Chunks       : 10
+--Failed Chunks      : 0
+--Sessions           : 4
+-- Completed DML chunking.
+1000000|1000000
+DROP TABLE"""
+        , stderr=''
+        , map_out=map_out)
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_hash.py @{argsdir}/yb_chunk_dml_by_hash__args1 '
+            '--columns col8 col10 --hash_buckets 1 --print_chunk_dml --verbose_chunk_off')
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+INSERT INTO {db1}.dev.new_chunked_hash_t SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 1, size: 1000000) >>>*/ MOD(MOD(HASH(NVL(col8::VARCHAR, CHR(30)) || CHR(31) || NVL(col10::VARCHAR, CHR(30))), 1) + 1, 1) BETWEEN 0 AND 0 /*<<< chunk_clause */;
+-- Completed DML chunking."""
+        , stderr='')
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_hash.py @{argsdir}/yb_chunk_dml_by_hash__args1 '
+            '--table {db1}.dev.dist_random_t --print_chunk_dml')
+        , exit_code=1
+        , stdout="""-- Running DML chunking."""
+        , stderr="""yb_chunk_dml_by_hash.py: the table '{db1}.dev.dist_random_t' has no distribution key, it is distributed RANDOM, use --columns to set the columns to hash""")
+]
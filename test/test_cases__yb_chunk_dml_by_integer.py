@@ -3,6 +3,23 @@ map_out = [
     , { 'regex' : re.compile(r'\d{2}:\d{2}:\d{2}.\d{1,6}'), 'sub' : 'HH:MM:SS.FFFFFF' }
     , { 'regex' : re.compile(r'\d{4}-\d{2}-\d{2}'), 'sub' : 'YYYY-MM-DD' } ]
 
+# the chunks run on a pool of sessions complete in any order, their lines are
+#   mapped out and the summary lines are checked
+map_out_sessions = [
+    { 'regex' : re.compile(r'^--.*: Chunk: \d+, Rows: .*\n', re.MULTILINE), 'sub' : '' }
+    , { 'regex' : re.compile(r'(--Duration\s*: )\d+:\d{2}:\d{2}'), 'sub' : r'\1H:MM:SS' } ]
+
+# the number of estimated chunks depends on the column statistics
+map_out_estimate = map_out_sessions + [
+    { 'regex' : re.compile(r'^--.*: Estimated Chunking, .*\n', re.MULTILINE), 'sub' : '' }
+    , { 'regex' : re.compile(r'(--Total Chunks\s*: )\d+'), 'sub' : r'\1N' } ]
+
+# the target table is kept by --post_sql '', its rows are counted and it is dropped
+count_and_drop_sql = (
+    """$env:YBPASSWORD='{user_password}'; ybsql -h {host} -U {user_name} -d {db1} -A -t -c 'SELECT COUNT(*) FROM dev.new_chunked_integer_t; DROP TABLE dev.new_chunked_integer_t'"""
+    if Common.is_windows
+    else """YBPASSWORD={user_password} ybsql -h {host} -U {user_name} -d {db1} -A -t -c 'SELECT COUNT(*) FROM dev.new_chunked_integer_t; DROP TABLE dev.new_chunked_integer_t'""")
+
 test_cases = [
     test_case(
         cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
@@ -37,6 +54,55 @@ test_cases = [
         , stderr=''
         , map_out=map_out)
 
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args2 '
+            '--column col4 --execute_chunk_dml --column_cardinality low'
+            ' --parallel_sessions 4 --post_sql "";'
+            ' %s') % count_and_drop_sql
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+--Total Rows         : 1000000
+--IS NULL Rows       : 0
+--Running total check: PASSED
+--Duration           : 0:00:03
+--Total Chunks       : 11
+--Failed Chunks      : 0
+--Sessions           : 4
+-- Completed DML chunking.
+1000000
+DROP TABLE"""
+        , stderr=''
+        , map_out=map_out_sessions)
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args2 '
+            '--column col4 --execute_chunk_dml --column_cardinality low --verbose_chunk_off'
+            ' --parallel_sessions 4 --pre_sql "SET ybd_analyze_after_writes TO OFF"')
+        , exit_code=1
+        , stdout=""
+        , stderr="""yb_chunk_dml_by_integer.py: error: the --pre_sql SET only applies to the session it is run in and the chunk DMLs are run in sessions of their own, put the session setup in the --dml instead
+for complete help, execute: yb_chunk_dml_by_integer.py --help""")
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args2 '
+            '--column col4 --execute_chunk_dml --column_cardinality low'
+            ' --chunk_boundaries estimate --post_sql "";'
+            ' %s') % count_and_drop_sql
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+--Total Rows         : 1000000
+--IS NULL Rows       : 0
+--Running total check: PASSED
+--Duration           : 0:00:03
+--Total Chunks       : 11
+--Failed Chunks      : 0
+--Sessions           : 1
+-- Completed DML chunking.
+1000000
+DROP TABLE"""
+        , stderr=''
+        , map_out=map_out_estimate)
+
     , test_case(
         cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
             '--column col4 --print_chunk_dml --column_cardinality low --null_chunk_off --verbose_chunk_off')
@@ -52,6 +118,25 @@ INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chun
 INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 8, size: 100000) >>>*/ 227500650000 <= col4 AND col4 < 240000600000 /*<<< chunk_clause */;
 INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 9, size: 100000) >>>*/ 240000600000 <= col4 AND col4 < 247500550000 /*<<< chunk_clause */;
 INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 10, size: 100000) >>>*/ 247500550000 <= col4 AND col4 < 250000500001 /*<<< chunk_clause */;
+-- Completed DML chunking."""
+        , stderr='')
+
+    , test_case(
+        cmd=('yb_chunk_dml_by_integer.py @{argsdir}/yb_chunk_dml_by_integer__args1 '
+            '--column col4 --print_chunk_dml --column_cardinality low --null_chunk_off --verbose_chunk_off'
+            ' --chunk_plan tmp/yb_chunk_dml_by_integer_plan.json')
+        , exit_code=0
+        , stdout="""-- Running DML chunking.
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 1, size: 100000) >>>*/ 1000000 <= col4 AND col4 < 47500950000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 2, size: 100000) >>>*/ 47500950000 <= col4 AND col4 < 90000900000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 3, size: 100000) >>>*/ 90000900000 <= col4 AND col4 < 127500850000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 4, size: 100000) >>>*/ 127500850000 <= col4 AND col4 < 160000800000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 5, size: 100000) >>>*/ 160000800000 <= col4 AND col4 < 187500750000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 6, size: 100000) >>>*/ 187500750000 <= col4 AND col4 < 210000700000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 7, size: 100000) >>>*/ 210000700000 <= col4 AND col4 < 227500650000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 8, size: 100000) >>>*/ 227500650000 <= col4 AND col4 < 240000600000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 9, size: 100000) >>>*/ 240000600000 <= col4 AND col4 < 247500550000 /*<<< chunk_clause */;
+INSERT INTO new_chunked_table SELECT * FROM {db1}.dev.data_types_t WHERE /* chunk_clause(chunk: 10, size: 100000) >>>*/ 247500550000 <= col4 AND col4 < 250000500001 /*<<< chunk_clause */;
 -- Completed DML chunking."""
         , stderr='')
 
@@ -57,4 +57,21 @@ INSERT INTO {db1}."Prod".b1_t SELECT * FROM {db1}."Prod".b1_t__old;
 DROP TABLE {db1}."Prod".b1_t__old;
 COMMIT;"""
         , stderr="")
-]
\ No newline at end of file
+
+    , test_case(
+        cmd="""yb_convert_distribution.py @{argsdir}/db1 --distribute RANDOM --schema_in dev --table_in a1_t"""
+        , exit_code=0
+        , stdout="""----------------------
+-- Table: {db1}.dev.a1_t, Storage: 0MB, Distribute RANDOM Conversion
+----------------------
+BEGIN;
+ALTER TABLE {db1}.dev.a1_t RENAME TO a1_t__old;
+CREATE TABLE {db1}.dev.a1_t (
+    col1 INTEGER
+)
+DISTRIBUTE RANDOM;
+INSERT INTO {db1}.dev.a1_t SELECT * FROM {db1}.dev.a1_t__old;
+DROP TABLE {db1}.dev.a1_t__old;
+COMMIT;"""
+        , stderr="")
+]
@@ -42,6 +42,13 @@ optional arguments:
   --help, --usage, -u   display this help message and exit
   --verbose {{1,2,3}}     display verbose execution{{1 - info, 2 - debug, 3 - extended}}
   --nocolor             turn off colored text output
+  --max_concurrency MAX_CONCURRENCY
+                        the maximum number of queries the utility runs at the same time, defaults to
+                        4
+  --trace_file TRACE_FILE
+                        append a timing event of each command and query to this file, a .json file
+                        is written in the Chrome trace format, any other file as JSON lines,
+                        defaults to the YBEASYCLI_TRACE_FILE env variable
   --version, -v         display the program version and exit
 
 connection arguments:
@@ -57,6 +64,21 @@ connection arguments:
   --current_schema CURRENT_SCHEMA
                         current schema after db connection
   -W                    prompt for password instead of using the YBPASSWORD env variable
+  --ybsql_session       run all the queries of the utility in a single persistent ybsql session
+                        instead of a new ybsql process per query
+  --query_backend {{session,wire,ybsql}}
+                        run queries with; ybsql, a new ybsql process per query, session, a single
+                        persistent ybsql session, same as --ybsql_session, wire, the database wire
+                        protocol from python without ybsql, defaults to ybsql
+  --verify_cache_ttl VERIFY_CACHE_TTL
+                        seconds a verified connection is cached for, later utilities run within the
+                        TTL skip the connection verify query, overrides YBEASYCLI_VERIFY_CACHE_TTL
+                        env variable, defaults to 0, no caching
+  --query_cache_ttl QUERY_CACHE_TTL
+                        seconds the results of repeated catalog queries are cached for, like the
+                        list of databases, later queries and utilities run within the TTL reuse the
+                        result, overrides YBEASYCLI_QUERY_CACHE_TTL env variable, defaults to 0, no
+                        caching
 
 optional output arguments:
   --output_template template
@@ -133,4 +133,14 @@ test_cases = [
 {db1}."Prod"."C1_t" rows: 0
 {db1}."Prod".data_types_t rows: 0"""
         , stderr='')
+
+    , test_case(
+        cmd=(
+            "yb_get_table_names.py @{argsdir}/db1 --schema_in dev --table_in a1_t b1_t c1_t"
+            """ --output_template "SELECT '{{owner}} owns {{table}}';" --exec_output""")
+        , exit_code=0
+        , stdout="""{user_name} owns a1_t
+{user_name} owns b1_t
+{user_name} owns c1_t"""
+        , stderr='')
 ]
\ No newline at end of file
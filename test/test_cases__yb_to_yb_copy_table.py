@@ -1,7 +1,19 @@
 map_out=[ { 'regex' : re.compile(r'\d{4}-[^S]*'), 'sub' : '' }
     , { 'regex' : re.compile(r'\s*\d{1,2}:\d{2}:\d{2}\s*\(.*'), 'sub' : '' }
     , { 'regex' : re.compile(r'\d\.\d\.\d-\d{1,5}'), 'sub' : 'X.X.X-XXXXX' }
-    , { 'regex' : re.compile(r' from 1 source\(s\)'), 'sub' : '' } ]
+    , { 'regex' : re.compile(r' from 1 source\(s\)'), 'sub' : '' }
+    , { 'regex' : re.compile(r', rows: \d+, duration: .*'), 'sub' : '' } ]
+
+# the progress and table summary lines of a multi-table copy end in timings
+map_out_multi_table = map_out + [
+    { 'regex' : re.compile(r'(-- progress, tables: \d+ of \d+, tasks: \d+ of \d+), .*'), 'sub' : r'\1' }
+    , { 'regex' : re.compile(r'(-- table: .*, tasks: \d+ of \d+), rows: .*'), 'sub' : r'\1' } ]
+
+# the b1_t task of the multi-table manifest is set back to pending, so a resume copies only it
+manifest_b1_t_pending = (
+    """(Get-Content -Raw tmp/multi_table_manifest.json) -replace '("CofC": "dev.b1_t_chunk1of1",\\s*"SofS": "",\\s*"unload_sql": "[^"]*",\\s*"status": )"copied"', '$1"pending"' | Set-Content tmp/multi_table_manifest.json"""
+    if Common.is_windows
+    else """sed -i '/"CofC": "dev.b1_t_chunk1of1"/,/"status"/ s/"copied"/"pending"/' tmp/multi_table_manifest.json""")
 
 test_cases = [
     test_case(
@@ -55,10 +67,28 @@ DROP TABLE"""
 -- chunk2of3
 2020-10-11 16:51:04.219 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 1000 good rows in   0:00:06 (READ: 43.88KB/s WRITE: 23.61KB/s)
 -- chunk3of3
-2020-10-11 16:51:11.391 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 560 good rows in   0:00:06 (READ: 24.65KB/s WRITE: 13.22KB/s)"""
+2020-10-11 16:51:11.391 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 560 good rows in   0:00:06 (READ: 24.65KB/s WRITE: 13.22KB/s)
+-- copied tasks: 3"""
             , stderr=''
             , map_out=map_out)
 
+   , test_case(
+        cmd=("""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
+            """ --src_table dev.data_types_t --dst_table Prod.data_types_100_t --log_dir tmp --create_dst_table"""
+            """ --verify;"""
+            """ %s""") %
+                ("""$env:YBPASSWORD='{user_password}'; ybsql -h {host} -U {user_name} -d {db2} -c 'DROP TABLE \""Prod\\"".data_types_100_t' 2> $null"""
+                if Common.is_windows
+                else """YBPASSWORD={user_password} ybsql -h {host} -U {user_name} -d {db2} -c 'DROP TABLE "Prod".data_types_100_t' 2> /dev/null""")
+        , exit_code=0
+        , stdout="""-- created destination table: Prod.data_types_100_t
+-- chunk1of1
+2021-03-01 21:04:52.988 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 100 good rows in   0:00:06 (READ:  4.15KB/s WRITE:  2.30KB/s)
+-- verify dev.data_types_t, src rows: 100, dst rows: 100, buckets: 64, mismatched buckets: 0
+DROP TABLE"""
+        , stderr=''
+        , map_out=map_out)
+
    , test_case(
         cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --unload_where_clause "col1 <= 100" """
             """ --src_table dev.data_types_t --dst_table Prod.data_types_t --log_dir tmp --threads 3"""
@@ -66,4 +96,34 @@ DROP TABLE"""
         , stdout=''
         , stderr="yb_to_yb_copy_table.py: The '--threads' option is only supported for YBDB super users."
         , map_out=map_out)
+
+   , test_case(
+        cmd="""yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --schema_in dev --table_in a1_t b1_t --dst_schema Prod"""
+            """ --log_dir tmp --manifest tmp/multi_table_manifest.json --metrics_file tmp/multi_table_metrics.json"""
+            """ --progress_interval 0"""
+        , exit_code=0
+        , stdout="""-- dev.a1_t_chunk1of1
+2021-03-01 21:04:52.988 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 0 good rows in   0:00:06 (READ:  0.00KB/s WRITE:  0.00KB/s)
+-- progress, tables: 1 of 2, tasks: 1 of 2
+-- dev.b1_t_chunk1of1
+2021-03-01 21:04:52.988 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 0 good rows in   0:00:06 (READ:  0.00KB/s WRITE:  0.00KB/s)
+-- progress, tables: 2 of 2, tasks: 2 of 2
+-- table: dev.a1_t, to: Prod.a1_t, status: copied, tasks: 1 of 1
+-- table: dev.b1_t, to: Prod.b1_t, status: copied, tasks: 1 of 1
+-- copied tasks: 2"""
+        , stderr=''
+        , map_out=map_out_multi_table)
+
+   , test_case(
+        cmd=("""%s; yb_to_yb_copy_table.py @{argsdir}/src_db1_dst_db2 --dst_schema Prod"""
+            """ --log_dir tmp --resume tmp/multi_table_manifest.json --progress_interval 0""") % manifest_b1_t_pending
+        , exit_code=0
+        , stdout="""-- skipped copied tasks: 1
+-- dev.b1_t_chunk1of1
+2021-03-01 21:04:52.988 [ INFO] <main>  SUCCESSFUL BULK LOAD: Loaded 0 good rows in   0:00:06 (READ:  0.00KB/s WRITE:  0.00KB/s)
+-- progress, tables: 2 of 2, tasks: 2 of 2
+-- table: dev.a1_t, to: Prod.a1_t, status: copied, tasks: 1 of 1
+-- table: dev.b1_t, to: Prod.b1_t, status: copied, tasks: 1 of 1"""
+        , stderr=''
+        , map_out=map_out_multi_table)
 ]
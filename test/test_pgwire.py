@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Test the wire protocol query backend, yb_pgwire, against a database.
+
+The tests only use PostgreSQL compatible SQL, so they run against a local
+PostgreSQL server as a stand-in for a Yellowbrick cluster, like:
+
+    ./test_pgwire.py --host localhost --port 5432 --dbuser postgres --conn_db postgres
+
+The password is read from the YBPASSWORD or PGPASSWORD env variable.  If the
+ybsql or psql client is found each script is also run with the client and the
+stdout, stderr and exit code of the client and yb_pgwire are compared.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+path = os.path.dirname(sys.argv[0])
+if len(path) == 0:
+    path = '.'
+sys.path.append('%s/../bin/' % path)
+
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    from distutils.spawn import find_executable
+except ImportError:
+    from shutil import which as find_executable
+
+import yb_pgwire
+from yb_common import Text
+
+class script_case:
+    """A ybsql script and the stdout, stderr and exit code it must produce."""
+    def __init__(self, script, exit_code, stdout, stderr=''):
+        self.script = script
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.stderr = stderr
+
+script_cases = [
+    script_case(
+        "SELECT 1 AS a, 'x' AS b, NULL AS c;"
+        , 0, '1|x|\n')
+    , script_case(
+        "SELECT n FROM generate_series(1, 3) AS n"
+        , 0, '1\n2\n3\n')
+    , script_case(
+        "\\pset tuples_only off\nSELECT 1 AS a, NULL AS b;\nSELECT 1 AS a WHERE FALSE;"
+        , 0, 'a|b\n1|\n(1 row)\na\n(0 rows)\n')
+    , script_case(
+        "\\t off\n\\pset footer off\n\\pset fieldsep ','\n\\pset null '<null>'\nSELECT 1 AS a, NULL AS b;"
+        , 0, 'a,b\n1,<null>\n')
+    , script_case(
+        "\\echo '{\"rowcount\":'\nSELECT COUNT(*) FROM generate_series(1, 10);\n\\echo -n '}' \"q\" 'a''b\\tc'"
+        , 0, '{"rowcount":\n10\n} "q" a\'b\tc')
+    , script_case(
+        "DO $$ BEGIN RAISE INFO 'semi;colon'; END $$;\nSELECT ';', $t$ ; $t$, (SELECT 1; -- ;\n);"
+        , 3, '', 'INFO:  semi;colon\nERROR:  syntax error at or near ";"\nLINE 1: SELECT \';\', $t$ ; $t$, (SELECT 1; -- ;\n                                        ^\n')
+    , script_case(
+        "SELECT 1;\nSELECT * FROM yb_pgwire_not_a_table;\nSELECT 2;"
+        , 3, '1\n', 'ERROR:  relation "yb_pgwire_not_a_table" does not exist\nLINE 1: SELECT * FROM yb_pgwire_not_a_table;\n                      ^\n')
+    , script_case(
+        "CREATE TEMP TABLE yb_pgwire_t (i INT);\nINSERT INTO yb_pgwire_t VALUES (1), (2);\n/* ; */ SELECT SUM(i) FROM yb_pgwire_t;"
+        , 0, '3\n')
+    , script_case(
+        "BEGIN;\nSET LOCAL search_path TO pg_catalog;\nSHOW search_path;\nROLLBACK;\nSHOW search_path;"
+        , 0, 'pg_catalog\n"$user", public\n')
+]
+
+class test_pgwire:
+    def __init__(self):
+        self.args = self.init_args()
+        self.password = os.environ.get('YBPASSWORD') or os.environ.get('PGPASSWORD')
+        self.client = find_executable('ybsql') or find_executable('psql')
+        self.failed_ct = 0
+        self.test_ct = 0
+
+    def init_args(self):
+        args_parser = argparse.ArgumentParser(
+            description='Test the wire protocol query backend against a PostgreSQL compatible database.'
+            , add_help=False)
+        args_parser.add_argument('--host', '-h', help='database server hostname')
+        args_parser.add_argument('--port', '-p', default='5432', help='database server port')
+        args_parser.add_argument('--dbuser', '-U', default=os.environ.get('USER'), help='database user')
+        args_parser.add_argument('--conn_db', '-d', help='database to connect to')
+        args_parser.add_argument('--no_compare', action='store_true'
+            , help='do not compare the yb_pgwire results to the ybsql/psql client')
+        args_parser.add_argument('--print_output', action='store_true'
+            , help='print the output of each test')
+        args_parser.add_argument('--help', action='help')
+        return args_parser.parse_args()
+
+    def connect(self, database=None):
+        return yb_pgwire.PGWireConnection(
+            host=self.args.host, port=self.args.port, user=self.args.dbuser
+            , database=(database or self.args.conn_db), password=self.password)
+
+    def client_run(self, script):
+        env = os.environ.copy()
+        if self.password:
+            env['PGPASSWORD'] = self.password
+            env['YBPASSWORD'] = self.password
+        cmd = [self.client, '-A', '-q', '-t', '-v', 'ON_ERROR_STOP=1', '-X'
+            , '-p', self.args.port, '-U', self.args.dbuser]
+        if self.args.host:
+            cmd.extend(['-h', self.args.host])
+        if self.args.conn_db:
+            cmd.extend(['-d', self.args.conn_db])
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            , stderr=subprocess.PIPE, env=env)
+        (stdout, stderr) = p.communicate(script.encode('utf-8'))
+        return (stdout.decode('utf-8'), stderr.decode('utf-8'), p.returncode)
+
+    def check(self, desc, expected, actual):
+        self.test_ct += 1
+        passed = (expected == actual)
+        if not passed:
+            self.failed_ct += 1
+        print('%s: %s, %s' % (
+            Text.color('Test', style='bold')
+            , Text.color('Passed', fg='green') if passed else Text.color('Failed', fg='red')
+            , desc))
+        if self.args.print_output or not passed:
+            print('%s\n%s\n%s\n%s' % (
+                Text.color('--Expected--', style='bold'), repr(expected)
+                , Text.color('--Actual--', style='bold'), repr(actual)))
+
+    def test_scripts(self):
+        script = yb_pgwire.YbsqlScript(self.connect)
+        for (case_ct, case) in enumerate(script_cases, 1):
+            (stdout, stderr, exit_code, result_sets) = script.run(case.script)
+            self.check('script case %d' % case_ct
+                , (case.stdout, case.stderr, case.exit_code), (stdout, stderr, exit_code))
+            if self.client and not self.args.no_compare:
+                self.check('script case %d compared to %s' % (case_ct, os.path.basename(self.client))
+                    , self.client_run(case.script), (stdout, stderr, exit_code))
+        script.close()
+
+    def test_typed_rows(self):
+        conn = self.connect()
+        rows = conn.query("SELECT 1::INT, 2::BIGINT, 1.5::NUMERIC, 0.5::FLOAT8, TRUE, 'x'::VARCHAR"
+            ", '2021-02-03'::DATE, '2021-02-03 04:05:06.5'::TIMESTAMP, NULL::INT")
+        self.check('typed rows', [(1, 2, Decimal('1.5'), 0.5, True, 'x'
+            , date(2021, 2, 3), datetime(2021, 2, 3, 4, 5, 6, 500000), None)], rows)
+        conn.close()
+
+    def test_cursor(self):
+        conn = self.connect()
+        rows = list(conn.cursor('SELECT n FROM generate_series(1, 25) AS n', fetch_rows=10))
+        self.check('server-side cursor', [(n,) for n in range(1, 26)], rows)
+        self.check('server-side cursor transaction closed', 'I', conn.transaction_status)
+        conn.close()
+
+    def test_bad_password(self):
+        try:
+            conn = yb_pgwire.PGWireConnection(
+                host=self.args.host, port=self.args.port, user=self.args.dbuser
+                , database=self.args.conn_db, password='-*-force bad password-*-')
+            conn.close()
+            # the server may trust the connection without a password
+            self.check('bad password', True, True)
+        except yb_pgwire.PGWireError as error:
+            self.check('bad password', 'FATAL', error.severity)
+
+    def execute(self):
+        self.test_scripts()
+        self.test_typed_rows()
+        self.test_cursor()
+        self.test_bad_password()
+        print('%s: %d, %s: %d' % (
+            Text.color('Tests', style='bold'), self.test_ct
+            , Text.color('Failed', style='bold'), self.failed_ct))
+        exit(1 if self.failed_ct else 0)
+
+test_pgwire().execute()